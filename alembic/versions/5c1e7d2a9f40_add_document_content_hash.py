@@ -0,0 +1,41 @@
+"""add document content hash
+
+Revision ID: 5c1e7d2a9f40
+Revises: 963b580a1928
+Create Date: 2026-10-16 09:12:41.208315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e7d2a9f40'
+down_revision: Union[str, Sequence[str], None] = '963b580a1928'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema: Add content hash deduplication columns to documents."""
+    op.add_column('documents', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_documents_content_hash'), 'documents', ['content_hash'], unique=True)
+
+    op.add_column('documents', sa.Column('source_document_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'fk_documents_source_document_id_documents',
+        'documents', 'documents',
+        ['source_document_id'], ['id'],
+        ondelete='SET NULL'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema: Remove content hash deduplication columns."""
+    op.drop_constraint('fk_documents_source_document_id_documents', 'documents', type_='foreignkey')
+    op.drop_column('documents', 'source_document_id')
+
+    op.drop_index(op.f('ix_documents_content_hash'), table_name='documents')
+    op.drop_column('documents', 'content_hash')
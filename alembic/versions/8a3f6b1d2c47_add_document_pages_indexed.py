@@ -0,0 +1,35 @@
+"""add document pages indexed
+
+Revision ID: 8a3f6b1d2c47
+Revises: 5c1e7d2a9f40
+Create Date: 2026-10-16 14:37:05.611482
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a3f6b1d2c47'
+down_revision: Union[str, Sequence[str], None] = '5c1e7d2a9f40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema: Track how many pages of each document are indexed."""
+    op.add_column(
+        'documents',
+        sa.Column('pages_indexed', sa.Integer(), nullable=False, server_default='0')
+    )
+    # Documents ingested before progressive indexing are fully indexed
+    op.execute(
+        "UPDATE documents SET pages_indexed = no_of_pages WHERE status = 'completed'"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema: Remove the indexed page counter."""
+    op.drop_column('documents', 'pages_indexed')
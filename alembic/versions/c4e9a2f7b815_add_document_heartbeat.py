@@ -0,0 +1,28 @@
+"""add document heartbeat
+
+Revision ID: c4e9a2f7b815
+Revises: 8a3f6b1d2c47
+Create Date: 2026-10-16 19:12:48.204317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e9a2f7b815'
+down_revision: Union[str, Sequence[str], None] = '8a3f6b1d2c47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema: Record when an ingestion job last reported on a document."""
+    op.add_column('documents', sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema: Remove the ingestion heartbeat."""
+    op.drop_column('documents', 'heartbeat_at')
@@ -1,10 +1,10 @@
 """Retriever agent for document retrieval operations."""
 
 import logging
-from typing import Any, List
+from typing import Any, Dict, List, Tuple
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
-from ..services import QueryService
+from ..services import QueryService, RetrievalExecutor
 from .base import Agent
 
 logger = logging.getLogger(__name__)
@@ -51,6 +51,37 @@ class Retriever(Agent):
         logger.info(f"Retrieved {len(documents)} documents for query: {query[:50]}...")
         return documents
 
+    def retrieve_documents_batch(
+        self, searches: List[Tuple[str, int]], document_filenames: List[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Retrieve documents for several queries concurrently.
+
+        The queries are embedded in one request and searched in parallel
+        shards under the retrieval deadline (see RetrievalExecutor). There
+        is no retry loop here: searches that fail or miss the deadline are
+        dropped so the answer is not held up.
+
+        Args:
+            searches: List of (query, top_k) tuples
+            document_filenames: Optional list of document filenames to filter by
+
+        Returns:
+            Unique results merged by chunk ID (see RetrievalExecutor.run)
+
+        Raises:
+            ValueError: If any query is empty
+        """
+        if any(not query or not query.strip() for query, _ in searches):
+            raise ValueError("Query cannot be empty")
+
+        results = RetrievalExecutor().run(searches, document_filenames=document_filenames)
+
+        logger.info(
+            f"Retrieved {len(results['ids'])} unique documents for {len(searches)} queries"
+        )
+        return results
+
     def execute(self, query: str, top_k: int = 5, document_filenames: List[str] = None) -> List[Any]:
         """
         Execute the retriever agent.
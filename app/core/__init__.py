@@ -1,5 +1,7 @@
 from .config import settings
 from .database import vector_db_client
 from .relation_database import db_client
+from .event_loop_monitor import event_loop_monitor
+from .executors import run_blocking, run_cpu
 
-__all__ = ["settings","db_client", "vector_db_client"]
\ No newline at end of file
+__all__ = ["settings","db_client", "vector_db_client", "event_loop_monitor", "run_blocking", "run_cpu"]
\ No newline at end of file
@@ -12,7 +12,31 @@ class Settings(BaseSettings):
         default="text-embedding-3-small",
         env="OPENAI_EMBEDDING_MODEL"
     )
-    embedding_batch_size: int = Field(default=100, env="EMBEDDING_BATCH_SIZE")
+    embedding_batch_size: int = Field(default=100, env="EMBEDDING_BATCH_SIZE")  # max chunks per request
+    embedding_batch_max_tokens: int = Field(default=100000, env="EMBEDDING_BATCH_MAX_TOKENS")
+    embedding_max_concurrency: int = Field(default=8, env="EMBEDDING_MAX_CONCURRENCY")
+    embedding_rpm_limit: int = Field(default=3000, env="EMBEDDING_RPM_LIMIT")
+    embedding_tpm_limit: int = Field(default=1000000, env="EMBEDDING_TPM_LIMIT")
+    embedding_max_retries: int = Field(default=6, env="EMBEDDING_MAX_RETRIES")
+
+    # Embedding Cache Configuration
+    embedding_cache_backend: str = Field(default="disk", env="EMBEDDING_CACHE_BACKEND")  # disk, redis, none
+    embedding_cache_path: str = Field(
+        default="./embedding_cache/embeddings.sqlite3",
+        env="EMBEDDING_CACHE_PATH"
+    )
+    embedding_cache_max_entries: int = Field(default=200000, env="EMBEDDING_CACHE_MAX_ENTRIES")
+    query_embedding_cache_size: int = Field(default=2048, env="QUERY_EMBEDDING_CACHE_SIZE")  # in-process LRU, 0 = off
+    query_embedding_cache_ttl_seconds: int = Field(
+        default=3600, env="QUERY_EMBEDDING_CACHE_TTL_SECONDS"
+    )  # in-process LRU
+    query_embedding_cache_redis: bool = Field(default=True, env="QUERY_EMBEDDING_CACHE_REDIS")
+    query_embedding_cache_redis_ttl_seconds: int = Field(
+        default=86400, env="QUERY_EMBEDDING_CACHE_REDIS_TTL_SECONDS"
+    )  # 1 day
+    query_embedding_cache_redis_max_entries: int = Field(
+        default=100000, env="QUERY_EMBEDDING_CACHE_REDIS_MAX_ENTRIES"
+    )
     
     # Database Configuration
     database_url: str = Field(
@@ -30,12 +54,32 @@ class Settings(BaseSettings):
         default="document_chunks",
         env="CHROMA_COLLECTION_NAME"
     )
+    vector_store_batch_size: int = Field(
+        default=512, env="VECTOR_STORE_BATCH_SIZE"
+    )  # chunks embedded and written per flush
+    
+    # Retrieval Configuration
+    retrieval_workers: int = Field(default=8, env="RETRIEVAL_WORKERS")  # searches running at once, all requests
+    retrieval_max_concurrency: int = Field(
+        default=4, env="RETRIEVAL_MAX_CONCURRENCY"
+    )  # concurrent searches for one plan or refinement round
+    retrieval_deadline_seconds: float = Field(default=10.0, env="RETRIEVAL_DEADLINE_SECONDS")
+    retrieval_cache_size: int = Field(default=4096, env="RETRIEVAL_CACHE_SIZE")  # cached searches, 0 = off
+    retrieval_cache_ttl_seconds: int = Field(default=600, env="RETRIEVAL_CACHE_TTL_SECONDS")
     
     # Text Processing Configuration
     chunk_size: int = Field(default=1000, env="CHUNK_SIZE")
     chunk_overlap: int = Field(default=200, env="CHUNK_OVERLAP")
+
+    # PDF Extraction Configuration
+    extraction_workers: int = Field(default=0, env="EXTRACTION_WORKERS")  # 0 = one per CPU, 1 = in-process
+    extraction_pages_per_shard: int = Field(default=50, env="EXTRACTION_PAGES_PER_SHARD")
     
     max_file_size_mb: int = Field(default=50, env="MAX_FILE_SIZE_MB")
+    max_upload_request_mb: int = Field(
+        default=200, env="MAX_UPLOAD_REQUEST_MB"
+    )  # whole multipart body, checked on Content-Length before parsing
+    upload_chunk_size_kb: int = Field(default=1024, env="UPLOAD_CHUNK_SIZE_KB")
     
     # File Upload Configuration
     upload_directory: str = Field(default="./pdfs", env="UPLOAD_DIRECTORY")
@@ -44,6 +88,35 @@ class Settings(BaseSettings):
     redis_db: int = Field(default=0, env="REDIS_DB")
 
     session_ttl_seconds: int = Field(default=3600, env="SESSION_TTL_SECONDS")  # 1 hour
+
+    # Ingestion Worker Configuration
+    ingestion_worker_concurrency: int = Field(default=2, env="INGESTION_WORKER_CONCURRENCY")
+    ingestion_job_ttl_seconds: int = Field(default=86400, env="INGESTION_JOB_TTL_SECONDS")  # 1 day
+    ingestion_queue_size: int = Field(default=2, env="INGESTION_QUEUE_SIZE")  # documents buffered between stages
+    progressive_indexing_pages: int = Field(
+        default=20, env="PROGRESSIVE_INDEXING_PAGES"
+    )  # pages indexed first on longer documents, 0 = index in one pass
+    ingestion_heartbeat_seconds: int = Field(
+        default=30, env="INGESTION_HEARTBEAT_SECONDS"
+    )  # how often running jobs report they are alive
+    ingestion_heartbeat_timeout_seconds: int = Field(
+        default=300, env="INGESTION_HEARTBEAT_TIMEOUT_SECONDS"
+    )  # silence after which an unfinished job is considered dead
+    ingestion_checkpoint_backend: str = Field(
+        default="disk", env="INGESTION_CHECKPOINT_BACKEND"
+    )  # disk, redis, none
+    ingestion_checkpoint_path: str = Field(
+        default="./ingestion_checkpoints", env="INGESTION_CHECKPOINT_PATH"
+    )
+    ingestion_checkpoint_ttl_seconds: int = Field(
+        default=604800, env="INGESTION_CHECKPOINT_TTL_SECONDS"
+    )  # 7 days, redis backend only
+
+    # Event Loop Configuration
+    blocking_io_workers: int = Field(default=8, env="BLOCKING_IO_WORKERS")  # DB/Redis calls from async routes
+    cpu_workers: int = Field(default=2, env="CPU_WORKERS")  # hashing and copies from async routes
+    event_loop_lag_interval_ms: int = Field(default=100, env="EVENT_LOOP_LAG_INTERVAL_MS")
+    event_loop_lag_warning_ms: int = Field(default=200, env="EVENT_LOOP_LAG_WARNING_MS")
     
     class Config:
         env_file = ".env"
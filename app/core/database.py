@@ -1,8 +1,10 @@
 import chromadb
 from chromadb.config import Settings as ChromaSettings
 from .config import settings
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Sequence, Set, Union
+import numpy as np
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
@@ -11,6 +13,13 @@ class VectorDBClient:
     """ChromaDB client for storing and retrieving document embeddings"""
 
     def __init__(self):
+        # Connected on first use, so processes that only import the app
+        # (e.g. PDF extraction workers) never open the persistent store
+        self._client = None
+        self._collection = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> None:
         """Initialize ChromaDB client with persistent storage"""
         try:
             # Create persistent client (automatically creates folder if not exists)
@@ -35,15 +44,24 @@ class VectorDBClient:
 
     @property
     def collection(self):
-        """Get the ChromaDB collection"""
+        """Get the ChromaDB collection, connecting on first use"""
+        if self._collection is None:
+            with self._lock:
+                if self._collection is None:
+                    self._connect()
         return self._collection
 
-    def store_chunks(self, chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def store_chunks(self, chunks: Sequence[Any]) -> Dict[str, Any]:
         """
         Store document chunks with embeddings in ChromaDB
 
+        Chunks are upserted by their deterministic IDs, so storing the same
+        chunks again (e.g. when a failed ingestion is retried) overwrites
+        them instead of creating duplicates.
+
         Args:
-            chunks: List of chunk dictionaries with embeddings
+            chunks: Chunk records (see services.text_chunker.Chunk) whose
+                `embedding` holds a float32 vector
 
         Returns:
             Dictionary with storage statistics
@@ -52,60 +70,68 @@ class VectorDBClient:
             logger.warning("No chunks to store")
             return {"stored": 0, "skipped": 0, "errors": 0}
 
-        ids = []
-        embeddings = []
-        documents = []
-        metadatas = []
+        valid = []
         errors = 0
 
         for chunk in chunks:
-            try:
-                # Validate chunk has required fields
-                if "embeddings" not in chunk or chunk["embeddings"] is None:
-                    logger.warning(
-                        f"Chunk {chunk.get('chunk_id', 'unknown')} missing embeddings"
-                    )
-                    errors += 1
-                    continue
-
-                ids.append(chunk["chunk_id"])
-                embeddings.append(chunk["embeddings"])
-                documents.append(chunk["text"])
-                metadatas.append(
-                    {
-                        "document_id": chunk["document_id"],
-                        "page_number": chunk.get("page_number", 0),
-                        "char_count": chunk.get("char_count", 0),
-                        "start_position": chunk.get("start_position", 0),
-                        "end_position": chunk.get("end_position", 0),
-                    }
-                )
-            except Exception as e:
-                logger.error(f"Error processing chunk: {e}")
+            # Validate chunk has an embedding
+            if chunk.embedding is None:
+                logger.warning(f"Chunk {chunk.chunk_id} missing embeddings")
                 errors += 1
                 continue
+            valid.append(chunk)
 
-        if not ids:
+        if not valid:
             logger.error("No valid chunks to store")
             return {"stored": 0, "skipped": len(chunks), "errors": errors}
 
         try:
-            # Add to ChromaDB (automatically persists with PersistentClient)
-            self._collection.add(
-                ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas
+            # Upsert into ChromaDB (automatically persists with PersistentClient),
+            # passing the embeddings as one contiguous float32 matrix
+            self.collection.upsert(
+                ids=[chunk.chunk_id for chunk in valid],
+                embeddings=np.stack([chunk.embedding for chunk in valid]).astype(
+                    np.float32, copy=False
+                ),
+                documents=[chunk.text for chunk in valid],
+                metadatas=[chunk.metadata() for chunk in valid],
             )
 
-            logger.info(f"Stored {len(ids)} chunks in ChromaDB")
+            logger.info(f"Stored {len(valid)} chunks in ChromaDB")
             return {
-                "stored": len(ids),
-                "skipped": len(chunks) - len(ids),
+                "stored": len(valid),
+                "skipped": len(chunks) - len(valid),
                 "errors": errors,
-                "total_in_collection": self._collection.count(),
+                "total_in_collection": self.collection.count(),
             }
         except Exception as e:
             logger.error(f"Failed to store chunks in ChromaDB: {e}")
             raise
 
+    def get_existing_chunk_ids(self, chunks: Sequence[Any]) -> Set[str]:
+        """
+        Find which chunks are already stored for their document
+
+        A stored ID only counts when its document_id matches, so vectors
+        left behind by another document never satisfy this one.
+
+        Args:
+            chunks: Chunk records with `chunk_id` and `document_id`
+
+        Returns:
+            Set of chunk IDs that are already in the collection
+        """
+        if not chunks:
+            return set()
+
+        expected = {chunk.chunk_id: chunk.document_id for chunk in chunks}
+        results = self.collection.get(ids=list(expected), include=["metadatas"])
+        return {
+            chunk_id
+            for chunk_id, metadata in zip(results["ids"], results["metadatas"])
+            if metadata and metadata.get("document_id") == expected[chunk_id]
+        }
+
     def search_similar(
         self, query_embedding: List[float], n_results: int = 5, where: Dict[str, Any] = None
     ) -> Dict[str, Any]:
@@ -128,12 +154,70 @@ class VectorDBClient:
             if where:
                 query_params["where"] = where
             
-            results = self._collection.query(**query_params)
+            results = self.collection.query(**query_params)
             return results
         except Exception as e:
             logger.error(f"Failed to search ChromaDB: {e}")
             raise
 
+    def search_similar_many(
+        self,
+        query_embeddings: Union[np.ndarray, Sequence[Sequence[float]]],
+        n_results: Union[int, Sequence[int]] = 5,
+        where: Dict[str, Any] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for the chunks most similar to several query embeddings in one call
+
+        The collection is queried once with the whole matrix and the shared
+        `where` filter, instead of once per query.
+
+        Args:
+            query_embeddings: Matrix of query vectors, one row per query
+            n_results: Number of results for every query, or one count per query
+            where: Optional filter dictionary applied to every query
+
+        Returns:
+            One result dictionary per query, in order, shaped like the result
+            of `search_similar` (ids, documents, metadatas and distances)
+        """
+        if len(query_embeddings) == 0:
+            return []
+
+        counts = (
+            [n_results] * len(query_embeddings)
+            if isinstance(n_results, int)
+            else list(n_results)
+        )
+        if len(counts) != len(query_embeddings):
+            raise ValueError(
+                f"Got {len(counts)} result counts for {len(query_embeddings)} queries"
+            )
+
+        try:
+            query_params = {
+                "query_embeddings": np.asarray(query_embeddings, dtype=np.float32),
+                "n_results": max(counts),
+            }
+            if where:
+                query_params["where"] = where
+
+            results = self.collection.query(**query_params)
+        except Exception as e:
+            logger.error(f"Failed to search ChromaDB for {len(counts)} queries: {e}")
+            raise
+
+        # Split the per-query rows back out, each trimmed to its own count
+        keys = [
+            key
+            for key in ("ids", "documents", "metadatas", "distances")
+            if results.get(key) is not None
+        ]
+        return [
+            {key: [results[key][row][:count]] for key in keys}
+            for row, count in enumerate(counts)
+        ]
+
     def check_document_exists(self, document_id: str) -> bool:
         """
         Check if a document already exists in the database
@@ -145,7 +229,7 @@ class VectorDBClient:
             True if document exists, False otherwise
         """
         try:
-            results = self._collection.get(where={"document_id": document_id})
+            results = self.collection.get(where={"document_id": document_id})
             return len(results["ids"]) > 0
         except Exception as e:
             logger.error(f"Error checking document existence: {e}")
@@ -0,0 +1,90 @@
+"""
+Event-loop lag monitor.
+
+A background task sleeps for `event_loop_lag_interval_ms` and measures how
+late it wakes up. The overshoot is the time the loop was busy with
+something else: any blocking call in an async route shows up here as lag
+for every request on the process. Samples above
+`event_loop_lag_warning_ms` are counted and logged as stalls; the stats
+are reported by `/health`.
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+import asyncio
+import logging
+import time
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class EventLoopLagMonitor:
+    """Samples event-loop lag and keeps a rolling window of measurements"""
+
+    def __init__(self, interval_ms: int, warning_ms: int, window: int = 600):
+        self.interval = interval_ms / 1000
+        self.warning = warning_ms / 1000
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._max_lag = 0.0
+        self._stalls = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start sampling on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            logger.info(f"Event loop lag monitor started ({self.interval * 1000:.0f} ms interval)")
+
+    async def stop(self) -> None:
+        """Stop sampling"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, time.perf_counter() - expected))
+
+    def record(self, lag: float) -> None:
+        """Record one lag sample in seconds"""
+        self._samples.append(lag)
+        self._max_lag = max(self._max_lag, lag)
+        if lag >= self.warning:
+            self._stalls += 1
+            logger.warning(f"Event loop blocked for {lag * 1000:.0f} ms")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Summarise the recent lag samples
+
+        Returns:
+            Dictionary with current, mean, p99 and max lag in milliseconds
+            plus the number of stalls since start
+        """
+        samples = sorted(self._samples)
+        if not samples:
+            return {"running": self._task is not None, "samples": 0}
+        return {
+            "running": self._task is not None,
+            "samples": len(samples),
+            "current_ms": round(self._samples[-1] * 1000, 2),
+            "mean_ms": round(sum(samples) / len(samples) * 1000, 2),
+            "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000, 2),
+            "max_ms": round(self._max_lag * 1000, 2),
+            "stalls": self._stalls,
+        }
+
+
+# Create singleton instance
+event_loop_monitor = EventLoopLagMonitor(
+    interval_ms=settings.event_loop_lag_interval_ms,
+    warning_ms=settings.event_loop_lag_warning_ms,
+)
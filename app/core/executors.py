@@ -0,0 +1,54 @@
+"""
+Dedicated executors for blocking work started from async routes.
+
+Async routes must never block the event loop: while they do, every other
+request on the process (health checks, chat queries) waits. Blocking
+calls are handed to one of two thread pools instead:
+
+- `run_blocking`: synchronous database and Redis calls
+- `run_cpu`: hashing and buffer copies (hashlib releases the GIL)
+
+Keeping them apart means a burst of uploads hashing large files cannot
+starve the pool that serves database calls, and vice versa. Both pools
+are separate from the default executor FastAPI uses for sync routes.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, TypeVar
+import asyncio
+import logging
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_blocking_executor = ThreadPoolExecutor(
+    max_workers=max(1, settings.blocking_io_workers), thread_name_prefix="blocking-io"
+)
+_cpu_executor = ThreadPoolExecutor(
+    max_workers=max(1, settings.cpu_workers), thread_name_prefix="cpu"
+)
+
+
+async def run_blocking(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking I/O call (database, Redis) off the event loop"""
+    return await asyncio.get_running_loop().run_in_executor(
+        _blocking_executor, partial(fn, *args, **kwargs)
+    )
+
+
+async def run_cpu(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run CPU-bound work (hashing, copies) off the event loop"""
+    return await asyncio.get_running_loop().run_in_executor(
+        _cpu_executor, partial(fn, *args, **kwargs)
+    )
+
+
+def shutdown_executors() -> None:
+    """Stop both pools, waiting for calls already running"""
+    _blocking_executor.shutdown(wait=True)
+    _cpu_executor.shutdown(wait=True)
+    logger.info("Blocking and CPU executors shut down")
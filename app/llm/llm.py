@@ -1,4 +1,4 @@
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from ..core.config import settings
 import logging
 
@@ -26,6 +26,16 @@ class LLMClient:
     def embeddings(self):
         """Access to embeddings API"""
         return self._client.embeddings
+
+    def create_async_client(self, max_retries: int = 2) -> AsyncOpenAI:
+        """
+        Create an async OpenAI client bound to the running event loop.
+
+        Async clients pool connections per event loop, so callers that run
+        their own loop (e.g. via asyncio.run) should create and close one
+        per loop instead of sharing a singleton.
+        """
+        return AsyncOpenAI(api_key=settings.openai_api_key, max_retries=max_retries)
     
 
 
@@ -1,7 +1,11 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from .routes import file_router, chat_router
-from .core import settings, vector_db_client, db_client
+from .core import settings, vector_db_client, db_client, event_loop_monitor
+from .core.executors import shutdown_executors
 from .memory.redis_client import redis_client
+from .memory.retrieval_cache import retrieval_cache
+from .services.embedding_cache import embedding_cache, query_embedding_cache
 import logging
 from sqlalchemy import text
 
@@ -14,10 +18,21 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the event-loop lag monitor; stop it and the executors on shutdown"""
+    event_loop_monitor.start()
+    yield
+    await event_loop_monitor.stop()
+    shutdown_executors()
+
+
 app = FastAPI(
     title="Document Processing API",
     description="API for processing PDF documents through extraction, cleaning, and chunking stages",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 
@@ -44,6 +59,21 @@ def health_check():
         logger.error(f"Redis health check failed: {e}")
         redis_status = "unhealthy"
     
+    try:
+        embedding_cache_stats = {"backend": embedding_cache.backend, **embedding_cache.stats()}
+    except Exception as e:
+        logger.error(f"Embedding cache stats unavailable: {e}")
+        embedding_cache_stats = {"backend": embedding_cache.backend, "status": "unavailable"}
+    
+    try:
+        query_embedding_cache_stats = {
+            "backend": query_embedding_cache.backend,
+            **query_embedding_cache.stats(),
+        }
+    except Exception as e:
+        logger.error(f"Query embedding cache stats unavailable: {e}")
+        query_embedding_cache_stats = {"backend": query_embedding_cache.backend, "status": "unavailable"}
+    
     overall_healthy = db_status == "healthy" and redis_status == "healthy"
     
     return {
@@ -52,6 +82,10 @@ def health_check():
         "database": db_status,
         "redis": redis_status,
         "vector_db_items": vector_db_client.collection.count(),
+        "embedding_cache": embedding_cache_stats,
+        "query_embedding_cache": query_embedding_cache_stats,
+        "retrieval_cache": retrieval_cache.stats(),
+        "event_loop": event_loop_monitor.stats(),
         "settings": {
             "chunk_size": settings.chunk_size,
             "chunk_overlap": settings.chunk_overlap,
@@ -61,6 +95,12 @@ def health_check():
     }
 
 
+@app.get("/health/event-loop")
+async def event_loop_health():
+    """Event-loop lag statistics (served on the loop itself, no I/O)"""
+    return event_loop_monitor.stats()
+
+
 # Include routers with prefix
 app.include_router(file_router, prefix="/api", tags=["documents"])
 app.include_router(chat_router, prefix="/api/chat", tags=["chat"])
@@ -1 +1,4 @@
-from .session_store import session_store, SessionStore
\ No newline at end of file
+from .session_store import session_store, SessionStore
+from .job_queue import ingestion_job_queue, IngestionJobQueue, JobTracker, LocalJobQueue
+from .ingestion_checkpoints import ingestion_checkpoints, IngestionCheckpointStore
+from .retrieval_cache import retrieval_cache, RetrievalCache
@@ -0,0 +1,168 @@
+"""
+Per-document checkpoints for resumable ingestion.
+
+While a document moves through the pipeline its intermediate results are
+saved under the Document ID:
+
+- "pages": the extracted and cleaned page texts
+- "chunks": the chunk records (without embeddings)
+- "parts": [first chunk index, pages indexed] of each part the document
+  was indexed in (see progressive indexing in IngestionService)
+- "batches": [start, end) chunk ranges already embedded and stored; ranges
+  rather than batch numbers, so a changed `vector_store_batch_size` still
+  lines up with what an earlier attempt stored
+
+A job that processes a document with a checkpoint resumes after the last
+completed stage instead of starting over. Checkpoints are deleted once the
+document is completed. Two backends are available, selected by
+`ingestion_checkpoint_backend`:
+
+- "disk": JSON files under `ingestion_checkpoint_path` (one worker host)
+- "redis": shared through the configured Redis server, expiring after
+  `ingestion_checkpoint_ttl_seconds`
+"""
+
+from typing import Any, List, Optional, Tuple
+import json
+import logging
+import os
+import shutil
+import threading
+
+from .redis_client import redis_client
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionCheckpointStore:
+    """Base class for checkpoint stores; also used as the no-op store"""
+
+    backend = "none"
+
+    def load(self, document_id: int, kind: str) -> Optional[Any]:
+        """
+        Load a checkpoint
+
+        Args:
+            document_id: Document the checkpoint belongs to
+            kind: "pages", "chunks" or "parts"
+
+        Returns:
+            The saved JSON value, or None if there is no checkpoint
+        """
+        return None
+
+    def save(self, document_id: int, kind: str, value: Any) -> None:
+        """Save a JSON-serialisable checkpoint, replacing any previous one"""
+
+    def load_batches(self, document_id: int) -> List[Tuple[int, int]]:
+        """Return the sorted [start, end) chunk ranges already stored"""
+        return []
+
+    def add_batch(self, document_id: int, start: int, end: int) -> None:
+        """Record that the chunks in [start, end) have been stored"""
+
+    def delete(self, document_id: int) -> None:
+        """Remove every checkpoint of a document"""
+
+
+class DiskCheckpointStore(IngestionCheckpointStore):
+    """Checkpoints as JSON files, one directory per document"""
+
+    backend = "disk"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _file(self, document_id: int, kind: str) -> str:
+        return os.path.join(self.path, str(document_id), f"{kind}.json")
+
+    def load(self, document_id: int, kind: str) -> Optional[Any]:
+        try:
+            with open(self._file(document_id, kind), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, document_id: int, kind: str, value: Any) -> None:
+        path = self._file(document_id, kind)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so a crash never leaves a truncated checkpoint
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(value, f)
+        os.replace(temp_path, path)
+
+    def load_batches(self, document_id: int) -> List[Tuple[int, int]]:
+        # Entries that are not ranges predate range checkpoints and are ignored
+        batches = self.load(document_id, "batches") or []
+        return sorted(tuple(batch) for batch in batches if isinstance(batch, list))
+
+    def add_batch(self, document_id: int, start: int, end: int) -> None:
+        with self._lock:
+            batches = set(self.load_batches(document_id))
+            batches.add((start, end))
+            self.save(document_id, "batches", [list(batch) for batch in sorted(batches)])
+
+    def delete(self, document_id: int) -> None:
+        shutil.rmtree(os.path.join(self.path, str(document_id)), ignore_errors=True)
+
+
+class RedisCheckpointStore(IngestionCheckpointStore):
+    """Checkpoints in Redis, shared by workers on every host"""
+
+    backend = "redis"
+
+    def __init__(self, ttl: int):
+        self.client = redis_client
+        self.prefix = "ingestion_checkpoint"
+        self.ttl = ttl
+
+    def _key(self, document_id: int, kind: str) -> str:
+        return f"{self.prefix}:{document_id}:{kind}"
+
+    def load(self, document_id: int, kind: str) -> Optional[Any]:
+        data = self.client.get(self._key(document_id, kind))
+        return json.loads(data) if data else None
+
+    def save(self, document_id: int, kind: str, value: Any) -> None:
+        self.client.set(self._key(document_id, kind), json.dumps(value), ex=self.ttl)
+
+    def load_batches(self, document_id: int) -> List[Tuple[int, int]]:
+        # Members are "start:end"; members without a range are ignored
+        members = self.client.smembers(self._key(document_id, "batches"))
+        return sorted(
+            (int(start), int(end))
+            for start, _, end in (member.partition(":") for member in members)
+            if end
+        )
+
+    def add_batch(self, document_id: int, start: int, end: int) -> None:
+        key = self._key(document_id, "batches")
+        pipe = self.client.pipeline(transaction=False)
+        pipe.sadd(key, f"{start}:{end}")
+        pipe.expire(key, self.ttl)
+        pipe.execute()
+
+    def delete(self, document_id: int) -> None:
+        self.client.delete(
+            *[self._key(document_id, kind) for kind in ("pages", "chunks", "parts", "batches")]
+        )
+
+
+def create_checkpoint_store() -> IngestionCheckpointStore:
+    """Build the checkpoint store selected by `ingestion_checkpoint_backend`"""
+    backend = settings.ingestion_checkpoint_backend.lower()
+    if backend == "disk":
+        return DiskCheckpointStore(path=settings.ingestion_checkpoint_path)
+    if backend == "redis":
+        return RedisCheckpointStore(ttl=settings.ingestion_checkpoint_ttl_seconds)
+    if backend != "none":
+        logger.warning(f"Unknown ingestion checkpoint backend '{backend}', checkpoints disabled")
+    return IngestionCheckpointStore()
+
+
+# Create singleton instance
+ingestion_checkpoints = create_checkpoint_store()
@@ -0,0 +1,256 @@
+from .redis_client import redis_client
+from ..core.config import settings
+from abc import ABC, abstractmethod
+import uuid
+from datetime import datetime, timezone
+import json
+import logging
+import threading
+from typing import Optional, Dict, List, Any
+
+logger = logging.getLogger(__name__)
+
+
+class JobTracker(ABC):
+    """
+    Ingestion job records with per-document progress tracking
+
+    Creates job records and applies the progress updates of the ingestion
+    pipeline; subclasses decide where jobs are kept.
+    """
+
+    def __init__(self):
+        # Pipeline stages of one job update its record from different threads
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def enqueue(self, chat_id: int, documents: List[Dict[str, Any]]) -> str:
+        """Create a job record for the documents and return its ID"""
+
+    @abstractmethod
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Retrieve a job record, or None if not found"""
+
+    @abstractmethod
+    def _save(self, job_data: Dict[str, Any]) -> None:
+        """Persist a job record after an update"""
+
+    @staticmethod
+    def _new_job(chat_id: int, documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build the record of a new job with every document queued"""
+        job_id = str(uuid.uuid4())
+        created_at = datetime.now(timezone.utc).isoformat()
+
+        return {
+            "job_id": job_id,
+            "chat_id": chat_id,
+            "status": "queued",
+            "created_at": created_at,
+            "updated_at": created_at,
+            "documents": {
+                doc["filename"]: {
+                    "document_id": doc["document_id"],
+                    "path": doc["path"],
+                    "content_hash": doc.get("content_hash"),
+                    "stage": "queued",
+                    "pages_count": 0,
+                    "pages_indexed": 0,
+                    "chunks_count": 0,
+                    "chunks_stored": 0,
+                }
+                for doc in documents
+            },
+        }
+
+    def heartbeat(self, job_data: Dict[str, Any]) -> None:
+        """Record that the job is still being worked on (refreshes `updated_at`)"""
+        with self._lock:
+            self._save(job_data)
+
+    def update_job(self, job_data: Dict[str, Any], status: str) -> None:
+        """Set the overall status of a job"""
+        with self._lock:
+            job_data["status"] = status
+            self._save(job_data)
+
+    def update_document(
+        self, job_data: Dict[str, Any], filename: str, **progress: Any
+    ) -> None:
+        """Update the progress fields (stage, chunk counts, error) of one document
+
+        Progress updates are best effort: a failure to save them is logged
+        but never interrupts the ingestion itself.
+        """
+        with self._lock:
+            job_data["documents"][filename].update(progress)
+            try:
+                self._save(job_data)
+            except Exception as e:
+                logger.error(
+                    f"Failed to record progress for {filename} in job {job_data['job_id']}: {e}"
+                )
+
+
+class IngestionJobQueue(JobTracker):
+    """
+    Redis-backed queue of ingestion jobs with per-document progress tracking
+
+    Dequeued jobs are moved to a processing list rather than popped, and
+    only leave it when the worker acknowledges them, so a job whose worker
+    dies is not lost: `requeue_stale` puts jobs that stopped sending
+    heartbeats back on the queue.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.client = redis_client
+        self.queue_key = "ingestion_queue"
+        self.processing_key = "ingestion_processing"
+        self.job_prefix = "ingestion_job"
+        self.ttl = settings.ingestion_job_ttl_seconds
+
+    def enqueue(self, chat_id: int, documents: List[Dict[str, Any]]) -> str:
+        """Create a job record and push it onto the queue
+
+        Args:
+            chat_id: Chat the documents will be associated with
+            documents: List of {"filename", "document_id", "path", "content_hash"}
+                dictionaries
+
+        Returns:
+            The new job ID
+
+        Raises:
+            redis.RedisError: If the job cannot be queued
+        """
+        job_data = self._new_job(chat_id, documents)
+        self._save(job_data)
+        self.client.lpush(self.queue_key, job_data["job_id"])
+
+        logger.info(f"Queued ingestion job {job_data['job_id']} with {len(documents)} document(s)")
+        return job_data["job_id"]
+
+    def dequeue(self, timeout: int = 5) -> Optional[Dict[str, Any]]:
+        """Block until a job is available, move it to processing and return its record
+
+        The job must be acknowledged with `ack` once it has been processed.
+
+        Args:
+            timeout: Seconds to wait before giving up
+
+        Returns:
+            Job data dictionary or None if the queue stayed empty
+        """
+        job_id = self.client.blmove(self.queue_key, self.processing_key, timeout, "RIGHT", "LEFT")
+        if not job_id:
+            return None
+
+        job_data = self.get_job(job_id)
+        if not job_data:
+            logger.warning(f"Dequeued ingestion job {job_id} has expired")
+            self.client.lrem(self.processing_key, 1, job_id)
+            return None
+        # A job that waited in the queue must not look stale to the reaper
+        self.heartbeat(job_data)
+        return job_data
+
+    def ack(self, job_data: Dict[str, Any]) -> None:
+        """Remove a processed (completed or failed) job from the processing list"""
+        self.client.lrem(self.processing_key, 1, job_data["job_id"])
+
+    def requeue_stale(self, timeout_seconds: float) -> int:
+        """
+        Put processing jobs whose heartbeat is older than `timeout_seconds`
+        back at the head of the queue
+
+        Running jobs refresh `updated_at` through `heartbeat`; a job that
+        stopped doing so lost its worker. Its documents resume from their
+        checkpoints when it runs again. Several workers may reap at once:
+        only the one whose LREM removed the entry re-queues it.
+
+        Returns:
+            Number of jobs re-queued
+        """
+        requeued = 0
+        now = datetime.now(timezone.utc)
+        for job_id in self.client.lrange(self.processing_key, 0, -1):
+            job_data = self.get_job(job_id)
+            if job_data is None:
+                # Expired record: nothing left to run
+                self.client.lrem(self.processing_key, 1, job_id)
+                continue
+            age = now - datetime.fromisoformat(job_data["updated_at"])
+            if age.total_seconds() < timeout_seconds:
+                continue
+            if self.client.lrem(self.processing_key, 1, job_id):
+                self.client.rpush(self.queue_key, job_id)
+                requeued += 1
+                logger.warning(
+                    f"Re-queued ingestion job {job_id}: no heartbeat for {age.total_seconds():.0f}s"
+                )
+        return requeued
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Retrieve a job record
+
+        Args:
+            job_id: The job identifier
+
+        Returns:
+            Job data dictionary or None if not found
+        """
+        try:
+            data = self.client.get(f"{self.job_prefix}:{job_id}")
+            if data:
+                return json.loads(data)
+            return None
+        except Exception as e:
+            logger.error(f"Failed to get ingestion job {job_id}: {e}")
+            return None
+
+    def _save(self, job_data: Dict[str, Any]) -> None:
+        job_data["updated_at"] = datetime.now(timezone.utc).isoformat()
+        self.client.set(
+            name=f"{self.job_prefix}:{job_data['job_id']}",
+            value=json.dumps(job_data),
+            ex=self.ttl,
+        )
+
+
+class LocalJobQueue(JobTracker):
+    """
+    In-process job records for ingestion run without Redis (bulk CLI)
+
+    Jobs are created with `enqueue` and run directly by the caller; there
+    is nothing to dequeue. Progress is kept on the job dictionaries, which
+    `get_job`/`jobs` expose for reporting.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+
+    def enqueue(self, chat_id: int, documents: List[Dict[str, Any]]) -> str:
+        job_data = self._new_job(chat_id, documents)
+        with self._lock:
+            self.jobs[job_data["job_id"]] = job_data
+        return job_data["job_id"]
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.jobs.get(job_id)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Copy the per-document progress of every job, for reporting"""
+        with self._lock:
+            return [
+                dict(progress)
+                for job_data in self.jobs.values()
+                for progress in job_data["documents"].values()
+            ]
+
+    def _save(self, job_data: Dict[str, Any]) -> None:
+        job_data["updated_at"] = datetime.now(timezone.utc).isoformat()
+
+
+# Create singleton instance
+ingestion_job_queue = IngestionJobQueue()
@@ -0,0 +1,196 @@
+from .redis_client import redis_client
+from ..core.config import settings
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import hashlib
+import json
+import logging
+import threading
+import time
+
+import numpy as np
+import redis
+
+logger = logging.getLogger(__name__)
+
+# Generation field bumped on every store; scopes searches without a document filter
+ALL_DOCUMENTS = "*"
+
+
+class RetrievalCache:
+    """
+    In-process cache of vector search results with per-document invalidation
+
+    Results are keyed by (query embedding hash, where filter, n_results).
+    Every document has a generation counter in Redis that ingestion bumps
+    whenever it stores chunks for it; an entry remembers the generations of
+    the documents its filter covers and is only served while they are
+    unchanged. Storing chunks for one document therefore invalidates just
+    the searches that could see it, and other chats keep their warm
+    entries. Searches without a document filter depend on the generation
+    of ALL_DOCUMENTS, which every store bumps.
+
+    Generations live in Redis because chunks are stored by the ingestion
+    worker, not the API process. When Redis is unavailable nothing is
+    served from or added to the cache.
+    """
+
+    redis_retry_seconds = 30
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.client = redis_client
+        self.generations_key = "retrieval_generations"
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], Tuple[int, ...], float]]" = OrderedDict()
+        self._counters = {"hits": 0, "misses": 0, "stale": 0, "bypassed": 0}
+        self._redis_retry_at = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def lookup(
+        self,
+        embeddings: np.ndarray,
+        n_results: Sequence[int],
+        where: Optional[Dict[str, Any]],
+    ) -> Tuple[List[Optional[Dict[str, Any]]], Optional[Tuple[int, ...]]]:
+        """
+        Look up the results of several searches sharing one where filter
+
+        Args:
+            embeddings: Matrix with one query embedding per row
+            n_results: Number of results of each search
+            where: The searches' where filter
+
+        Returns:
+            Tuple of (results aligned with the rows, None on a miss; the
+            current generations of the filter's documents, to pass to
+            `store`, or None when they cannot be read)
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(n_results)
+        if not self.enabled:
+            return results, None
+
+        generations = self._generations(_scope(where))
+        if generations is None:
+            with self._lock:
+                self._counters["bypassed"] += len(results)
+            return results, None
+
+        where_key = json.dumps(where, sort_keys=True, default=str)
+        now = time.monotonic()
+        with self._lock:
+            for index, (embedding, count) in enumerate(zip(embeddings, n_results)):
+                key = _result_key(embedding, where_key, count)
+                entry = self._entries.get(key)
+                if entry is None:
+                    self._counters["misses"] += 1
+                    continue
+                result, entry_generations, expires_at = entry
+                if entry_generations != generations or expires_at <= now:
+                    del self._entries[key]
+                    self._counters["stale"] += 1
+                    continue
+                self._entries.move_to_end(key)
+                results[index] = result
+                self._counters["hits"] += 1
+        return results, generations
+
+    def store(
+        self,
+        embeddings: np.ndarray,
+        n_results: Sequence[int],
+        where: Optional[Dict[str, Any]],
+        results: Sequence[Dict[str, Any]],
+        generations: Optional[Tuple[int, ...]],
+    ) -> None:
+        """
+        Cache search results under the generations read before searching
+
+        Reading the generations first means chunks stored while the search
+        ran leave the entry already stale.
+        """
+        if not self.enabled or generations is None:
+            return
+
+        where_key = json.dumps(where, sort_keys=True, default=str)
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            for embedding, count, result in zip(embeddings, n_results, results):
+                key = _result_key(embedding, where_key, count)
+                self._entries[key] = (result, generations, expires_at)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, document_ids: Sequence[str]) -> None:
+        """
+        Bump the generations of documents whose chunks changed
+
+        Called after chunks are stored; every process drops its cached
+        searches over these documents on their next lookup.
+        """
+        document_ids = list(dict.fromkeys(document_ids))
+        if not document_ids:
+            return
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for document_id in [*document_ids, ALL_DOCUMENTS]:
+                pipe.hincrby(self.generations_key, document_id, 1)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.error(
+                f"Could not invalidate cached searches for {len(document_ids)} document(s): {e}"
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            entries = len(self._entries)
+        lookups = counters["hits"] + counters["misses"] + counters["stale"]
+        return {
+            **counters,
+            "entries": entries,
+            "hit_rate": round(counters["hits"] / lookups, 4) if lookups else None,
+        }
+
+    def _generations(self, scope: List[str]) -> Optional[Tuple[int, ...]]:
+        """Current generations of the documents in `scope` (None if Redis is down)"""
+        if time.monotonic() < self._redis_retry_at:
+            return None
+        try:
+            values = self.client.hmget(self.generations_key, scope)
+            return tuple(int(value or 0) for value in values)
+        except redis.RedisError as e:
+            # Skip the cache for a while instead of timing out on every search
+            self._redis_retry_at = time.monotonic() + self.redis_retry_seconds
+            logger.warning(f"Retrieval cache disabled, generations unavailable: {e}")
+            return None
+
+
+def _scope(where: Optional[Dict[str, Any]]) -> List[str]:
+    """Documents a where filter can match, or ALL_DOCUMENTS when unrestricted"""
+    condition = (where or {}).get("document_id") if len(where or {}) == 1 else None
+    if isinstance(condition, str):
+        return [condition]
+    if isinstance(condition, dict) and len(condition) == 1:
+        if isinstance(condition.get("$eq"), str):
+            return [condition["$eq"]]
+        if isinstance(condition.get("$in"), list):
+            return sorted(set(condition["$in"]))
+    return [ALL_DOCUMENTS]
+
+
+def _result_key(embedding: np.ndarray, where_key: str, n_results: int) -> str:
+    digest = hashlib.sha256(np.asarray(embedding, dtype=np.float32).tobytes()).hexdigest()
+    return f"{digest}:{n_results}:{where_key}"
+
+
+# Create singleton instance
+retrieval_cache = RetrievalCache(
+    max_entries=settings.retrieval_cache_size,
+    ttl_seconds=settings.retrieval_cache_ttl_seconds,
+)
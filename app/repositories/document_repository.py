@@ -1,6 +1,7 @@
+from sqlalchemy import bindparam, update
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
-from typing import Optional, List
+from typing import Any, Dict, Iterable, Optional, List, Set
 import logging
 
 from ..schema import Document, Chat
@@ -15,151 +16,219 @@ class DocumentRepository:
     def __init__(self, db: Session):
         self.db = db
 
-    def create_document(self, filename: str, path: Optional[str] = None) -> Optional[Document]:
+    def get_by_filename(self, filename: str) -> Optional[Document]:
         """
-        Create a new document record in the database
+        Get document by filename
         
         Args:
             filename: Name of the document
             
         Returns:
-            Created Document object
-            
-        Raises:
-            DocumentAlreadyExistsError: If document with filename already exists
-            SQLAlchemyError: For database errors
+            Document object or None if not found
         """
-        # Check if document already exists
-        existing_doc = self.get_by_filename(filename)
-        if existing_doc:
-            raise DocumentAlreadyExistsError(filename)
+        try:
+            return self.db.query(Document).filter(Document.filename == filename).first()
+        except SQLAlchemyError as e:
+            logger.error(f"Database error fetching document '{filename}': {e}")
+            raise
+
+    def get_by_content_hashes(self, content_hashes: Iterable[str]) -> Dict[str, Document]:
+        """
+        Get documents for many content hashes with a single query
         
+        Args:
+            content_hashes: Hex SHA-256 hashes of uploaded files
+            
+        Returns:
+            Dict of {content_hash: Document} for the hashes that exist
+        """
+        hashes = list(set(content_hashes))
+        if not hashes:
+            return {}
         try:
-            new_document = Document(
-                filename=filename,
-                no_of_pages=0,
-                total_chunks=0,
-                status="processing",
-                path=path,
+            documents = (
+                self.db.query(Document).filter(Document.content_hash.in_(hashes)).all()
             )
-            
-            self.db.add(new_document)
-            self.db.commit()
-            self.db.refresh(new_document)
-            
-            logger.info(f"Created document record: {filename}")
-            return new_document
-            
+            return {document.content_hash: document for document in documents}
         except SQLAlchemyError as e:
-            logger.error(f"Database error creating document '{filename}': {e}")
-            self.db.rollback()
+            logger.error(f"Database error fetching documents by hash: {e}")
             raise
 
-    def get_by_filename(self, filename: str) -> Optional[Document]:
+    def get_by_filenames(self, filenames: Iterable[str]) -> Dict[str, Document]:
         """
-        Get document by filename
+        Get documents for many filenames with a single query
         
         Args:
-            filename: Name of the document
+            filenames: Document filenames
             
         Returns:
-            Document object or None if not found
+            Dict of {filename: Document} for the filenames that exist
         """
+        names = list(set(filenames))
+        if not names:
+            return {}
         try:
-            return self.db.query(Document).filter(Document.filename == filename).first()
+            documents = self.db.query(Document).filter(Document.filename.in_(names)).all()
+            return {document.filename: document for document in documents}
         except SQLAlchemyError as e:
-            logger.error(f"Database error fetching document '{filename}': {e}")
+            logger.error(f"Database error fetching documents by filename: {e}")
             raise
 
-    def get_by_id(self, document_id: int) -> Optional[Document]:
+    def get_existing_filenames(self, filenames: Iterable[str]) -> Set[str]:
         """
-        Get document by ID
+        Return which of the given filenames already have a document record
         
         Args:
-            document_id: ID of the document
+            filenames: Candidate document filenames
             
         Returns:
-            Document object or None if not found
+            Set of filenames that already exist
         """
+        names = list(set(filenames))
+        if not names:
+            return set()
         try:
-            return self.db.query(Document).filter(Document.id == document_id).first()
+            rows = self.db.query(Document.filename).filter(Document.filename.in_(names)).all()
+            return {filename for (filename,) in rows}
         except SQLAlchemyError as e:
-            logger.error(f"Database error fetching document ID {document_id}: {e}")
+            logger.error(f"Database error checking document filenames: {e}")
             raise
 
-    def update_document_metadata(
-        self,
-        filename: str,
-        no_of_pages: Optional[int] = None,
-        total_chunks: Optional[int] = None,
-        status: Optional[str] = None,
-        path: Optional[str] = None,
-    ) -> Optional[Document]:
+    def create_documents(self, documents: List[Dict[str, Any]]) -> List[Document]:
         """
-        Update document metadata
+        Create many document records in one transaction
+        
+        New uploads and links to existing content (pass `source_document`)
+        are inserted together with a single commit, optionally already
+        associated with a chat.
         
         Args:
-            filename: Name of the document
-            no_of_pages: Number of pages in the document
-            total_chunks: Total number of chunks
-            status: Processing status
+            documents: Dicts with `filename` and optionally `path`, `status`,
+                `content_hash`, `chat_id` and `source_document`
             
         Returns:
-            Updated Document object
+            Created Document objects, in input order
             
         Raises:
-            DocumentNotFoundError: If document not found
+            DocumentAlreadyExistsError: If any filename already exists
             SQLAlchemyError: For database errors
         """
-        document = self.get_by_filename(filename)
-        if not document:
-            raise DocumentNotFoundError(filename)
-        
+        if not documents:
+            return []
+
+        existing = self.get_existing_filenames(values["filename"] for values in documents)
+        if existing:
+            raise DocumentAlreadyExistsError(sorted(existing)[0])
+
         try:
-            # Update only provided fields
-            if no_of_pages is not None:
-                document.no_of_pages = no_of_pages
-            if total_chunks is not None:
-                document.total_chunks = total_chunks
-            if status is not None:
-                document.status = status
-            if path is not None:
-                document.path = path
-            
+            new_documents = []
+            for values in documents:
+                source_document = values.get("source_document")
+                new_documents.append(
+                    Document(
+                        filename=values["filename"],
+                        no_of_pages=source_document.no_of_pages if source_document else 0,
+                        pages_indexed=source_document.pages_indexed if source_document else 0,
+                        total_chunks=source_document.total_chunks if source_document else 0,
+                        status=(
+                            source_document.status
+                            if source_document
+                            else values.get("status", "pending")
+                        ),
+                        path=values.get("path"),
+                        content_hash=None if source_document else values.get("content_hash"),
+                        source_document_id=source_document.id if source_document else None,
+                        chat_id=values.get("chat_id"),
+                    )
+                )
+
+            self.db.add_all(new_documents)
+            self.db.flush()
+            ids = [document.id for document in new_documents]
             self.db.commit()
-            self.db.refresh(document)
-            
-            logger.info(f"Updated document metadata: {filename}")
-            return document
-            
+
+            # Reload every created row with one query instead of one refresh each
+            self.db.query(Document).filter(Document.id.in_(ids)).all()
+
+            logger.info(f"Created {len(new_documents)} document records")
+            return new_documents
+
         except SQLAlchemyError as e:
-            logger.error(f"Database error updating document '{filename}': {e}")
+            logger.error(f"Database error creating {len(documents)} documents: {e}")
             self.db.rollback()
             raise
 
-    def mark_as_completed(self, filename: str) -> Optional[Document]:
+    def update_documents(self, updates: Dict[int, Dict[str, Any]]) -> None:
         """
-        Mark document as completed
+        Update many documents in one transaction with set-based statements
+        
+        Rows are updated by primary key in executemany batches; status and
+        page/chunk counts are propagated to linked documents the same way.
         
         Args:
-            filename: Name of the document
+            updates: Dict of {document_id: {column: value}} for the columns
+                status, no_of_pages, pages_indexed, total_chunks, path,
+                content_hash, chat_id, heartbeat_at
             
-        Returns:
-            Updated Document object
+        Raises:
+            SQLAlchemyError: For database errors
         """
-        return self.update_document_metadata(filename, status="completed")
+        if not updates:
+            return
+
+        try:
+            self.db.execute(
+                update(Document),
+                [{"id": document_id, **values} for document_id, values in updates.items()],
+            )
+
+            # Keep documents linked to this content in sync, one
+            # executemany per distinct set of propagated columns
+            linked_groups: Dict[tuple, List[Dict[str, Any]]] = {}
+            for document_id, values in updates.items():
+                linked = {
+                    column: values[column]
+                    for column in ("no_of_pages", "pages_indexed", "total_chunks", "status")
+                    if values.get(column) is not None
+                }
+                if linked:
+                    linked_groups.setdefault(tuple(sorted(linked)), []).append(
+                        {"source_id": document_id, **{f"new_{c}": v for c, v in linked.items()}}
+                    )
+            # (Core statements: an ORM update with a parameter list is
+            # treated as a bulk update by primary key)
+            table = Document.__table__
+            for columns, rows in linked_groups.items():
+                self.db.execute(
+                    update(table)
+                    .where(table.c.source_document_id == bindparam("source_id"))
+                    .values({column: bindparam(f"new_{column}") for column in columns}),
+                    rows,
+                )
 
-    def mark_as_failed(self, filename: str) -> Optional[Document]:
+            self.db.commit()
+            logger.info(f"Updated {len(updates)} document records")
+
+        except SQLAlchemyError as e:
+            logger.error(f"Database error updating {len(updates)} documents: {e}")
+            self.db.rollback()
+            raise
+
+    def get_by_id(self, document_id: int) -> Optional[Document]:
         """
-        Mark document as failed
+        Get document by ID
         
         Args:
-            filename: Name of the document
+            document_id: ID of the document
             
         Returns:
-            Updated Document object
+            Document object or None if not found
         """
-        return self.update_document_metadata(filename, status="failed")
+        try:
+            return self.db.query(Document).filter(Document.id == document_id).first()
+        except SQLAlchemyError as e:
+            logger.error(f"Database error fetching document ID {document_id}: {e}")
+            raise
 
     def get_all_documents(self, skip: int = 0, limit: int = 100) -> List[Document]:
         """
@@ -206,30 +275,6 @@ class DocumentRepository:
             self.db.rollback()
             raise
 
-    def add_chat_to_document(self, document_id: int, chat_id: int) -> Optional[Document]:
-        """Associate a chat with a document (one-to-many)
-
-        This sets `document.chat_id = chat_id`.
-        """
-        document = self.get_by_id(document_id)
-        if not document:
-            raise DocumentNotFoundError(document_id)
-
-        try:
-            chat = self.db.query(Chat).filter(Chat.id == chat_id).first()
-            if not chat:
-                return None
-
-            document.chat = chat
-            self.db.commit()
-            self.db.refresh(document)
-
-            return document
-        except SQLAlchemyError as e:
-            logger.error(f"Database error associating chat {chat_id} to document {document_id}: {e}")
-            self.db.rollback()
-            raise
-
     def remove_chat_from_document(self, document_id: int, chat_id: int) -> Optional[Document]:
         """
         Remove association between a chat and a document (one-to-many)
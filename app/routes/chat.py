@@ -89,8 +89,18 @@ def query(
                 detail=f"Chat with ID {request.chat_id} not found",
             )
 
-        # Get document filenames associated with this chat
-        document_filenames = [doc.filename for doc in chat.documents]
+        # Get document filenames associated with this chat; re-uploads of
+        # identical content are searched through their source document's chunks.
+        # Failed documents may have some chunks stored but are not searched
+        # until a resumed ingestion completes them
+        document_filenames = list(
+            dict.fromkeys(
+                doc.vector_document_id
+                for doc in chat.documents
+                if doc.status != "failed"
+                and (doc.source_document is None or doc.source_document.status != "failed")
+            )
+        )
 
         if not document_filenames:
             logger.warning(f"No documents associated with chat {request.chat_id}")
@@ -112,6 +122,19 @@ def query(
             document_filenames=document_filenames,
         )
 
+        # Answers may miss content of documents that are still being indexed
+        indexing = [
+            {
+                "filename": doc.filename,
+                "status": doc.status,
+                "pages_indexed": doc.pages_indexed,
+            }
+            for doc in chat.documents
+            if doc.status in ("pending", "processing", "partial")
+        ]
+        if indexing:
+            result["indexing"] = indexing
+
         # Store query and answer in chat history
         try:
             chat_repo.update_chat_history(
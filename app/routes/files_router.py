@@ -1,15 +1,43 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Form
-from ..services import FileService, TextChunker, EmbeddingService
-from typing import List, Dict, Any
-from ..core import vector_db_client, settings, db_client
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Form, Request
+from fastapi.routing import APIRoute
+from ..services import FileService
+from ..services.ingestion_service import IN_FLIGHT_STATUSES
+from typing import List, Dict, Any, Optional, Set, Tuple
+from ..core import db_client, run_blocking, settings
+from ..memory import ingestion_job_queue
 from ..repositories import DocumentRepository, ChatRepository
 from ..exceptions import DocumentAlreadyExistsError, FileProcessingError
 from sqlalchemy.exc import SQLAlchemyError
 import logging
+import os
+from datetime import datetime
 from sqlalchemy.orm import Session
 
 logger = logging.getLogger(__name__)
-file_router = APIRouter()
+
+
+class UploadSizeLimitRoute(APIRoute):
+    """
+    Route that refuses oversized multipart requests before they are parsed
+
+    FastAPI parses (and Starlette spools to disk) the whole form before
+    dependencies or the endpoint run, so the size of an upload has to be
+    checked on the Content-Length header here. Chunked multipart requests
+    carry no length and are refused as well.
+    """
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def limited_handler(request: Request):
+            if request.headers.get("content-type", "").startswith("multipart/form-data"):
+                _check_upload_size(request.headers.get("content-length"))
+            return await handler(request)
+
+        return limited_handler
+
+
+file_router = APIRouter(route_class=UploadSizeLimitRoute)
 
 
 @file_router.post("/upload/files")
@@ -19,15 +47,16 @@ async def upload_files(
     db: Session = Depends(db_client.get_db),
 ) -> Dict[str, Any]:
     """
-    Upload and process PDF files through all 5 stages:
-    Stage 1: Upload files
-    Stage 2: Extract text and clean data
-    Stage 3: Chunk the cleaned text
-    Stage 4: Generate embeddings
-    Stage 5: Store in vector database
+    Upload PDF files and queue them for background ingestion.
+
+    Stage 1 (upload) runs in the request; extraction, chunking, embedding
+    and storage are done by the ingestion workers. Poll
+    `/upload/jobs/{job_id}` for progress. Database and Redis calls run in
+    the blocking-I/O executor and hashing in the CPU executor, so the
+    event loop keeps serving other requests during an upload.
 
     Returns:
-        Dictionary with processing results and statistics
+        Dictionary with the job ID and per-file upload results
     """
     if not files:
         raise HTTPException(status_code=400, detail="No files uploaded")
@@ -36,217 +65,496 @@ async def upload_files(
 
     # Initialize services
     file_service = FileService()
-    text_chunker = TextChunker(
-        chunk_size=settings.chunk_size, overlap_size=settings.chunk_overlap
-    )
-    embedding_service = EmbeddingService()
     document_repo = DocumentRepository(db)
     chat_repo = ChatRepository(db)
 
     # Verify chat exists
-    chat = chat_repo.get_chat_by_id(chat_id)
+    chat = await run_blocking(chat_repo.get_chat_by_id, chat_id)
     if not chat:
         raise HTTPException(status_code=404, detail=f"Chat with ID {chat_id} not found")
 
-    results = []
-    all_chunks = []
+    results: List[Dict[str, Any]] = []
 
-    # Stages 1-3: Extract, clean, and chunk documents
+    # Stage 1: Stream every upload to a temporary file, hashed on the way;
+    # only new content is moved into place, the rest is discarded
+    saved_files = []
     for file in files:
-        document = None
         try:
             logger.info(f"Processing file: {file.filename}")
+            temp_path, content_hash = await file_service.stream_upload(file)
+            saved_files.append((file.filename, temp_path, content_hash))
+        except Exception as e:
+            results.append(_failure_result(file.filename, e))
+
+    # Register all documents: two lookups, then one transaction per phase
+    try:
+        documents_by_hash, taken_filenames = await run_blocking(
+            _lookup_uploads, document_repo, saved_files
+        )
+    except SQLAlchemyError as e:
+        logger.error(f"Database error looking up uploaded documents: {e}")
+        documents_by_hash, taken_filenames = None, set()
+
+    new_documents = []  # Documents to create and ingest
+    linked_documents = []  # Documents reusing existing chunks
+    batch_duplicates = []  # Same content uploaded twice in this request
+    batch_hashes = {}
+    unused_uploads = []  # Temporary files whose content is not ingested
+    for filename, temp_path, content_hash in saved_files:
+        if documents_by_hash is None:
+            unused_uploads.append(temp_path)
+            results.append(
+                {"filename": filename, "status": "failed", "error": "Database error occurred"}
+            )
+            continue
 
-            # Check if document already exists in vector DB
-            if vector_db_client.check_document_exists(file.filename):
-                logger.warning(f"Document {file.filename} already exists in database")
-                results.append(
-                    {
-                        "filename": file.filename,
-                        "status": "skipped",
-                        "reason": "Document already exists in database",
-                    }
-                )
-                continue
+        existing_doc = documents_by_hash.get(content_hash)
+        if existing_doc and existing_doc["filename"] == filename:
+            logger.warning(f"Document {filename} already exists in database")
+            unused_uploads.append(temp_path)
+            results.append(
+                {
+                    "filename": filename,
+                    "status": "skipped",
+                    "reason": "Document already exists in database",
+                }
+            )
+            continue
+
+        if filename in taken_filenames:
+            # A different document already uses this filename
+            logger.warning(f"Document {filename} already exists in PostgreSQL")
+            unused_uploads.append(temp_path)
+            results.append(
+                {
+                    "filename": filename,
+                    "status": "skipped",
+                    "reason": "Document metadata already exists",
+                }
+            )
+            continue
+        taken_filenames.add(filename)
 
-            # Create document record in database with 'processing' status
+        if existing_doc:
+            # Same content under a new name: reuse the stored chunks
+            unused_uploads.append(temp_path)
+            linked_documents.append(
+                {
+                    "filename": filename,
+                    "path": existing_doc["path"],
+                    "chat_id": chat_id,
+                    "source_document": existing_doc["document"],
+                    "source_filename": existing_doc["filename"],
+                }
+            )
+        elif content_hash in batch_hashes:
+            unused_uploads.append(temp_path)
+            batch_duplicates.append((filename, batch_hashes[content_hash]))
+        else:
             try:
-                document = document_repo.create_document(file.filename)
-            except DocumentAlreadyExistsError:
-                # Document already exists in PostgreSQL
-                logger.warning(f"Document {file.filename} already exists in PostgreSQL")
+                saved_path = await run_blocking(file_service.commit_upload, temp_path, filename)
+            except OSError as e:
+                logger.error(f"Failed to move upload {filename} into place: {e}")
+                unused_uploads.append(temp_path)
                 results.append(
-                    {
-                        "filename": file.filename,
-                        "status": "skipped",
-                        "reason": "Document metadata already exists",
-                    }
+                    {"filename": filename, "status": "failed", "error": "Failed to save file"}
                 )
                 continue
-            except SQLAlchemyError as e:
-                # Database error - this is a real error, not a skip
-                logger.error(
-                    f"Database error creating document record for {file.filename}: {e}"
-                )
-                results.append(
-                    {
-                        "filename": file.filename,
-                        "status": "failed",
-                        "error": "Database error occurred",
-                    }
-                )
-                continue
-
-            # Stage 1 & 2: Upload, extract, and clean
-            extracted_pages = await file_service.upload_file(file)
-
-            # Get the file path from file_service (assuming it stores the file and returns path)
-            file_path = f"{settings.upload_directory}/{file.filename}"
-
-            # Stage 3: Generate chunks from cleaned pages
-            chunks = text_chunker.generate_chunks(
-                document_id=file.filename, document=extracted_pages
+            batch_hashes[content_hash] = filename
+            new_documents.append(
+                {
+                    "filename": filename,
+                    "path": saved_path,
+                    "status": "pending",
+                    "content_hash": content_hash,
+                    "chat_id": chat_id,
+                }
             )
 
-            # Update document metadata with pages, chunks count, and file path
-            document_repo.update_document_metadata(
-                filename=file.filename,
-                no_of_pages=len(extracted_pages),
-                total_chunks=len(chunks),
-                path=file_path,
+    for temp_path in unused_uploads:
+        await run_blocking(file_service.discard_upload, temp_path)
+
+    created = await run_blocking(_create_documents, document_repo, new_documents, results)
+    created_paths = {document["path"] for document in created}
+    for values in new_documents:
+        if values["path"] not in created_paths:
+            await run_blocking(file_service.discard_upload, values["path"])
+    created_by_name = {document["filename"]: document for document in created}
+    linked_documents.extend(
+        {
+            "filename": filename,
+            "path": created_by_name[source_filename]["path"],
+            "chat_id": chat_id,
+            "source_document": created_by_name[source_filename]["document"],
+            "source_filename": source_filename,
+        }
+        for filename, source_filename in batch_duplicates
+        if source_filename in created_by_name
+    )
+    linked = await run_blocking(_create_documents, document_repo, linked_documents, results)
+    for filename, source_filename in batch_duplicates:
+        if source_filename not in created_by_name:
+            results.append(
+                {"filename": filename, "status": "failed", "error": "Database error occurred"}
             )
 
-            # Associate document with chat
+    source_filenames = {values["filename"]: values["source_filename"] for values in linked_documents}
+    for document in linked:
+        results.append(
+            {
+                "filename": document["filename"],
+                "status": "linked",
+                "document_id": document["document_id"],
+                "source_document": source_filenames[document["filename"]],
+            }
+        )
+
+    # Hand the remaining stages over to the ingestion workers
+    job_id = None
+    if created:
+        try:
+            job_id = await run_blocking(
+                ingestion_job_queue.enqueue,
+                chat_id=chat_id,
+                documents=[
+                    {
+                        "filename": document["filename"],
+                        "document_id": document["document_id"],
+                        "path": document["path"],
+                        "content_hash": document["content_hash"],
+                    }
+                    for document in created
+                ],
+            )
+        except Exception as e:
+            logger.error(f"Failed to queue ingestion job: {e}", exc_info=True)
             try:
-                document_repo.add_chat_to_document(document.id, chat_id)
-                logger.info(f"Associated document {file.filename} with chat {chat_id}")
-            except Exception as assoc_error:
-                logger.error(f"Failed to associate document with chat: {assoc_error}")
-
-            all_chunks.extend(chunks)
+                await run_blocking(
+                    document_repo.update_documents,
+                    {
+                        document["document_id"]: {"status": "failed", "content_hash": None}
+                        for document in created
+                    },
+                )
+            except SQLAlchemyError as db_error:
+                logger.error(f"Failed to update document status: {db_error}")
+            raise HTTPException(
+                status_code=503,
+                detail="Ingestion queue unavailable, please retry later",
+            )
 
+        for document in created:
             results.append(
                 {
-                    "filename": file.filename,
-                    "status": "success",
-                    "pages_count": len([p for p in extracted_pages.values() if p]),
-                    "chunks_count": len(chunks),
+                    "filename": document["filename"],
+                    "status": "queued",
+                    "document_id": document["document_id"],
                 }
             )
 
-            logger.info(
-                f"Successfully processed {file.filename}: "
-                f"{len(chunks)} chunks from {len(extracted_pages)} pages"
-            )
+    logger.info(
+        f"Upload complete: {len([r for r in results if r['status'] == 'queued'])} queued, "
+        f"{len([r for r in results if r['status'] == 'linked'])} linked, "
+        f"{len([r for r in results if r['status'] == 'failed'])} failed, "
+        f"{len([r for r in results if r['status'] == 'skipped'])} skipped"
+    )
 
-        except FileProcessingError as e:
-            # File processing failed - user-facing error
-            logger.error(f"File processing error for {file.filename}: {e.reason}")
+    return {
+        "job_id": job_id,
+        "total_files": len(files),
+        "queued": len([r for r in results if r["status"] == "queued"]),
+        "linked": len([r for r in results if r["status"] == "linked"]),
+        "failed": len([r for r in results if r["status"] == "failed"]),
+        "skipped": len([r for r in results if r["status"] == "skipped"]),
+        "results": results,
+    }
 
-            if document:
-                try:
-                    document_repo.mark_as_failed(file.filename)
-                except Exception as db_error:
-                    logger.error(f"Failed to update document status: {db_error}")
 
-            results.append(
-                {
-                    "filename": file.filename,
-                    "status": "failed",
-                    "error": e.reason,  # User-friendly message
-                }
-            )
+@file_router.get("/upload/jobs/{job_id}")
+def get_ingestion_job(job_id: str) -> Dict[str, Any]:
+    """
+    Report the progress of an ingestion job
 
-        except SQLAlchemyError as e:
-            # Database error
-            logger.error(f"Database error for {file.filename}: {e}")
+    Returns the overall job status plus, per document, the current stage
+    (queued, extracting, chunking, embedding, storing, completed, failed)
+    and page/chunk counts.
+    """
+    job = ingestion_job_queue.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Ingestion job {job_id} not found")
+    return job
 
-            if document:
-                try:
-                    document_repo.mark_as_failed(file.filename)
-                except Exception as db_error:
-                    logger.error(f"Failed to update document status: {db_error}")
 
-            results.append(
-                {
-                    "filename": file.filename,
-                    "status": "failed",
-                    "error": "Database operation failed",
-                }
-            )
+@file_router.post("/upload/documents/{document_id}/resume")
+def resume_document_ingestion(
+    document_id: int,
+    chat_id: Optional[int] = None,
+    db: Session = Depends(db_client.get_db),
+) -> Dict[str, Any]:
+    """
+    Queue a failed or interrupted document for ingestion again
 
-        except Exception as e:
-            # Unexpected error - log details but show generic message
-            logger.error(
-                f"Unexpected error processing {file.filename}: {e}", exc_info=True
-            )
+    The worker continues after the last stage checkpointed for the document
+    (extracted pages, chunks, stored batches) instead of starting over.
+    `chat_id` is only needed if the document was never associated with a
+    chat (it failed before chunking).
+
+    Returns:
+        Dictionary with the new job ID
+    """
+    document_repo = DocumentRepository(db)
+    document = document_repo.get_by_id(document_id)
+    if not document:
+        raise HTTPException(status_code=404, detail=f"Document {document_id} not found")
+
+    reason = _not_resumable_reason(document)
+    if reason:
+        raise HTTPException(status_code=409, detail=reason)
+
+    chat_id = chat_id or document.chat_id
+    if chat_id is None:
+        raise HTTPException(
+            status_code=400, detail="chat_id is required for a document without a chat"
+        )
+
+    queued, unavailable = _prepare_resume([document])
+    if unavailable:
+        raise HTTPException(status_code=409, detail=unavailable[0]["reason"])
+
+    return {
+        "job_id": _enqueue_resume(document_repo, chat_id, queued),
+        "document_id": document_id,
+    }
 
-            # Mark document as failed in database if it was created
-            if document:
-                try:
-                    document_repo.mark_as_failed(file.filename)
-                except Exception as db_error:
-                    logger.error(f"Failed to update document status: {db_error}")
 
+@file_router.post("/upload/jobs/{job_id}/resume")
+def resume_ingestion_job(job_id: str, db: Session = Depends(db_client.get_db)) -> Dict[str, Any]:
+    """
+    Queue every unfinished document of an ingestion job again
+
+    Documents resume from their checkpoints; completed documents are left
+    alone. Returns the new job ID plus the documents that were skipped.
+    """
+    job = ingestion_job_queue.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Ingestion job {job_id} not found")
+
+    document_repo = DocumentRepository(db)
+    resumed = []
+    skipped = []
+    for filename, doc in job["documents"].items():
+        document = document_repo.get_by_id(doc["document_id"])
+        reason = "Document no longer exists" if not document else _not_resumable_reason(document)
+        if reason:
+            skipped.append({"filename": filename, "reason": reason})
+        else:
+            resumed.append(document)
+
+    queued, unavailable = _prepare_resume(resumed)
+    skipped.extend(unavailable)
+    new_job_id = _enqueue_resume(document_repo, job["chat_id"], queued) if queued else None
+    return {
+        "job_id": new_job_id,
+        "resumed": [doc["filename"] for doc in queued],
+        "skipped": skipped,
+    }
+
+
+def _check_upload_size(content_length: Optional[str]) -> None:
+    """Raise 411/413 unless the declared body fits `max_upload_request_mb`"""
+    if content_length is None:
+        raise HTTPException(status_code=411, detail="Content-Length is required for uploads")
+    try:
+        length = int(content_length)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Content-Length header")
+    if length > settings.max_upload_request_mb * 1024 * 1024:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Upload exceeds the maximum request size of {settings.max_upload_request_mb} MB",
+        )
+
+
+def _lookup_uploads(
+    document_repo: DocumentRepository, saved_files: List[tuple]
+) -> Tuple[Dict[str, Dict[str, Any]], Set[str]]:
+    """
+    Look up existing documents by content hash and filename (blocking)
+
+    Returns:
+        Tuple of ({content_hash: document snapshot}, set of taken filenames)
+    """
+    documents_by_hash = document_repo.get_by_content_hashes(
+        content_hash for _, _, content_hash in saved_files
+    )
+    taken_filenames = document_repo.get_existing_filenames(
+        filename for filename, _, _ in saved_files
+    )
+    return (
+        {
+            content_hash: _snapshot(document)
+            for content_hash, document in documents_by_hash.items()
+        },
+        taken_filenames,
+    )
+
+
+def _create_documents(
+    document_repo: DocumentRepository,
+    documents: List[Dict[str, Any]],
+    results: List[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """
+    Create document records in one transaction (blocking)
+
+    If the transaction fails (e.g. a concurrent upload took a filename
+    between lookup and insert) every document is reported as failed.
+
+    Returns:
+        Snapshots of the created documents (see `_snapshot`)
+    """
+    try:
+        return [_snapshot(document) for document in document_repo.create_documents(documents)]
+    except (DocumentAlreadyExistsError, SQLAlchemyError) as e:
+        logger.error(f"Database error creating document records: {e}")
+        for values in documents:
             results.append(
                 {
-                    "filename": file.filename,
+                    "filename": values["filename"],
                     "status": "failed",
-                    "error": "An unexpected error occurred during processing",
+                    "error": "Database error occurred",
                 }
             )
+        return []
+
 
-    # Stage 4 & 5: Generate embeddings and store in vector DB
-    storage_stats = {"stored": 0, "skipped": 0, "errors": 0}
+def _snapshot(document) -> Dict[str, Any]:
+    """
+    Copy the columns the route needs out of a Document
+
+    ORM objects expire on every commit and would lazily query the database
+    when read afterwards, which must not happen on the event loop.
+    """
+    return {
+        "document": document,
+        "document_id": document.id,
+        "filename": document.filename,
+        "path": document.path,
+        "content_hash": document.content_hash,
+    }
 
-    if all_chunks:
+
+def _not_resumable_reason(document) -> Optional[str]:
+    """Why a document cannot be resumed, or None if it can"""
+    if document.status == "completed":
+        return "Document is already completed"
+    if document.status in IN_FLIGHT_STATUSES:
+        return "Document is already being ingested"
+    if document.source_document_id is not None:
+        return "Document shares the chunks of another document"
+    if not document.path or not os.path.exists(document.path):
+        return "Uploaded file is no longer available"
+    return None
+
+
+def _prepare_resume(documents: List[Any]) -> Tuple[List[Dict[str, Any]], List[Dict[str, str]]]:
+    """
+    Build the job entries of documents to resume
+
+    Failed documents released their content hash; it is recomputed from the
+    uploaded file so resumed chunks keep the IDs of the chunks already
+    stored. A file that vanished or cannot be read since it was checked is
+    reported as skipped instead of failing the request.
+
+    Returns:
+        Tuple of (job entries, skipped entries with a reason)
+    """
+    queued = []
+    skipped = []
+    for document in documents:
+        content_hash = document.content_hash
+        if content_hash is None:
+            try:
+                content_hash = FileService.hash_file(document.path)
+            except OSError as e:
+                logger.warning(f"Cannot read {document.path} to resume {document.filename}: {e}")
+                skipped.append(
+                    {"filename": document.filename, "reason": "Uploaded file is no longer available"}
+                )
+                continue
+        queued.append(
+            {
+                "filename": document.filename,
+                "document_id": document.id,
+                "path": document.path,
+                "content_hash": content_hash,
+            }
+        )
+    return queued, skipped
+
+
+def _enqueue_resume(
+    document_repo: DocumentRepository, chat_id: int, queued: List[Dict[str, Any]]
+) -> str:
+    """
+    Queue prepared documents for ingestion, raising 503 if the queue is unavailable
+
+    The content hash is restored along with the pending status unless
+    another document has claimed the content in the meantime.
+    """
+    try:
+        holders = document_repo.get_by_content_hashes(doc["content_hash"] for doc in queued)
+        now = datetime.now()
+        updates = {}
+        for doc in queued:
+            updates[doc["document_id"]] = {"status": "pending", "heartbeat_at": now}
+            holder = holders.get(doc["content_hash"])
+            if holder is None or holder.id == doc["document_id"]:
+                updates[doc["document_id"]]["content_hash"] = doc["content_hash"]
+        document_repo.update_documents(updates)
+    except SQLAlchemyError as e:
+        logger.error(f"Database error preparing resumed ingestion: {e}")
+        raise HTTPException(status_code=500, detail="Database error occurred")
+
+    try:
+        return ingestion_job_queue.enqueue(chat_id=chat_id, documents=queued)
+    except Exception as e:
+        logger.error(f"Failed to queue resumed ingestion: {e}", exc_info=True)
         try:
-            logger.info(f"Generating embeddings for {len(all_chunks)} chunks")
-
-            # Stage 4: Generate embeddings
-            chunks_with_embeddings = embedding_service.generate_embeddings(all_chunks)
-
-            # Stage 5: Store in ChromaDB
-            logger.info("Storing chunks in vector database")
-            storage_stats = vector_db_client.store_chunks(chunks_with_embeddings)
-
-            # Mark successfully processed documents as completed
-            for result in results:
-                if result["status"] == "success":
-                    try:
-                        document_repo.mark_as_completed(result["filename"])
-                    except SQLAlchemyError as db_error:
-                        logger.error(
-                            f"Database error marking {result['filename']} as completed: {db_error}"
-                        )
-                    except Exception as db_error:
-                        logger.error(
-                            f"Unexpected error marking {result['filename']} as completed: {db_error}"
-                        )
+            document_repo.update_documents(
+                {doc["document_id"]: {"status": "failed", "content_hash": None} for doc in queued}
+            )
+        except SQLAlchemyError as db_error:
+            logger.error(f"Failed to update document status: {db_error}")
+        raise HTTPException(
+            status_code=503,
+            detail="Ingestion queue unavailable, please retry later",
+        )
 
-        except Exception as e:
-            logger.error(f"Error in embedding/storage pipeline: {e}", exc_info=True)
 
-            # Mark all documents that were being processed as failed
-            for result in results:
-                if result["status"] == "success":
-                    result["embedding_error"] = "Embedding generation failed"
-                    try:
-                        document_repo.mark_as_failed(result["filename"])
-                    except Exception as db_error:
-                        logger.error(f"Failed to update document status: {db_error}")
+def _failure_result(filename: str, error: Exception) -> Dict[str, Any]:
+    """
+    Build the result entry of an upload that failed before registration
 
-    logger.info(
-        f"Processing complete: {len([r for r in results if r['status'] == 'success'])} succeeded, "
-        f"{len([r for r in results if r['status'] == 'failed'])} failed, "
-        f"{len([r for r in results if r['status'] == 'skipped'])} skipped"
-    )
+    Internal details are logged, while the returned error message is
+    safe to show to the user.
+    """
+    if isinstance(error, FileProcessingError):
+        # File processing failed - user-facing error
+        logger.error(f"File processing error for {filename}: {error.reason}")
+        message = error.reason
+    elif isinstance(error, SQLAlchemyError):
+        # Database error
+        logger.error(f"Database error for {filename}: {error}")
+        message = "Database operation failed"
+    else:
+        # Unexpected error - log details but show generic message
+        logger.error(f"Unexpected error processing {filename}: {error}", exc_info=error)
+        message = "An unexpected error occurred during processing"
 
     return {
-        "total_files": len(files),
-        "successful": len([r for r in results if r["status"] == "success"]),
-        "failed": len([r for r in results if r["status"] == "failed"]),
-        "skipped": len([r for r in results if r["status"] == "skipped"]),
-        "storage_stats": storage_stats,
-        "results": results,
+        "filename": filename,
+        "status": "failed",
+        "error": message,
     }
+
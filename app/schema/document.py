@@ -21,17 +21,41 @@ class Document(db_client.Base):
     total_chunks = Column(Integer, nullable=False, default=0)
     status = Column(
         String, nullable=False, default="pending"
-    )  # pending, processing, completed, failed
+    )  # pending, processing, partial, completed, failed
+    # Pages whose chunks are stored and searchable; with progressive indexing
+    # a "partial" document is queryable before all of its pages are indexed
+    pages_indexed = Column(Integer, nullable=False, default=0, server_default="0")
+    # Refreshed while a job queues or ingests the document; an unfinished
+    # document whose heartbeat stopped was left behind by a dead job
+    heartbeat_at = Column(DateTime, nullable=True, default=datetime.now)
     uploaded_at = Column(DateTime, nullable=False, default=datetime.now)
     # Filesystem path where the uploaded PDF is stored (optional)
     path = Column(String, nullable=True, index=False)
+    # SHA-256 of the uploaded file, used to detect re-uploads of the same content
+    content_hash = Column(String(64), nullable=True, index=True, unique=True)
+
+    # Set when this document is a re-upload of identical content: it shares
+    # the vectors stored for the source document instead of being reprocessed
+    source_document_id = Column(
+        Integer, ForeignKey("documents.id", ondelete="SET NULL"), nullable=True
+    )
+    source_document = relationship("Document", remote_side=[id])
 
     # One-to-many: Document belongs to a single Chat
     chat_id = Column(Integer, ForeignKey("chats.id", ondelete="CASCADE"), nullable=True, index=True)
     chat = relationship("Chat", back_populates="documents")
 
+    @property
+    def vector_document_id(self) -> str:
+        """The `document_id` under which this document's chunks are stored"""
+        if self.source_document is not None:
+            return self.source_document.filename
+        return self.filename
+
     def __repr__(self):
         return (
             f"<Document(id={self.id}, filename='{self.filename}', status='{self.status}', "
-            f"pages={self.no_of_pages}, chunks={self.total_chunks}, path={self.path})>"
+            f"pages={self.no_of_pages}, indexed={self.pages_indexed}, "
+            f"chunks={self.total_chunks}, path={self.path}, "
+            f"content_hash={self.content_hash})>"
         )
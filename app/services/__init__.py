@@ -2,5 +2,7 @@ from .files_service import FileService
 from .text_chunker import TextChunker
 from .vector_embedings import EmbeddingService
 from .query_service import QueryService
+from .retrieval_executor import RetrievalExecutor
 from .prompt_generation import QueryPromptTemplate
-__all__ = ["FileService", "TextChunker", "EmbeddingService", "QueryService", "QueryPromptTemplate"]
\ No newline at end of file
+from .ingestion_service import IngestionService
+__all__ = ["FileService", "TextChunker", "EmbeddingService", "QueryService", "RetrievalExecutor", "QueryPromptTemplate", "IngestionService"]
\ No newline at end of file
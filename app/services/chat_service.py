@@ -202,6 +202,9 @@ class ChatService:
         """
         Retrieve documents based on the plan's search queries.
 
+        All search queries are embedded in a single request and searched
+        concurrently.
+
         Args:
             plan: Retrieval plan containing search queries
             document_filenames: Optional list of document filenames to filter by
@@ -209,15 +212,10 @@ class ChatService:
         Returns:
             Tuple of (unique documents list, corresponding metadata list)
         """
-
-        retriever = Retriever()
-        all_documents = []
-        all_metadata = []
-        all_ids = []
-
         search_queries = plan.get("search_queries", [])
         max_searches = plan.get("max_searches", 1)
 
+        searches = []
         for idx, search_query in enumerate(search_queries[:max_searches]):
             try:
                 # Handle both dict and tuple formats
@@ -226,43 +224,19 @@ class ChatService:
                     top_k = search_query.get("top_k", 5)
                 else:
                     query, top_k = search_query
-
-                if not query:
-                    logger.warning(f"Empty query at index {idx}, skipping")
-                    continue
-
-                search_results = retriever.execute(query=query, top_k=top_k, document_filenames=document_filenames)
-
-                # Extract all result components
-                ids = search_results.get("ids", [[]])[0]
-                documents = search_results.get("documents", [[]])[0]
-                metadatas = search_results.get("metadatas", [[]])[0]
-
-                all_ids.extend(ids or [])
-                all_documents.extend(documents or [])
-                all_metadata.extend(metadatas or [])
-
-                logger.info(
-                    f"Retrieved {len(documents or [])} documents for query: {query}"
-                )
-
-            except Exception as e:
-                logger.error(f"Error retrieving documents for query {idx}: {str(e)}")
+            except (TypeError, ValueError) as e:
+                logger.error(f"Invalid search query at index {idx}: {str(e)}")
                 continue
 
-        # Remove duplicates using IDs (more efficient and accurate)
-        seen_ids = set()
-        unique_documents = []
-        unique_metadata = []
+            if not query:
+                logger.warning(f"Empty query at index {idx}, skipping")
+                continue
+            searches.append((query, top_k))
 
-        for chunk_id, doc, meta in zip(all_ids, all_documents, all_metadata):
-            if chunk_id not in seen_ids:
-                seen_ids.add(chunk_id)
-                unique_documents.append(doc)
-                unique_metadata.append(meta)
+        unique_documents, unique_metadata, total = self._search(searches, document_filenames)
 
         logger.info(
-            f"Deduplicated: {len(all_documents)} -> {len(unique_documents)} documents"
+            f"Deduplicated: {total} -> {len(unique_documents)} documents"
         )
 
         return unique_documents, unique_metadata
@@ -272,6 +246,9 @@ class ChatService:
     ) -> tuple[List[str], List[Dict[str, Any]]]:
         """
         Retrieve additional documents for refinement queries.
+
+        Like the plan queries, all refinement queries share one embeddings
+        request and are searched concurrently.
         
         Args:
             refinement_queries: List of refinement search queries
@@ -280,50 +257,48 @@ class ChatService:
         Returns:
             Tuple of (documents list, metadata list)
         """
-        retriever = Retriever()
-        all_documents = []
-        all_metadata = []
-        all_ids = []
-        
+        searches = []
         for idx, query in enumerate(refinement_queries):
-            try:
-                if not query:
-                    logger.warning(f"Empty refinement query at index {idx}, skipping")
-                    continue
-                
-                search_results = retriever.execute(
-                    query=query, top_k=3, document_filenames=document_filenames
-                )
-                
-                # Extract all result components
-                ids = search_results.get("ids", [[]])[0]
-                documents = search_results.get("documents", [[]])[0]
-                metadatas = search_results.get("metadatas", [[]])[0]
-                
-                all_ids.extend(ids or [])
-                all_documents.extend(documents or [])
-                all_metadata.extend(metadatas or [])
-                
-                logger.info(
-                    f"Retrieved {len(documents or [])} documents for refinement query: {query[:50]}..."
-                )
-            except Exception as e:
-                logger.error(f"Error retrieving refinement documents for query {idx}: {str(e)}")
+            if not query:
+                logger.warning(f"Empty refinement query at index {idx}, skipping")
                 continue
-        
-        # Remove duplicates
-        seen_ids = set()
-        unique_documents = []
-        unique_metadata = []
-        
-        for chunk_id, doc, meta in zip(all_ids, all_documents, all_metadata):
-            if chunk_id not in seen_ids:
-                seen_ids.add(chunk_id)
-                unique_documents.append(doc)
-                unique_metadata.append(meta)
-        
+            searches.append((query, 3))
+
+        unique_documents, unique_metadata, _ = self._search(searches, document_filenames)
+
         logger.info(f"Retrieved {len(unique_documents)} unique refinement documents")
         return unique_documents, unique_metadata
+
+    def _search(
+        self, searches: List[tuple[str, int]], document_filenames: List[str] = None
+    ) -> tuple[List[str], List[Dict[str, Any]], int]:
+        """
+        Run a batch of searches concurrently, removing duplicates by chunk ID.
+
+        If the batch cannot be embedded, the error is logged and nothing is
+        retrieved; searches that fail or miss the retrieval deadline only
+        drop their own results.
+
+        Args:
+            searches: List of (query, top_k) tuples
+            document_filenames: Optional list of document filenames to filter by
+
+        Returns:
+            Tuple of (unique documents, corresponding metadata, documents
+            retrieved before deduplication)
+        """
+        if not searches:
+            return [], [], 0
+
+        try:
+            results = Retriever().retrieve_documents_batch(
+                searches, document_filenames=document_filenames
+            )
+        except Exception as e:
+            logger.error(f"Error retrieving documents for {len(searches)} queries: {str(e)}")
+            return [], [], 0
+
+        return results["documents"], results["metadatas"], results["retrieved"]
     
     def _merge_documents(
         self,
@@ -0,0 +1,453 @@
+"""
+Content-addressed cache for chunk embeddings.
+
+Entries are keyed by (embedding model, SHA-256 of the chunk text), so
+boilerplate pages, re-uploads and re-indexing runs only pay for text that
+has never been embedded before. Two backends are available:
+
+- "disk": a SQLite file shared by all processes on the host
+- "redis": shared across hosts through the configured Redis server
+
+Both are bounded by `embedding_cache_max_entries` and evict the least
+recently used entries first.
+
+Search queries have their own two-tier cache (`QueryEmbeddingCache`): an
+in-process LRU in front of Redis, keyed by the normalised query text.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import redis
+from redis.backoff import NoBackoff
+from redis.retry import Retry
+
+from ..core import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _cache_key(model: str, text: str) -> str:
+    return f"{model}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+
+def _pack(embedding: np.ndarray) -> bytes:
+    return np.asarray(embedding, dtype=np.float32).tobytes()
+
+
+def _unpack(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype=np.float32)
+
+
+class EmbeddingCache:
+    """Base class for embedding caches; also used as the no-op cache"""
+
+    backend = "none"
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up cached embeddings
+
+        Args:
+            model: Embedding model name
+            texts: Chunk texts to look up
+
+        Returns:
+            List aligned with `texts`, holding the float32 embedding or None on a miss
+        """
+        return [None] * len(texts)
+
+    def set_many(self, model: str, texts: List[str], embeddings: Sequence[np.ndarray]) -> None:
+        """Store embeddings for the given texts"""
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and current size"""
+        return {"hits": 0, "misses": 0, "entries": 0}
+
+
+class DiskEmbeddingCache(EmbeddingCache):
+    """SQLite-backed embedding cache with LRU eviction"""
+
+    backend = "disk"
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, embedding BLOB NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_embeddings_last_access "
+                "ON embeddings (last_access)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[np.ndarray]]:
+        if not texts:
+            return []
+
+        keys = [_cache_key(model, text) for text in texts]
+        found: Dict[str, bytes] = {}
+        with self._lock:
+            conn = self._connection()
+            unique_keys = list(dict.fromkeys(keys))
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(unique_keys), 500):
+                batch = unique_keys[start : start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, embedding FROM embeddings WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                found.update(rows)
+                if rows:
+                    conn.execute(
+                        f"UPDATE embeddings SET last_access = ? WHERE key IN ({placeholders})",
+                        [time.time(), *batch],
+                    )
+
+            hits = sum(1 for key in keys if key in found)
+            self._increment(conn, hits=hits, misses=len(keys) - hits)
+            conn.commit()
+
+        return [_unpack(found[key]) if key in found else None for key in keys]
+
+    def set_many(self, model: str, texts: List[str], embeddings: Sequence[np.ndarray]) -> None:
+        if not texts:
+            return
+
+        now = time.time()
+        rows = [
+            (_cache_key(model, text), _pack(embedding), now)
+            for text, embedding in zip(texts, embeddings)
+        ]
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, embedding, last_access) VALUES (?, ?, ?)",
+                rows,
+            )
+            (count,) = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            overflow = count - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM embeddings WHERE key IN ("
+                    "SELECT key FROM embeddings ORDER BY last_access LIMIT ?)",
+                    (overflow,),
+                )
+                logger.info(f"Evicted {overflow} entries from embedding cache")
+            conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            conn = self._connection()
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+            (entries,) = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        return {
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "entries": entries,
+        }
+
+    def _increment(self, conn: sqlite3.Connection, **counts: int) -> None:
+        conn.executemany(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            list(counts.items()),
+        )
+
+
+class RedisEmbeddingCache(EmbeddingCache):
+    """Redis-backed embedding cache with LRU eviction tracked in a sorted set"""
+
+    backend = "redis"
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.prefix = "embedding_cache"
+        self.lru_key = f"{self.prefix}:lru"
+        # Embeddings are stored as raw float32 bytes, so responses must not be decoded
+        self.client = redis.Redis(
+            host=settings.redis_host,
+            port=settings.redis_port,
+            db=settings.redis_db,
+            socket_connect_timeout=5,
+            socket_timeout=5,
+        )
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[np.ndarray]]:
+        if not texts:
+            return []
+
+        keys = [_cache_key(model, text) for text in texts]
+        values = self.client.mget([f"{self.prefix}:{key}" for key in keys])
+        hits = [key for key, value in zip(keys, values) if value is not None]
+
+        pipe = self.client.pipeline(transaction=False)
+        if hits:
+            now = time.time()
+            pipe.zadd(self.lru_key, {key: now for key in hits})
+        pipe.hincrby(f"{self.prefix}:counters", "hits", len(hits))
+        pipe.hincrby(f"{self.prefix}:counters", "misses", len(keys) - len(hits))
+        pipe.execute()
+
+        return [_unpack(value) if value is not None else None for value in values]
+
+    def set_many(self, model: str, texts: List[str], embeddings: Sequence[np.ndarray]) -> None:
+        if not texts:
+            return
+
+        now = time.time()
+        keys = [_cache_key(model, text) for text in texts]
+        pipe = self.client.pipeline(transaction=False)
+        pipe.mset(
+            {
+                f"{self.prefix}:{key}": _pack(embedding)
+                for key, embedding in zip(keys, embeddings)
+            }
+        )
+        pipe.zadd(self.lru_key, {key: now for key in keys})
+        pipe.zcard(self.lru_key)
+        count = pipe.execute()[-1]
+
+        overflow = count - self.max_entries
+        if overflow > 0:
+            evicted = self.client.zpopmin(self.lru_key, overflow)
+            if evicted:
+                self.client.delete(
+                    *[f"{self.prefix}:{key.decode('utf-8')}" for key, _ in evicted]
+                )
+                logger.info(f"Evicted {len(evicted)} entries from embedding cache")
+
+    def stats(self) -> Dict[str, int]:
+        counters = self.client.hgetall(f"{self.prefix}:counters")
+        return {
+            "hits": int(counters.get(b"hits", 0)),
+            "misses": int(counters.get(b"misses", 0)),
+            "entries": self.client.zcard(self.lru_key),
+        }
+
+
+class QueryEmbeddingCache(EmbeddingCache):
+    """
+    Two-tier cache for search query embeddings
+
+    Lookups go to an in-process LRU first, then to Redis, which is shared
+    by every API process; Redis hits are copied into the LRU. Both tiers
+    expire entries after their TTL and are bounded in size. Queries are
+    keyed by their normalised text (case and whitespace folded), so
+    repeated and trivially reworded questions skip the embeddings API.
+
+    Redis errors are logged and count as misses; Redis is then skipped for
+    `redis_retry_seconds` so an outage does not add a timeout to every query.
+    """
+
+    backend = "lru+redis"
+    redis_retry_seconds = 30
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: int,
+        redis_enabled: bool,
+        redis_ttl_seconds: int,
+        redis_max_entries: int,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self.redis_max_entries = redis_max_entries
+        self.prefix = "query_embedding_cache"
+        self.lru_key = f"{self.prefix}:lru"
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[np.ndarray, float]]" = OrderedDict()
+        self._counters = {"lru_hits": 0, "redis_hits": 0, "misses": 0, "redis_errors": 0}
+        self._redis_retry_at = 0.0
+        self.client = None
+        if redis_enabled:
+            # Embeddings are stored as raw float32 bytes, so responses must not be decoded.
+            # No retries: a cache miss is cheaper than a query waiting on backoff.
+            self.client = redis.Redis(
+                host=settings.redis_host,
+                port=settings.redis_port,
+                db=settings.redis_db,
+                socket_connect_timeout=2,
+                socket_timeout=2,
+                retry=Retry(NoBackoff(), 0),
+            )
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Fold case and whitespace so rephrasings that only differ there share an entry"""
+        return " ".join(text.split()).casefold()
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[np.ndarray]]:
+        if not texts:
+            return []
+
+        keys = [_cache_key(model, self.normalize(text)) for text in texts]
+        results: List[Optional[np.ndarray]] = [None] * len(keys)
+        now = time.monotonic()
+        with self._lock:
+            for index, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                embedding, expires_at = entry
+                if expires_at <= now:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                results[index] = embedding
+            lru_hits = sum(1 for embedding in results if embedding is not None)
+
+        missing = [index for index, embedding in enumerate(results) if embedding is None]
+        redis_hits = 0
+        if missing and self._redis_available():
+            found = self._redis_get([keys[index] for index in missing])
+            for index, embedding in zip(missing, found):
+                if embedding is not None:
+                    results[index] = embedding
+                    redis_hits += 1
+            if redis_hits:
+                self._remember(
+                    [(keys[index], results[index]) for index in missing if results[index] is not None]
+                )
+
+        with self._lock:
+            self._counters["lru_hits"] += lru_hits
+            self._counters["redis_hits"] += redis_hits
+            self._counters["misses"] += len(keys) - lru_hits - redis_hits
+        return results
+
+    def set_many(self, model: str, texts: List[str], embeddings: Sequence[np.ndarray]) -> None:
+        if not texts:
+            return
+
+        entries = [
+            (_cache_key(model, self.normalize(text)), np.asarray(embedding, dtype=np.float32))
+            for text, embedding in zip(texts, embeddings)
+        ]
+        self._remember(entries)
+        if self._redis_available():
+            self._redis_set(entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            entries = len(self._entries)
+        lookups = counters["lru_hits"] + counters["redis_hits"] + counters["misses"]
+        hits = counters["lru_hits"] + counters["redis_hits"]
+        return {
+            "hits": hits,
+            "misses": counters["misses"],
+            "entries": entries,
+            "lru_hits": counters["lru_hits"],
+            "redis_hits": counters["redis_hits"],
+            "redis_errors": counters["redis_errors"],
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+            "lru_hit_rate": round(counters["lru_hits"] / lookups, 4) if lookups else None,
+            "redis": self.client is not None,
+        }
+
+    def _remember(self, entries: List[Tuple[str, np.ndarray]]) -> None:
+        """Add entries to the in-process LRU, evicting the least recently used"""
+        if self.max_entries <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            for key, embedding in entries:
+                self._entries[key] = (embedding, expires_at)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _redis_available(self) -> bool:
+        return self.client is not None and time.monotonic() >= self._redis_retry_at
+
+    def _redis_get(self, keys: List[str]) -> List[Optional[np.ndarray]]:
+        try:
+            values = self.client.mget([f"{self.prefix}:{key}" for key in keys])
+            hits = {key: time.time() for key, value in zip(keys, values) if value is not None}
+            if hits:
+                self.client.zadd(self.lru_key, hits)
+            return [_unpack(value) if value is not None else None for value in values]
+        except redis.RedisError as e:
+            self._redis_failed("lookup", e)
+            return [None] * len(keys)
+
+    def _redis_set(self, entries: List[Tuple[str, np.ndarray]]) -> None:
+        try:
+            now = time.time()
+            pipe = self.client.pipeline(transaction=False)
+            for key, embedding in entries:
+                pipe.set(f"{self.prefix}:{key}", _pack(embedding), ex=self.redis_ttl_seconds)
+            pipe.zadd(self.lru_key, {key: now for key, _ in entries})
+            # Forget LRU entries whose value has expired
+            pipe.zremrangebyscore(self.lru_key, "-inf", now - self.redis_ttl_seconds)
+            pipe.zcard(self.lru_key)
+            count = pipe.execute()[-1]
+
+            overflow = count - self.redis_max_entries
+            if overflow > 0:
+                evicted = self.client.zpopmin(self.lru_key, overflow)
+                if evicted:
+                    self.client.delete(
+                        *[f"{self.prefix}:{key.decode('utf-8')}" for key, _ in evicted]
+                    )
+                    logger.info(f"Evicted {len(evicted)} entries from query embedding cache")
+        except redis.RedisError as e:
+            self._redis_failed("write", e)
+
+    def _redis_failed(self, operation: str, error: Exception) -> None:
+        with self._lock:
+            self._counters["redis_errors"] += 1
+            self._redis_retry_at = time.monotonic() + self.redis_retry_seconds
+        logger.warning(f"Query embedding cache Redis {operation} failed: {error}")
+
+
+def create_embedding_cache() -> EmbeddingCache:
+    """Build the embedding cache selected by `embedding_cache_backend`"""
+    backend = settings.embedding_cache_backend.lower()
+    if backend == "disk":
+        return DiskEmbeddingCache(
+            path=settings.embedding_cache_path,
+            max_entries=settings.embedding_cache_max_entries,
+        )
+    if backend == "redis":
+        return RedisEmbeddingCache(max_entries=settings.embedding_cache_max_entries)
+    if backend != "none":
+        logger.warning(f"Unknown embedding cache backend '{backend}', caching disabled")
+    return EmbeddingCache()
+
+
+# Create singleton instances
+embedding_cache = create_embedding_cache()
+query_embedding_cache = QueryEmbeddingCache(
+    max_entries=settings.query_embedding_cache_size,
+    ttl_seconds=settings.query_embedding_cache_ttl_seconds,
+    redis_enabled=settings.query_embedding_cache_redis,
+    redis_ttl_seconds=settings.query_embedding_cache_redis_ttl_seconds,
+    redis_max_entries=settings.query_embedding_cache_redis_max_entries,
+)
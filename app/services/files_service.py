@@ -1,11 +1,19 @@
 from fastapi import UploadFile
 from datetime import datetime
-from typing import Dict, Set, Tuple
+from typing import Deque, Dict, Iterator, List, Optional, Set, Tuple, Union
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+import asyncio
+import hashlib
+import mmap
+import multiprocessing
 import os
+import threading
+import uuid
 import fitz  # PyMuPDF
-import re
-from collections import Counter
-from ..core import settings
+from .text_cleaner import clean_lines, split_lines
+from ..core import run_blocking, run_cpu, settings
 from ..exceptions import FileProcessingError
 import logging
 
@@ -18,136 +26,301 @@ class FileService:
     def __init__(self):
         self.upload_dir = settings.upload_directory
 
-    async def upload_file(self, pdf_file: UploadFile) -> Dict[str, str]:
+    async def stream_upload(self, pdf_file: UploadFile) -> Tuple[str, str]:
         """
-        Upload PDF file and extract text
-        
+        Stream an upload to a temporary file in the upload directory
+
+        The upload is read in `upload_chunk_size_kb` chunks; each chunk is
+        written (blocking-I/O executor) and hashed (CPU executor) before
+        the next is read, so memory stays bounded by one chunk per upload
+        and the `max_file_size_mb` limit is enforced while streaming. The
+        request as a whole has already been bounded by `max_upload_request_mb`
+        before Starlette spooled the form (see `UploadSizeLimitRoute`). Move
+        the file into place with `commit_upload` or remove it with
+        `discard_upload`.
+
         Args:
             pdf_file: The uploaded PDF file
-            
+
         Returns:
-            Dict of {page_key: cleaned_text}
-            
+            Tuple of (temporary path, hex SHA-256 of the content)
+
         Raises:
-            FileProcessingError: If file processing fails
+            FileProcessingError: If the file is not a PDF, exceeds the size
+                limit or cannot be written
         """
         if not pdf_file.filename.lower().endswith(".pdf"):
             raise FileProcessingError(pdf_file.filename, "Only PDF files are allowed")
 
-        try:
-            current_timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-            file_path = os.path.join(
-                self.upload_dir, f"{pdf_file.filename}_{current_timestamp}"
-            )
-
-            # Ensure upload directory exists
-            os.makedirs(self.upload_dir, exist_ok=True)
+        max_bytes = settings.max_file_size_mb * 1024 * 1024
+        chunk_size = settings.upload_chunk_size_kb * 1024
+        too_large_reason = f"File exceeds the maximum size of {settings.max_file_size_mb} MB"
 
-            with open(file_path, "wb") as f:
-                content = await pdf_file.read()
-                f.write(content)
+        # Reject early when the multipart parser already knows the size
+        if pdf_file.size is not None and pdf_file.size > max_bytes:
+            raise FileProcessingError(pdf_file.filename, too_large_reason)
 
-            logger.info(f"File saved to {file_path}")
-            
-            return self.extract_text_from_document(file_path=file_path)
-        
-        except FileProcessingError:
-            # Re-raise our custom exceptions
-            raise
+        os.makedirs(self.upload_dir, exist_ok=True)
+        temp_path = os.path.join(self.upload_dir, f".{uuid.uuid4().hex}.part")
+        content_hash = hashlib.sha256()
+        bytes_read = 0
+        try:
+            with open(temp_path, "wb") as f:
+                while chunk := await pdf_file.read(chunk_size):
+                    bytes_read += len(chunk)
+                    if bytes_read > max_bytes:
+                        raise FileProcessingError(pdf_file.filename, too_large_reason)
+                    # Both release the GIL, so the write and the hash overlap
+                    await asyncio.gather(
+                        run_blocking(f.write, chunk), run_cpu(content_hash.update, chunk)
+                    )
         except Exception as e:
-            # Wrap unexpected errors in FileProcessingError
-            logger.error(f"Unexpected error processing file '{pdf_file.filename}': {e}")
-            raise FileProcessingError(pdf_file.filename, str(e))
+            await run_blocking(self.discard_upload, temp_path)
+            if isinstance(e, FileProcessingError):
+                raise
+            logger.error(f"Failed to save upload '{pdf_file.filename}': {e}")
+            raise FileProcessingError(pdf_file.filename, "Failed to save file")
+
+        return temp_path, content_hash.hexdigest()
+
+    def upload_path(self, filename: str) -> str:
+        """Return a new timestamped path for an upload in the upload directory"""
+        current_timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+        return os.path.join(self.upload_dir, f"{filename}_{current_timestamp}")
 
-    def extract_text_from_document(self, file_path: str) -> Dict[str, str]:
+    def commit_upload(self, temp_path: str, filename: str) -> str:
         """
-        Extract text from PDF using PyMuPDF (fitz) for better multi-column handling.
+        Move a streamed upload into place under a new timestamped path
 
-        PyMuPDF provides superior text extraction for academic papers and
-        multi-column documents by properly detecting reading order and
-        maintaining word spacing.
+        The rename is atomic, so the final path only ever exists complete.
 
         Args:
-            file_path: Path to the PDF file
-            
+            temp_path: Path returned by `stream_upload`
+            filename: Name of the uploaded file
+
         Returns:
-            Dict of {page_key: cleaned_text}
-            
-        Raises:
-            FileProcessingError: If text extraction fails
+            The upload's path in the upload directory
         """
+        file_path = self.upload_path(filename)
+        os.replace(temp_path, file_path)
+        logger.info(f"File saved to {file_path}")
+        return file_path
+
+    @staticmethod
+    def hash_file(path: str) -> str:
+        """SHA-256 of a file on disk, read in `upload_chunk_size_kb` chunks"""
+        content_hash = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(settings.upload_chunk_size_kb * 1024):
+                content_hash.update(chunk)
+        return content_hash.hexdigest()
+
+    @staticmethod
+    def discard_upload(path: str) -> None:
+        """Remove an uploaded (or partially streamed) file that will not be processed"""
         try:
-            pages = {}
-            # Open PDF with PyMuPDF
-            pdf_doc = fitz.open(file_path)
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Failed to remove upload {path}: {e}")
+
+    def extract_text_from_documents(
+        self, file_paths: List[str]
+    ) -> Dict[str, Union[Dict[str, str], FileProcessingError]]:
+        """
+        Extract and clean text from several PDFs in parallel.
 
-            if pdf_doc.page_count == 0:
-                raise FileProcessingError(file_path, "PDF has no pages")
+        Every file is split into shards of `extraction_pages_per_shard` pages
+        and all shards of all files are parsed concurrently in the process
+        pool. Header/footer detection runs as a merge step once all shards of
+        a file are back, after which cleaning is fanned out again per shard.
 
-            for page_num in range(pdf_doc.page_count):
-                page = pdf_doc[page_num]
-                page_key = f"page_{page_num + 1}"
-
-                # Extract text with PyMuPDF
-                # flags parameter controls text extraction behavior:
-                # 0: default (good for multi-column)
-                # fitz.TEXTFLAGS_TEXT: preserve text layout
-                # fitz.TEXTFLAGS_HTML: HTML output
-                # fitz.TEXTFLAGS_DICT: structured output
-                # fitz.TEXTFLAGS_WORDS: word-level extraction
-                extracted_page_text = page.get_text(
-                    "text",  # Plain text format
-                    flags=fitz.TEXTFLAGS_WORDS,  # Use word-level extraction for better spacing
-                )
-
-                if not extracted_page_text or extracted_page_text.strip() == "":
-                    pages[page_key] = None
-                    continue
-
-                pages[page_key] = extracted_page_text
-
-            # Close the PDF document
-            pdf_doc.close()
-
-            # Detect and remove headers/footers
-            header, footer = self._detect_headers_and_footers(pages)
-
-            # Clean each page
-            for page_key, page_info in pages.items():
-                if not page_info:
-                    continue
-                pages[page_key] = self.clean_extracted_page_info(
-                    page_info, header=header, footer=footer
-                )
-
-            return pages
-
-        except FileProcessingError:
-            # Re-raise our custom exceptions
-            raise
-        except Exception as e:
-            # Wrap unexpected errors
-            logger.error(f"Error extracting text from PDF '{file_path}': {e}")
-            raise FileProcessingError(file_path, f"Text extraction failed: {str(e)}")
+        Args:
+            file_paths: Paths of the PDF files to extract
+
+        Returns:
+            Dict of {file_path: {page_key: cleaned_text}}, or the
+            FileProcessingError raised for that file
+        """
+        return dict(self.iter_extracted_documents(file_paths, window=max(1, len(file_paths))))
+
+    def iter_extracted_documents(
+        self, file_paths: List[str], window: int
+    ) -> Iterator[Tuple[str, Union[Dict[str, str], FileProcessingError]]]:
+        """
+        Extract PDFs in parallel, yielding each file's result in order.
+
+        At most `window` files have shards submitted to the pool at a time,
+        so a slow consumer bounds how much extracted text is buffered.
+
+        Args:
+            file_paths: Paths of the PDF files to extract
+            window: Maximum number of files being extracted concurrently
+
+        Yields:
+            Tuples of (file_path, {page_key: cleaned_text} or FileProcessingError)
+        """
+        for file_path, pages, _ in self.iter_extracted_parts(file_paths, window):
+            yield file_path, pages
 
+    def iter_extracted_parts(
+        self, file_paths: List[str], window: int, head_pages: int = 0
+    ) -> Iterator[Tuple[str, Union[Dict[str, str], FileProcessingError], bool]]:
+        """
+        Extract PDFs in parallel, yielding files in order and in parts.
+
+        With `head_pages`, a file with more pages than that is yielded twice:
+        its first `head_pages` pages as soon as they are cleaned, then the
+        remaining pages. Headers/footers are detected on the first part and
+        applied to both, so the head never waits for the whole file.
+
+        Args:
+            file_paths: Paths of the PDF files to extract
+            window: Maximum number of files being extracted concurrently
+            head_pages: Pages in the first part (0 = one part per file)
+
+        Yields:
+            Tuples of (file_path, {page_key: cleaned_text} or
+            FileProcessingError, whether this is the file's last part)
+        """
+        executor = _get_extraction_executor()
+        in_flight: Deque[Tuple[str, Union[List[List[Future]], FileProcessingError]]] = deque()
+
+        for file_path in file_paths:
+            in_flight.append(
+                (file_path, self._submit_extraction(executor, file_path, head_pages=head_pages))
+            )
+            if len(in_flight) >= window:
+                done_path, submitted = in_flight.popleft()
+                for pages, final in self._collect_parts(executor, done_path, submitted):
+                    yield done_path, pages, final
+
+        while in_flight:
+            done_path, submitted = in_flight.popleft()
+            for pages, final in self._collect_parts(executor, done_path, submitted):
+                yield done_path, pages, final
+
+    def _submit_extraction(
+        self,
+        executor: Optional[ProcessPoolExecutor],
+        file_path: str,
+        head_pages: int = 0,
+    ) -> Union[List[List[Future]], FileProcessingError]:
+        """
+        Submit all page-range shards of a file for parsing
+
+        Shards are grouped into parts: the first `head_pages` pages and the
+        rest, or a single part without `head_pages`.
+        """
+        try:
+            page_count = _count_pages(file_path)
+            if page_count == 0:
+                raise FileProcessingError(file_path, "PDF has no pages")
+            bounds = [0, page_count]
+            if 0 < head_pages < page_count:
+                bounds.insert(1, head_pages)
+            return [
+                [
+                    _submit(executor, _extract_page_range, file_path, start, end)
+                    for start, end in self._page_shards(part_end, part_start)
+                ]
+                for part_start, part_end in zip(bounds, bounds[1:])
+            ]
+        except Exception as e:
+            return self._wrap_extraction_error(file_path, e)
+
+    def _collect_parts(
+        self,
+        executor: Optional[ProcessPoolExecutor],
+        file_path: str,
+        submitted: Union[List[List[Future]], FileProcessingError],
+    ) -> Iterator[Tuple[Union[Dict[str, str], FileProcessingError], bool]]:
+        """
+        Merge each part's shards and clean them in parallel
+
+        Headers/footers are detected once, on the first part, and that
+        result cleans every part of the file. Without `head_pages` the
+        first part is the whole file; with it, detection deliberately
+        samples only the first `head_pages` pages, so the head never waits
+        for the rest of the file (a line repeated on most pages overall
+        but not on most of the head is kept). Yields (cleaned pages or
+        FileProcessingError, is last part); nothing is yielded after an
+        error.
+        """
+        if isinstance(submitted, FileProcessingError):
+            yield submitted, True
+            return
+
+        header: Set[str] = set()
+        footer: Set[str] = set()
+        for index, shard_futures in enumerate(submitted):
+            try:
+                pages: Dict[str, Optional[List[str]]] = {}
+                for future in shard_futures:
+                    pages.update(future.result())
+
+                # Detect headers/footers on the first part, remove them from all
+                if index == 0:
+                    header, footer = self._detect_headers_and_footers(pages)
+
+                page_items = list(pages.items())
+                clean_futures = [
+                    _submit(
+                        executor,
+                        _clean_pages,
+                        dict(page_items[start:end]),
+                        header,
+                        footer,
+                    )
+                    for start, end in self._page_shards(len(page_items))
+                ]
+
+                cleaned_pages = {}
+                for future in clean_futures:
+                    cleaned_pages.update(future.result())
+            except Exception as e:
+                yield self._wrap_extraction_error(file_path, e), True
+                return
+            yield cleaned_pages, index == len(submitted) - 1
+
+    def _page_shards(self, page_count: int, first_page: int = 0) -> List[Tuple[int, int]]:
+        """Split pages [first_page, page_count) into (start, end) ranges of one shard each"""
+        shard_size = max(1, settings.extraction_pages_per_shard)
+        return [
+            (start, min(start + shard_size, page_count))
+            for start in range(first_page, page_count, shard_size)
+        ]
+
+    def _wrap_extraction_error(
+        self, file_path: str, error: Exception
+    ) -> FileProcessingError:
+        """Convert an extraction failure into a FileProcessingError"""
+        if isinstance(error, FileProcessingError):
+            return error
+        logger.error(f"Error extracting text from PDF '{file_path}': {error}")
+        return FileProcessingError(file_path, f"Text extraction failed: {str(error)}")
+
+    @staticmethod
     def _detect_headers_and_footers(
-        self, pages: Dict[str, str]
+        pages: Dict[str, Optional[List[str]]]
     ) -> Tuple[Set[str], Set[str]]:
         """
         Detect common headers and footers across pages
 
+        Args:
+            pages: Dict of {page_key: stripped non-empty lines or None}
+
         Returns:
             Tuple of (header_set, footer_set)
         """
         header_candidates = []
         footer_candidates = []
 
-        for page in pages.values():
-            if not page:  # Skip empty pages
+        for lines in pages.values():
+            if not lines:  # Skip empty pages
                 continue
 
-            lines = [line.strip() for line in page.splitlines() if line.strip()]
-
             if len(lines) > 0:
                 header_candidates.append(lines[0])
             if len(lines) > 1:
@@ -171,46 +344,119 @@ class FileService:
 
         return header, footer
 
+    @staticmethod
     def clean_extracted_page_info(
-        self, page_info: str, header: Set[str], footer: Set[str]
+        page_info: str, header: Set[str], footer: Set[str]
     ) -> str:
         """
         Clean page text by removing headers, footers, and normalizing whitespace.
 
         Optimized for PyMuPDF output which generally has better word spacing
         but may still have some formatting issues from complex layouts.
+        Extraction uses `clean_lines` directly on the lines it already split.
         """
-        page_lines = []
-        for line in page_info.splitlines():
-            line = line.strip()
-            if not line:
-                continue
-            if line in header or line in footer:
-                continue
-            page_lines.append(line)
+        return clean_lines(split_lines(page_info), header, footer)
 
-        page_info = "\n".join(page_lines)
 
-        # Remove hyphenation at line breaks (replace with nothing to join words)
-        page_info = re.sub(r"-\n", "", page_info)
+_extraction_executor: Optional[ProcessPoolExecutor] = None
+_extraction_executor_lock = threading.Lock()
 
-        # Replace single newlines with spaces (preserve paragraph breaks)
-        page_info = re.sub(r"(?<!\n)\n(?!\n)", " ", page_info)
 
-        # Fix concatenated words: add space between lowercase-to-uppercase transitions
-        # PyMuPDF generally handles spacing better, but this helps with edge cases
-        page_info = re.sub(r"([a-z])([A-Z][a-z])", r"\1 \2", page_info)
+def _get_extraction_executor() -> Optional[ProcessPoolExecutor]:
+    """
+    Lazily create the shared extraction process pool.
 
-        # Fix cases where periods are stuck to next word: "end.Next" -> "end. Next"
-        page_info = re.sub(r"([.!?])([A-Z][a-z])", r"\1 \2", page_info)
+    Ingestion worker threads may ask for the pool at the same time, so it
+    is created under a lock. Workers are started from a forkserver (spawn
+    where unavailable): forking a process that runs threads and holds
+    Redis/HTTP connections can deadlock the child on a copied lock.
 
-        # Normalize excessive newlines (3+ becomes 2 for paragraph breaks)
-        page_info = re.sub(r"\n{3,}", "\n\n", page_info)
+    Returns None when `extraction_workers` is 1, in which case shards are
+    processed in the calling process.
+    """
+    global _extraction_executor
+    workers = settings.extraction_workers or os.cpu_count() or 1
+    if workers <= 1:
+        return None
+    with _extraction_executor_lock:
+        if _extraction_executor is None:
+            method = (
+                "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            )
+            _extraction_executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context(method)
+            )
+            logger.info(f"Started PDF extraction pool with {workers} {method} workers")
+    return _extraction_executor
+
+
+def _submit(executor: Optional[ProcessPoolExecutor], fn, *args) -> Future:
+    """Submit to the pool, or run inline and return a completed future"""
+    if executor is not None:
+        return executor.submit(fn, *args)
+    future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+@contextmanager
+def _open_pdf(file_path: str) -> Iterator[fitz.Document]:
+    """
+    Open a PDF through a read-only memory map, so PyMuPDF parses the page
+    cache directly instead of reading the file into its own buffer
+    """
+    with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        try:
+            with fitz.open(stream=view, filetype="pdf") as pdf_doc:
+                yield pdf_doc
+        finally:
+            view.release()
+
+
+def _count_pages(file_path: str) -> int:
+    with _open_pdf(file_path) as pdf_doc:
+        return pdf_doc.page_count
+
+
+def _extract_page_range(
+    file_path: str, start: int, end: int
+) -> Dict[str, Optional[List[str]]]:
+    """
+    Extract pages [start, end) of a PDF as stripped, non-empty lines
+    (runs in a worker process)
+    """
+    pages = {}
+    with _open_pdf(file_path) as pdf_doc:
+        for page_num in range(start, end):
+            page = pdf_doc[page_num]
+            page_key = f"page_{page_num + 1}"
+
+            # Extract text with PyMuPDF
+            # flags parameter controls text extraction behavior:
+            # 0: default (good for multi-column)
+            # fitz.TEXTFLAGS_TEXT: preserve text layout
+            # fitz.TEXTFLAGS_HTML: HTML output
+            # fitz.TEXTFLAGS_DICT: structured output
+            # fitz.TEXTFLAGS_WORDS: word-level extraction
+            extracted_page_text = page.get_text(
+                "text",  # Plain text format
+                flags=fitz.TEXTFLAGS_WORDS,  # Use word-level extraction for better spacing
+            )
 
-        # Normalize whitespace (multiple spaces/tabs become single space)
-        page_info = re.sub(r"[ \t]+", " ", page_info)
+            # Split once; header detection and cleaning both use the lines
+            pages[page_key] = split_lines(extracted_page_text) or None
+    return pages
 
-        # Clean up any remaining extra spaces around newlines
-        page_info = re.sub(r" *\n *", "\n", page_info)
 
-        return page_info.strip()
+def _clean_pages(
+    pages: Dict[str, Optional[List[str]]], header: Set[str], footer: Set[str]
+) -> Dict[str, Optional[str]]:
+    """Clean a shard of extracted pages (runs in a worker process)"""
+    return {
+        page_key: clean_lines(lines, header, footer) if lines else None
+        for page_key, lines in pages.items()
+    }
@@ -0,0 +1,658 @@
+from typing import Dict, Any, Callable, Iterator, List, Optional, Set, Tuple, Union
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+from datetime import datetime, timedelta
+import logging
+import queue
+import threading
+
+from .files_service import FileService
+from .text_chunker import Chunk, TextChunker
+from .vector_embedings import EmbeddingService
+from ..core import db_client, vector_db_client, settings
+from ..exceptions import FileProcessingError
+from ..memory.ingestion_checkpoints import ingestion_checkpoints
+from ..memory.job_queue import JobTracker
+from ..memory.retrieval_cache import retrieval_cache
+from ..repositories import DocumentRepository
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's input
+_DONE = object()
+
+# Statuses of documents a job has queued or is ingesting
+IN_FLIGHT_STATUSES = ("pending", "processing", "partial")
+
+
+def has_live_ingestion(document: Any) -> bool:
+    """
+    Whether a live job owns an unfinished document
+
+    Jobs refresh `heartbeat_at` every `ingestion_heartbeat_seconds`; one
+    silent for `ingestion_heartbeat_timeout_seconds` has died and left the
+    document for another run to take over.
+    """
+    if document.status not in IN_FLIGHT_STATUSES or document.heartbeat_at is None:
+        return False
+    timeout = timedelta(seconds=settings.ingestion_heartbeat_timeout_seconds)
+    return datetime.now() - document.heartbeat_at < timeout
+
+
+class _StageError(Exception):
+    """A pipeline stage failed for one document"""
+
+    def __init__(self, message: str, cause: Exception):
+        super().__init__(f"{message}: {cause}")
+        self.message = message
+        self.cause = cause
+
+
+class IngestionService:
+    """
+    Runs queued ingestion jobs through the processing stages, pipelined
+    so that different documents occupy different stages at the same time:
+    Stage 2: Extract text and clean data (process pool)
+    Stage 3: Chunk the cleaned text
+    Stage 4: Generate embeddings
+    Stage 5: Store in vector database
+
+    Stage 1 (upload) happens in the request handler before the job is queued.
+
+    Extracted pages, chunks and stored batches are checkpointed per
+    document, so processing a document again (see the resume endpoints)
+    continues after its last completed stage.
+
+    With progressive indexing (`progressive_indexing_pages`), documents
+    longer than that flow through the stages in two parts: the first pages
+    are chunked, embedded and stored while the rest is still being
+    extracted. Once they are stored the document becomes "partial" with
+    `pages_indexed` set, so it can be queried before ingestion finishes.
+    """
+
+    def __init__(self, db: Session, job_queue: JobTracker):
+        self.job_queue = job_queue
+        self.file_service = FileService()
+        self.text_chunker = TextChunker(
+            chunk_size=settings.chunk_size, overlap_size=settings.chunk_overlap
+        )
+        self.embedding_service = EmbeddingService()
+        self.document_repo = DocumentRepository(db)
+        self.checkpoints = ingestion_checkpoints
+
+    def process_job(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Process every document of an ingestion job
+
+        The stages run as a pipeline connected by bounded queues: while one
+        document is being embedded, the next is chunked and later ones are
+        still being extracted by the process pool. A full queue blocks the
+        stage feeding it. Embeddings are written to the vector store in
+        batches of `vector_store_batch_size` chunks as they arrive, so peak
+        memory depends on the queue and batch sizes, not the upload size.
+
+        Args:
+            job: Job data dictionary as stored by the job queue
+
+        Returns:
+            Storage statistics for the job
+        """
+        chat_id = job["chat_id"]
+        documents = job["documents"]
+        self.job_queue.update_job(job, "running")
+        logger.info(f"Running ingestion job {job['job_id']} for chat_id: {chat_id}")
+
+        # Document rows are written at the start and the end of the job, plus
+        # once per document that becomes partially available in between
+        self._document_updates: Dict[int, Dict[str, Any]] = {}
+        self._parts: Dict[str, Dict[str, Any]] = {}
+        self._write_documents(
+            {
+                doc["document_id"]: {
+                    "status": "processing",
+                    "chat_id": chat_id,
+                    "heartbeat_at": datetime.now(),
+                }
+                for doc in documents.values()
+            }
+        )
+        for filename in documents:
+            self.job_queue.update_document(job, filename, stage="extracting")
+
+        queue_size = max(1, settings.ingestion_queue_size)
+        embed_queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        store_queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        aborted = threading.Event()
+        failures: Dict[str, Exception] = {}
+        storage_stats = {"stored": 0, "skipped": 0, "errors": 0, "existing": 0}
+        job["storage_stats"] = storage_stats
+
+        # Embedding and storage run in their own threads; the database
+        # session is only used from this thread
+        stages = [
+            threading.Thread(
+                target=self._run_stage,
+                args=(self._embed_stage, job, embed_queue, store_queue, failures, aborted),
+                name=f"embed-{job['job_id'][:8]}",
+                daemon=True,
+            ),
+            threading.Thread(
+                target=self._run_stage,
+                args=(self._store_stage, job, store_queue, None, failures, aborted),
+                name=f"store-{job['job_id'][:8]}",
+                daemon=True,
+            ),
+        ]
+        for stage in stages:
+            stage.start()
+
+        finished = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat,
+            args=(job, finished),
+            name=f"heartbeat-{job['job_id'][:8]}",
+            daemon=True,
+        )
+        heartbeat.start()
+
+        filenames_by_path = {}
+        try:
+            # Documents with a checkpoint skip the stages they already completed
+            for filename, doc in documents.items():
+                try:
+                    parts = self._resume_document(job, filename)
+                except Exception as e:
+                    failures[filename] = e
+                    self._record_failure(job, filename, e)
+                    continue
+                if parts is None:
+                    filenames_by_path[doc["path"]] = filename
+                    continue
+                for part in parts:
+                    if not self._put(embed_queue, (filename, *part), aborted):
+                        break
+
+            # Stage 2: Extract and clean, keeping a window of files in the process pool
+            extracted_parts = self.file_service.iter_extracted_parts(
+                list(filenames_by_path),
+                window=queue_size,
+                head_pages=max(0, settings.progressive_indexing_pages),
+            )
+            for file_path, extracted_pages, final in extracted_parts:
+                if aborted.is_set():
+                    break
+                filename = filenames_by_path[file_path]
+                if filename in failures:
+                    continue
+                try:
+                    # Stage 3: Chunk the cleaned text
+                    part = self._chunk_document(job, filename, extracted_pages, final)
+                except Exception as e:
+                    failures[filename] = e
+                    self._record_failure(job, filename, e)
+                    continue
+                if not self._put(embed_queue, (filename, *part), aborted):
+                    break
+        finally:
+            self._put(embed_queue, _DONE, aborted)
+            for stage in stages:
+                stage.join()
+            finished.set()
+            heartbeat.join()
+
+        # Mark documents as completed or failed
+        for filename, doc in documents.items():
+            updates = self._document_updates.setdefault(doc["document_id"], {})
+            updates["pages_indexed"] = doc.get("pages_indexed", 0)
+            if filename not in failures and doc["stage"] == "completed":
+                updates["status"] = "completed"
+                self._delete_checkpoints(filename, doc)
+                continue
+
+            if filename not in failures:
+                # The pipeline stopped before this document was stored
+                failures[filename] = RuntimeError("Ingestion pipeline aborted")
+                self.job_queue.update_document(
+                    job, filename, stage="failed", error="Ingestion was interrupted"
+                )
+            # Release the content hash so a re-upload is processed again
+            updates.update(status="failed", content_hash=None)
+        self._write_documents(self._document_updates)
+
+        self.job_queue.update_job(job, "failed" if failures else "completed")
+
+        logger.info(
+            f"Ingestion job {job['job_id']} complete: "
+            f"{len(documents) - len(failures)} succeeded, {len(failures)} failed"
+        )
+        return storage_stats
+
+    def _chunk_document(
+        self,
+        job: Dict[str, Any],
+        filename: str,
+        extracted_pages: Union[Dict[str, str], FileProcessingError],
+        final: bool = True,
+        checkpoint_pages: bool = True,
+    ) -> Tuple[List[Chunk], int, bool, int]:
+        """
+        Chunk one extracted part of a document and record its metadata
+
+        Parts continue the previous part's character offsets, so their
+        chunks are identical to chunking the whole document at once. The
+        pages and chunks checkpoints are written once the last part is in.
+
+        Returns:
+            Tuple of (chunks, index of the first chunk within the document,
+            whether this is the last part, pages indexed once it is stored)
+        """
+        if isinstance(extracted_pages, FileProcessingError):
+            raise extracted_pages
+
+        doc = job["documents"][filename]
+        progress = self._parts.setdefault(
+            filename, {"pages": {}, "rows": [], "parts": [], "position": 0}
+        )
+        self.job_queue.update_document(
+            job,
+            filename,
+            stage="chunking",
+            pages_count=doc["pages_count"] + len([p for p in extracted_pages.values() if p]),
+        )
+
+        chunks = self.text_chunker.generate_chunks(
+            document_id=filename,
+            document=extracted_pages,
+            document_hash=doc.get("content_hash"),
+            start_position=progress["position"],
+        )
+
+        chunk_offset = len(progress["rows"])
+        progress["position"] += sum(len(page) for page in extracted_pages.values() if page)
+        progress["pages"].update(extracted_pages)
+        progress["rows"].extend(_chunk_to_row(c) for c in chunks)
+        pages_indexed = len(progress["pages"])
+        progress["parts"].append([chunk_offset, pages_indexed])
+
+        if final:
+            del self._parts[filename]
+            if checkpoint_pages:
+                self._save_checkpoint(job, filename, "pages", progress["pages"])
+            self._save_checkpoint(job, filename, "chunks", progress["rows"])
+            self._save_checkpoint(job, filename, "parts", progress["parts"])
+            # Pages, chunks count and file path are written with the final status
+            self._document_updates[doc["document_id"]] = {
+                "no_of_pages": pages_indexed,
+                "total_chunks": len(progress["rows"]),
+                "path": doc["path"],
+            }
+
+        self.job_queue.update_document(
+            job, filename, stage="embedding", chunks_count=len(progress["rows"])
+        )
+        logger.info(
+            f"Successfully processed {filename}: "
+            f"{len(chunks)} chunks from {len(extracted_pages)} pages"
+            + ("" if final else " (first part)")
+        )
+        return chunks, chunk_offset, final, pages_indexed
+
+    def _resume_document(
+        self, job: Dict[str, Any], filename: str
+    ) -> Optional[List[Tuple[List[Chunk], int, bool, int]]]:
+        """
+        Restore a document from its checkpoints
+
+        Returns:
+            The document's parts (see `_chunk_document`) when its pages or
+            chunks were checkpointed, or None if it has to be extracted
+            from scratch
+        """
+        doc = job["documents"][filename]
+        try:
+            rows = self.checkpoints.load(doc["document_id"], "chunks")
+            parts = self.checkpoints.load(doc["document_id"], "parts")
+            if rows is not None and parts:
+                pages = None
+            else:
+                pages = self.checkpoints.load(doc["document_id"], "pages")
+        except Exception as e:
+            logger.warning(f"Could not load ingestion checkpoint for {filename}: {e}")
+            return None
+
+        if rows is not None and parts:
+            chunks = [_chunk_from_row(filename, row) for row in rows]
+            logger.info(f"Resuming {filename} from checkpoint: {len(chunks)} chunks")
+            no_of_pages = parts[-1][1]
+            self._document_updates[doc["document_id"]] = {
+                "no_of_pages": no_of_pages,
+                "total_chunks": len(chunks),
+                "path": doc["path"],
+            }
+            self.job_queue.update_document(
+                job, filename, stage="embedding", chunks_count=len(chunks)
+            )
+            # Split the chunks into the parts they were stored in, so the
+            # batch checkpoints line up with the resumed batches
+            bounds = [offset for offset, _ in parts] + [len(chunks)]
+            return [
+                (chunks[start:end], start, index == len(parts) - 1, pages_indexed)
+                for index, ((_, pages_indexed), start, end) in enumerate(
+                    zip(parts, bounds, bounds[1:])
+                )
+            ]
+        if pages is not None:
+            logger.info(f"Resuming {filename} from checkpoint: {len(pages)} extracted pages")
+            return [self._chunk_document(job, filename, pages, checkpoint_pages=False)]
+        return None
+
+    def _save_checkpoint(self, job: Dict[str, Any], filename: str, kind: str, value: Any) -> None:
+        """Checkpoint a completed stage; failures only cost resumability"""
+        try:
+            self.checkpoints.save(job["documents"][filename]["document_id"], kind, value)
+        except Exception as e:
+            logger.warning(f"Could not save {kind} checkpoint for {filename}: {e}")
+
+    def _delete_checkpoints(self, filename: str, doc: Dict[str, Any]) -> None:
+        try:
+            self.checkpoints.delete(doc["document_id"])
+        except Exception as e:
+            logger.warning(f"Could not delete ingestion checkpoints for {filename}: {e}")
+
+    def _embed_stage(
+        self,
+        job: Dict[str, Any],
+        filename: str,
+        chunks: List[Chunk],
+        chunk_offset: int,
+        last_part: bool,
+        pages_indexed: int,
+    ) -> Iterator[
+        Tuple[str, List[Chunk], bool, int, Optional[Tuple[int, int]], Optional[int]]
+    ]:
+        """
+        Stage 4: Generate embeddings for one document's chunks
+
+        Chunks are embedded `vector_store_batch_size` at a time and each
+        batch is handed to the store stage as soon as it is ready, so only
+        a few batches of embeddings are ever held in memory. Batches whose
+        chunks are all covered by ranges checkpointed as stored are skipped
+        outright, and chunks already stored by an earlier attempt (same
+        deterministic ID) are not embedded again.
+
+        The last batch of a part carries `pages_indexed`, and the last
+        batch of the last part is marked final.
+        """
+        batch_size = max(1, settings.vector_store_batch_size)
+        stored_batches = self._stored_batches(job, filename)
+        for start in range(0, len(chunks), batch_size):
+            batch = chunks[start : start + batch_size]
+            part_done = start + batch_size >= len(chunks)
+            final = last_part and part_done
+            indexed = pages_indexed if part_done else None
+            # Batches are checkpointed by their position in the whole document
+            batch_range = (chunk_offset + start, chunk_offset + start + len(batch))
+            if _covered(stored_batches, *batch_range):
+                yield filename, [], final, len(batch), None, indexed
+                continue
+
+            existing = self._existing_chunk_ids(filename, batch)
+            pending = [chunk for chunk in batch if chunk.chunk_id not in existing]
+            if pending:
+                try:
+                    pending = self.embedding_service.generate_embeddings(pending)
+                except Exception as e:
+                    raise _StageError("Embedding generation failed", e)
+            self.job_queue.update_document(job, filename, stage="storing")
+            yield filename, pending, final, len(existing), batch_range, indexed
+
+        if not chunks:
+            yield filename, [], last_part, 0, None, pages_indexed
+
+    def _stored_batches(self, job: Dict[str, Any], filename: str) -> List[Tuple[int, int]]:
+        """Chunk ranges checkpointed as stored by an earlier attempt"""
+        try:
+            return self.checkpoints.load_batches(job["documents"][filename]["document_id"])
+        except Exception as e:
+            logger.warning(f"Could not load batch checkpoints for {filename}: {e}")
+            return []
+
+    def _existing_chunk_ids(self, filename: str, chunks: List[Chunk]) -> Set[str]:
+        """IDs of chunks already in the vector store; lookup failures mean none"""
+        try:
+            existing = vector_db_client.get_existing_chunk_ids(chunks)
+        except Exception as e:
+            logger.warning(f"Could not check stored chunks for {filename}: {e}")
+            return set()
+        if existing:
+            logger.info(f"Skipping {len(existing)} already stored chunks of {filename}")
+        return existing
+
+    def _store_stage(
+        self,
+        job: Dict[str, Any],
+        filename: str,
+        chunks: List[Chunk],
+        final: bool,
+        existing: int,
+        batch_range: Optional[Tuple[int, int]],
+        pages_indexed: Optional[int],
+    ) -> Iterator[Any]:
+        """
+        Stage 5: Store one batch of chunks in ChromaDB, merging the job stats
+
+        After the last batch of a document's first part the document is
+        published as partially available.
+        """
+        stats: Dict[str, Any] = {}
+        try:
+            if chunks:
+                stats = vector_db_client.store_chunks(chunks)
+        except Exception as e:
+            raise _StageError("Storing embeddings failed", e)
+        finally:
+            # Release the embeddings as soon as the batch has been written
+            for chunk in chunks:
+                chunk.embedding = None
+            # Cached searches over this document may miss the new chunks
+            if chunks:
+                retrieval_cache.invalidate([chunk.document_id for chunk in chunks])
+
+        if batch_range is not None:
+            try:
+                self.checkpoints.add_batch(
+                    job["documents"][filename]["document_id"], *batch_range
+                )
+            except Exception as e:
+                logger.warning(f"Could not checkpoint stored batch for {filename}: {e}")
+
+        storage_stats = job["storage_stats"]
+        for key in ("stored", "skipped", "errors"):
+            storage_stats[key] += stats.get(key, 0)
+        storage_stats["existing"] += existing
+        if "total_in_collection" in stats:
+            storage_stats["total_in_collection"] = stats["total_in_collection"]
+
+        progress = {
+            "chunks_stored": (
+                job["documents"][filename]["chunks_stored"] + stats.get("stored", 0) + existing
+            )
+        }
+        if pages_indexed is not None:
+            progress["pages_indexed"] = pages_indexed
+        if final:
+            progress["stage"] = "completed"
+        self.job_queue.update_document(job, filename, **progress)
+        if pages_indexed is not None and not final:
+            self._publish_partial(job, filename, pages_indexed)
+        return iter(())
+
+    def _publish_partial(self, job: Dict[str, Any], filename: str, pages_indexed: int) -> None:
+        """
+        Mark a document as partially available
+
+        Runs in the store thread, so it uses its own short-lived session
+        rather than the job's.
+        """
+        db = db_client.SessionLocal()
+        try:
+            DocumentRepository(db).update_documents(
+                {
+                    job["documents"][filename]["document_id"]: {
+                        "status": "partial",
+                        "pages_indexed": pages_indexed,
+                    }
+                }
+            )
+            logger.info(f"{filename} is queryable: {pages_indexed} pages indexed")
+        except Exception as e:
+            logger.warning(f"Could not publish partial availability of {filename}: {e}")
+        finally:
+            db.close()
+
+    def _run_stage(
+        self,
+        work: Callable[..., Any],
+        job: Dict[str, Any],
+        inbox: "queue.Queue",
+        outbox: Optional["queue.Queue"],
+        failures: Dict[str, Exception],
+        aborted: threading.Event,
+    ) -> None:
+        """
+        Consume (filename, ...) items from `inbox` until the end marker
+
+        `work` is called with the job and the item's fields and returns the
+        items to pass on to `outbox`. A failing document is recorded and its
+        remaining items skipped; any other error aborts the pipeline so
+        upstream stages stop instead of blocking forever.
+        """
+        try:
+            while True:
+                item = self._get(inbox, aborted)
+                if item is _DONE or item is None:
+                    break
+                filename = item[0]
+                if filename in failures:
+                    continue
+                try:
+                    for result in work(job, *item):
+                        if outbox is not None and not self._put(outbox, result, aborted):
+                            return
+                except Exception as e:
+                    failures[filename] = e
+                    self._record_failure(job, filename, e)
+        except Exception as e:
+            logger.error(f"Ingestion stage crashed for job {job['job_id']}: {e}", exc_info=True)
+            aborted.set()
+        finally:
+            if outbox is not None:
+                self._put(outbox, _DONE, aborted)
+
+    @staticmethod
+    def _put(stage_queue: "queue.Queue", item: Any, aborted: threading.Event) -> bool:
+        """Put with backpressure; returns False once the pipeline is aborted"""
+        while not aborted.is_set():
+            try:
+                stage_queue.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @staticmethod
+    def _get(stage_queue: "queue.Queue", aborted: threading.Event) -> Any:
+        """Get the next item; returns None once the pipeline is aborted"""
+        while not aborted.is_set():
+            try:
+                return stage_queue.get(timeout=1)
+            except queue.Empty:
+                continue
+        return None
+
+    def _record_failure(self, job: Dict[str, Any], filename: str, error: Exception) -> None:
+        """Record a user-facing error message for a failed document"""
+        if isinstance(error, FileProcessingError):
+            # File processing failed - user-facing error
+            logger.error(f"File processing error for {filename}: {error.reason}")
+            message = error.reason
+        elif isinstance(error, SQLAlchemyError):
+            # Database error
+            logger.error(f"Database error for {filename}: {error}")
+            message = "Database operation failed"
+        elif isinstance(error, _StageError):
+            logger.error(f"{error.message} for {filename}: {error.cause}", exc_info=error.cause)
+            message = error.message
+        else:
+            # Unexpected error - log details but show generic message
+            logger.error(f"Unexpected error processing {filename}: {error}", exc_info=error)
+            message = "An unexpected error occurred during processing"
+
+        self.job_queue.update_document(job, filename, stage="failed", error=message)
+
+    def _heartbeat(self, job: Dict[str, Any], finished: threading.Event) -> None:
+        """
+        Refresh the heartbeat of the job and its documents until it finishes
+
+        Runs in its own thread with its own database session, since the
+        job's session belongs to the thread running the pipeline.
+        """
+        document_ids = [doc["document_id"] for doc in job["documents"].values()]
+        while not finished.wait(max(1, settings.ingestion_heartbeat_seconds)):
+            try:
+                self.job_queue.heartbeat(job)
+            except Exception as e:
+                logger.warning(f"Could not refresh heartbeat of job {job['job_id']}: {e}")
+            db = db_client.SessionLocal()
+            try:
+                now = datetime.now()
+                DocumentRepository(db).update_documents(
+                    {document_id: {"heartbeat_at": now} for document_id in document_ids}
+                )
+            except Exception as e:
+                logger.warning(f"Could not refresh heartbeat of job {job['job_id']}: {e}")
+            finally:
+                db.close()
+
+    def _write_documents(self, updates: Dict[int, Dict[str, Any]]) -> None:
+        """Update Document rows in one transaction, logging rather than raising"""
+        try:
+            self.document_repo.update_documents(updates)
+        except SQLAlchemyError as db_error:
+            logger.error(f"Database error updating {len(updates)} documents: {db_error}")
+        except Exception as db_error:
+            logger.error(f"Unexpected error updating {len(updates)} documents: {db_error}")
+
+
+def _covered(ranges: List[Tuple[int, int]], start: int, end: int) -> bool:
+    """Whether sorted [start, end) ranges together cover [start, end)"""
+    for range_start, range_end in ranges:
+        if range_start > start:
+            break
+        start = max(start, range_end)
+        if start >= end:
+            return True
+    return start >= end
+
+
+def _chunk_to_row(chunk: Chunk) -> List[Any]:
+    """Serialise a chunk (without its embedding) for a checkpoint"""
+    return [
+        chunk.chunk_id,
+        chunk.page_number,
+        chunk.text,
+        chunk.start_position,
+        chunk.end_position,
+    ]
+
+
+def _chunk_from_row(document_id: str, row: List[Any]) -> Chunk:
+    chunk_id, page_number, text, start_position, end_position = row
+    return Chunk(
+        chunk_id=chunk_id,
+        document_id=document_id,
+        page_number=page_number,
+        text=text,
+        start_position=start_position,
+        end_position=end_position,
+    )
@@ -1,8 +1,13 @@
 import uuid
 from ..core import settings, vector_db_client
 from ..llm import llm_client
-from typing import Dict, Any, List
+from ..memory.retrieval_cache import retrieval_cache
+from .embedding_cache import query_embedding_cache
+from .vector_embedings import decode_embedding
+from typing import Dict, Any, List, Optional
+import numpy as np
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +19,7 @@ class QueryService:
         self.query = query.strip()
         self.query_id = str(uuid.uuid4())
         self.embedding_model = settings.openai_embedding_model
+        self.cache = query_embedding_cache
 
     def retrieve_similarities(self, top_k: int = 5, document_filenames: List[str] = None) -> Dict[str, Any]:
         """
@@ -30,28 +36,152 @@ class QueryService:
         modified_top_k = min(5, top_k)
         return self.query_embeddings(top_k=modified_top_k, embeddings=embeddings, document_filenames=document_filenames)
 
+    @staticmethod
+    def search_embeddings_batch(
+        embeddings: np.ndarray, top_ks: List[int], document_filenames: List[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search several query embeddings in one vector database call
+
+        Each query keeps its own top_k (capped like `retrieve_similarities`)
+        and all share the document filter. Searches whose results are in
+        the retrieval cache (and still current for the filtered documents)
+        are not sent to the vector database.
+
+        Args:
+            embeddings: Matrix with one query embedding per row
+            top_ks: Number of results for each query
+            document_filenames: Optional list of document filenames to filter by
+
+        Returns:
+            Search results (ids, documents, metadatas, distances), one per row
+        """
+        where_filter = QueryService._document_filter(document_filenames)
+        n_results = [min(5, top_k) for top_k in top_ks]
+        try:
+            results, generations = retrieval_cache.lookup(embeddings, n_results, where_filter)
+            missing = [index for index, result in enumerate(results) if result is None]
+            if missing:
+                found = vector_db_client.search_similar_many(
+                    embeddings[missing],
+                    n_results=[n_results[index] for index in missing],
+                    where=where_filter,
+                )
+                for index, result in zip(missing, found):
+                    results[index] = result
+                retrieval_cache.store(
+                    embeddings[missing],
+                    [n_results[index] for index in missing],
+                    where_filter,
+                    found,
+                    generations,
+                )
+            logger.info(
+                f"Retrieved {sum(len(result['ids'][0]) for result in results)} documents "
+                f"for {len(top_ks)} queries ({len(top_ks) - len(missing)} cached)"
+            )
+            return results
+        except Exception as e:
+            logger.error(f"Error querying vector database for {len(top_ks)} queries: {e}")
+            raise
+
     def convert_query_to_embeddings(self) -> List[float]:
         """
         Convert query text to embedding vector
 
+        Repeated queries are served from the query embedding cache without
+        calling the API.
+
         Returns:
             Embedding vector as list of floats
         """
+        cached = _cache_lookup([self.query])[0]
+        if cached is not None:
+            logger.info(f"Query embedding cache hit for query: {self.query_id}")
+            return cached.tolist()
+
         try:
             response = llm_client.embeddings.create(
                 model=self.embedding_model, input=self.query, encoding_format="float"
             )
             embedding = response.data[0].embedding
             logger.info(f"Generated embeddings for query: {self.query_id}")
+            _cache_store([self.query], [np.asarray(embedding, dtype=np.float32)])
             return embedding
         except Exception as e:
             logger.error(f"Error generating embeddings: {e}")
             raise
 
+    @staticmethod
+    def convert_queries_to_embeddings(
+        queries: List[str], deadline: Optional[float] = None
+    ) -> np.ndarray:
+        """
+        Convert several query texts to embedding vectors in one API request
+
+        Queries found in the query embedding cache are not sent; when all
+        of them are cached, no request is made at all. With a deadline the
+        request gets the remaining time as its timeout and is not retried,
+        so embedding cannot use up more than the caller's budget.
+
+        Args:
+            queries: Query texts
+            deadline: Optional `time.monotonic()` time the request must
+                finish by
+
+        Returns:
+            float32 matrix with one embedding row per query, in order
+        """
+        queries = [query.strip() for query in queries]
+        embeddings = _cache_lookup(queries)
+
+        # Send each distinct missing query once
+        missing: Dict[str, List[int]] = {}
+        for index, embedding in enumerate(embeddings):
+            if embedding is None:
+                missing.setdefault(query_embedding_cache.normalize(queries[index]), []).append(index)
+        if not missing:
+            logger.info(f"Query embedding cache served all {len(queries)} queries")
+            return np.stack(embeddings)
+
+        try:
+            texts = [queries[indexes[0]] for indexes in missing.values()]
+            client = llm_client.client
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("Retrieval deadline reached before queries were embedded")
+                client = client.with_options(max_retries=0, timeout=remaining)
+            response = client.embeddings.create(
+                model=settings.openai_embedding_model,
+                input=texts,
+                encoding_format="base64",
+            )
+            # The API returns one item per input, tagged with its position
+            generated = [
+                decode_embedding(item.embedding)
+                for item in sorted(response.data, key=lambda item: item.index)
+            ]
+            for indexes, embedding in zip(missing.values(), generated):
+                for index in indexes:
+                    embeddings[index] = embedding
+            _cache_store(texts, generated)
+            logger.info(
+                f"Generated embeddings for {len(texts)} of {len(queries)} queries in one request"
+            )
+            return np.stack(embeddings)
+        except Exception as e:
+            logger.error(f"Error generating embeddings for {len(queries)} queries: {e}")
+            raise
+
     def query_embeddings(self, embeddings: List[float], top_k: int, document_filenames: List[str] = None) -> Dict[str, Any]:
         """
         Search vector database with embedding vector
 
+        Chunks are stored batch by batch during ingestion and filtered only
+        by document, so documents that are still being indexed ("partial")
+        are searched on whatever pages are indexed so far.
+
         Args:
             embeddings: Query embedding vector
             top_k: Number of results to return
@@ -61,19 +191,27 @@ class QueryService:
             Search results from vector database
         """
         try:
-            # Build where filter if document_filenames provided
-            where_filter = None
-            if document_filenames:
-                where_filter = {"document_id": {"$in": document_filenames}}
-                logger.info(f"Filtering query by {len(document_filenames)} documents")
-            
-            results = vector_db_client.search_similar(embeddings, n_results=top_k, where=where_filter)
+            where_filter = self._document_filter(document_filenames)
+            matrix = np.asarray([embeddings], dtype=np.float32)
+            cached, generations = retrieval_cache.lookup(matrix, [top_k], where_filter)
+            results = cached[0]
+            if results is None:
+                results = vector_db_client.search_similar(embeddings, n_results=top_k, where=where_filter)
+                retrieval_cache.store(matrix, [top_k], where_filter, [results], generations)
             logger.info(f"Retrieved {len(results.get('documents', [[]])[0])} documents")
             return results
         except Exception as e:
             logger.error(f"Error querying vector database: {e}")
             raise
 
+    @staticmethod
+    def _document_filter(document_filenames: List[str] = None) -> Dict[str, Any]:
+        """Build the where filter restricting a search to the given documents"""
+        if not document_filenames:
+            return None
+        logger.info(f"Filtering query by {len(document_filenames)} documents")
+        return {"document_id": {"$in": document_filenames}}
+
     def generate_answer(
         self,
         messages: List[Dict[str, str]],
@@ -108,3 +246,20 @@ class QueryService:
         except Exception as e:
             logger.error(f"Error generating answer: {e}")
             raise
+
+
+def _cache_lookup(queries: List[str]) -> List[Optional[np.ndarray]]:
+    """Look up cached query embeddings, treating cache failures as misses"""
+    try:
+        return query_embedding_cache.get_many(settings.openai_embedding_model, queries)
+    except Exception as e:
+        logger.warning(f"Query embedding cache lookup failed: {e}")
+        return [None] * len(queries)
+
+
+def _cache_store(queries: List[str], embeddings: List[np.ndarray]) -> None:
+    """Write query embeddings to the cache, never failing the query"""
+    try:
+        query_embedding_cache.set_many(settings.openai_embedding_model, queries, embeddings)
+    except Exception as e:
+        logger.warning(f"Query embedding cache write failed: {e}")
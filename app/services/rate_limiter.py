@@ -0,0 +1,130 @@
+"""
+Token-bucket rate limiter for the embeddings API.
+
+Tracks requests per minute and tokens per minute in two buckets. Callers
+reserve capacity up front and sleep for the returned delay, so the limiter
+can be shared by every thread and event loop in the process without
+holding a lock while waiting. 429 responses shrink the effective rate
+(multiplicative decrease) and successful calls slowly restore it.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Optional
+
+from ..core import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limiter with adaptive backoff"""
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        min_rate_factor: float = 0.1,
+        recovery_step: float = 0.05,
+    ):
+        """
+        Initialize the limiter.
+
+        Args:
+            requests_per_minute: Allowed API requests per minute
+            tokens_per_minute: Allowed input tokens per minute
+            min_rate_factor: Lowest fraction of the configured rate after backoff
+            recovery_step: Rate fraction restored after each successful request
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.min_rate_factor = min_rate_factor
+        self.recovery_step = recovery_step
+
+        self._lock = threading.Lock()
+        self._rate_factor = 1.0
+        self._request_tokens = float(requests_per_minute)
+        self._token_tokens = float(tokens_per_minute)
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+
+    def reserve(self, tokens: int) -> float:
+        """
+        Reserve capacity for one request of `tokens` input tokens.
+
+        Returns:
+            Seconds the caller must wait before sending the request
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+
+            # A single request larger than the bucket can never fit; cap it
+            tokens = min(tokens, self.tokens_per_minute)
+            self._request_tokens -= 1
+            self._token_tokens -= tokens
+
+            request_rate = self.requests_per_minute * self._rate_factor / 60
+            token_rate = self.tokens_per_minute * self._rate_factor / 60
+            wait = max(
+                -self._request_tokens / request_rate if self._request_tokens < 0 else 0.0,
+                -self._token_tokens / token_rate if self._token_tokens < 0 else 0.0,
+                self._blocked_until - now,
+            )
+            return max(wait, 0.0)
+
+    async def acquire(self, tokens: int) -> None:
+        """Wait until a request of `tokens` input tokens may be sent"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            logger.debug(f"Rate limiter delaying request by {wait:.2f}s")
+            await asyncio.sleep(wait)
+
+    def record_success(self) -> None:
+        """Gradually restore the rate after successful requests"""
+        with self._lock:
+            self._rate_factor = min(1.0, self._rate_factor + self.recovery_step)
+
+    def record_rate_limited(self, retry_after: Optional[float] = None) -> float:
+        """
+        Back off after a 429 response.
+
+        Halves the effective rate and pauses all callers for `retry_after`
+        seconds (or a delay derived from the reduced rate).
+
+        Returns:
+            Seconds until requests may resume
+        """
+        with self._lock:
+            self._rate_factor = max(self.min_rate_factor, self._rate_factor / 2)
+            pause = retry_after if retry_after is not None else 60 / max(
+                1.0, self.requests_per_minute * self._rate_factor
+            )
+            pause = max(pause, 1.0)
+            self._blocked_until = max(self._blocked_until, time.monotonic() + pause)
+            logger.warning(
+                f"Embeddings API rate limited; pausing {pause:.1f}s, "
+                f"rate reduced to {self._rate_factor:.0%}"
+            )
+            return pause
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._request_tokens = min(
+            float(self.requests_per_minute),
+            self._request_tokens + elapsed * self.requests_per_minute * self._rate_factor / 60,
+        )
+        self._token_tokens = min(
+            float(self.tokens_per_minute),
+            self._token_tokens + elapsed * self.tokens_per_minute * self._rate_factor / 60,
+        )
+
+
+# Shared by every embedding call in the process
+embedding_rate_limiter = RateLimiter(
+    requests_per_minute=settings.embedding_rpm_limit,
+    tokens_per_minute=settings.embedding_tpm_limit,
+)
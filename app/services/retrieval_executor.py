@@ -0,0 +1,179 @@
+"""
+Concurrent execution of a batch of retrieval searches.
+
+A plan (or a refinement round) is embedded in one request, then its
+searches are split into at most `retrieval_max_concurrency` shards that
+are searched concurrently on a shared thread pool (Chroma's query runs
+outside the GIL). Results are merged as each shard completes, removing
+duplicate chunks, and the whole retrieval is bounded by
+`retrieval_deadline_seconds`: shards still running at the deadline are
+dropped rather than waited for, so one slow search cannot hold up the
+answer.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import threading
+import time
+
+import numpy as np
+
+from ..core import settings
+from .query_service import QueryService
+
+logger = logging.getLogger(__name__)
+
+
+class RetrievalExecutor:
+    """Runs a batch of (query, top_k) searches concurrently under a deadline"""
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        deadline_seconds: Optional[float] = None,
+    ):
+        """
+        Args:
+            max_concurrency: Concurrent searches for one batch
+                (defaults to `retrieval_max_concurrency`)
+            deadline_seconds: Time budget for embedding and searching one
+                batch (defaults to `retrieval_deadline_seconds`)
+        """
+        self.max_concurrency = max(1, max_concurrency or settings.retrieval_max_concurrency)
+        self.deadline_seconds = deadline_seconds or settings.retrieval_deadline_seconds
+
+    def run(
+        self, searches: List[Tuple[str, int]], document_filenames: List[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Embed and search a batch of queries, merging results by chunk ID
+
+        Args:
+            searches: List of (query, top_k) tuples
+            document_filenames: Optional list of document filenames to filter by
+
+        Returns:
+            Dictionary with the unique "ids", "documents", "metadatas" and
+            "distances" (a chunk found by several queries keeps its best
+            distance), ordered by query then rank; "retrieved", the number
+            of results before deduplication; and "timed_out"/"failed", the
+            number of searches dropped
+
+        Raises:
+            Exception: If the queries cannot be embedded
+        """
+        merged: Dict[str, Dict[str, Any]] = {}
+        summary = {"retrieved": 0, "timed_out": 0, "failed": 0}
+        if not searches:
+            return self._result(merged, summary)
+
+        started = time.monotonic()
+        deadline = started + self.deadline_seconds
+        embeddings = QueryService.convert_queries_to_embeddings(
+            [query for query, _ in searches], deadline=deadline
+        )
+
+        pool = _get_retrieval_pool()
+        pending: Dict[Future, List[int]] = {}
+        for shard in self._shards(len(searches)):
+            future = pool.submit(
+                QueryService.search_embeddings_batch,
+                embeddings[shard],
+                [searches[index][1] for index in shard],
+                document_filenames,
+            )
+            pending[future] = shard
+
+        while pending:
+            done, _ = wait(
+                pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED
+            )
+            if not done:
+                break
+            for future in done:
+                shard = pending.pop(future)
+                try:
+                    results = future.result()
+                except Exception as e:
+                    logger.error(f"Search failed for {len(shard)} queries: {e}")
+                    summary["failed"] += len(shard)
+                    continue
+                for index, search_results in zip(shard, results):
+                    summary["retrieved"] += self._merge(merged, index, search_results)
+
+        if pending:
+            for future, shard in pending.items():
+                future.cancel()
+                summary["timed_out"] += len(shard)
+            logger.warning(
+                f"Retrieval deadline of {self.deadline_seconds}s reached, "
+                f"dropped {summary['timed_out']} of {len(searches)} searches"
+            )
+
+        logger.info(
+            f"Searched {len(searches)} queries in {time.monotonic() - started:.3f}s: "
+            f"{summary['retrieved']} results, {len(merged)} unique"
+        )
+        return self._result(merged, summary)
+
+    def _shards(self, count: int) -> List[List[int]]:
+        """Split search indexes into at most `max_concurrency` contiguous shards"""
+        shard_count = min(self.max_concurrency, count)
+        return [
+            [int(index) for index in shard]
+            for shard in np.array_split(np.arange(count), shard_count)
+        ]
+
+    @staticmethod
+    def _merge(merged: Dict[str, Dict[str, Any]], index: int, search_results: Dict[str, Any]) -> int:
+        """Fold one query's results into `merged`; returns the number of results"""
+        ids = search_results.get("ids", [[]])[0] or []
+        documents = search_results.get("documents", [[]])[0] or []
+        metadatas = search_results.get("metadatas", [[]])[0] or []
+        distances = search_results.get("distances", [[]])[0] or [None] * len(ids)
+
+        for rank, (chunk_id, document, metadata, distance) in enumerate(
+            zip(ids, documents, metadatas, distances)
+        ):
+            entry = merged.get(chunk_id)
+            if entry is None:
+                merged[chunk_id] = {
+                    "order": (index, rank),
+                    "document": document,
+                    "metadata": metadata,
+                    "distance": distance,
+                }
+                continue
+            # Shards complete in any order; keep the position the chunk has
+            # in the plan and its best distance
+            entry["order"] = min(entry["order"], (index, rank))
+            if distance is not None and (entry["distance"] is None or distance < entry["distance"]):
+                entry["distance"] = distance
+        return len(ids)
+
+    @staticmethod
+    def _result(merged: Dict[str, Dict[str, Any]], summary: Dict[str, int]) -> Dict[str, Any]:
+        ordered = sorted(merged.items(), key=lambda item: item[1]["order"])
+        return {
+            "ids": [chunk_id for chunk_id, _ in ordered],
+            "documents": [entry["document"] for _, entry in ordered],
+            "metadatas": [entry["metadata"] for _, entry in ordered],
+            "distances": [entry["distance"] for _, entry in ordered],
+            **summary,
+        }
+
+
+_retrieval_pool: Optional[ThreadPoolExecutor] = None
+_retrieval_pool_lock = threading.Lock()
+
+
+def _get_retrieval_pool() -> ThreadPoolExecutor:
+    """Lazily create the thread pool shared by every retrieval (once, under a lock)"""
+    global _retrieval_pool
+    with _retrieval_pool_lock:
+        if _retrieval_pool is None:
+            _retrieval_pool = ThreadPoolExecutor(
+                max_workers=max(1, settings.retrieval_workers), thread_name_prefix="retrieval"
+            )
+    return _retrieval_pool
@@ -1,32 +1,148 @@
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-import uuid
-from typing import Dict, List, Any
+from collections import deque
+import hashlib
+from typing import Deque, Dict, Iterator, List, Any, Optional, Tuple
 
+import numpy as np
 
-class TextChunker:
-    def __init__(self, chunk_size=1000, overlap_size=200):
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=overlap_size,
-            length_function=len,
-            is_separator_regex=False,
+# Paragraphs, lines, words, characters
+DEFAULT_SEPARATORS = ["\n\n", "\n", " ", ""]
+
+
+class Chunk:
+    """
+    Compact record for one chunk of a document
+
+    Uses __slots__ instead of a per-chunk dict; the embedding is a float32
+    NumPy vector (usually a row view of the batch's embedding matrix).
+    """
+
+    __slots__ = (
+        "chunk_id",
+        "document_id",
+        "page_number",
+        "text",
+        "start_position",
+        "end_position",
+        "token_count",
+        "embedding",
+    )
+
+    def __init__(
+        self,
+        chunk_id: str,
+        document_id: str,
+        page_number: int,
+        text: str,
+        start_position: int,
+        end_position: int,
+    ):
+        self.chunk_id = chunk_id
+        self.document_id = document_id
+        self.page_number = page_number
+        self.text = text
+        self.start_position = start_position
+        self.end_position = end_position
+        self.token_count: Optional[int] = None
+        self.embedding: Optional[np.ndarray] = None
+
+    @property
+    def char_count(self) -> int:
+        return len(self.text)
+
+    def metadata(self) -> Dict[str, Any]:
+        """Metadata stored alongside the chunk in the vector database"""
+        return {
+            "document_id": self.document_id,
+            "page_number": self.page_number,
+            "char_count": self.char_count,
+            "start_position": self.start_position,
+            "end_position": self.end_position,
+        }
+
+    def __repr__(self):
+        return (
+            f"<Chunk(chunk_id='{self.chunk_id}', document_id='{self.document_id}', "
+            f"page={self.page_number}, chars={self.char_count})>"
         )
 
+
+class TextChunker:
+    """
+    Separator-aware chunker with exact character offsets
+
+    Follows the same rules as LangChain's RecursiveCharacterTextSplitter
+    (separators tried in order, separators kept at the start of the next
+    piece, overlapping merges, whitespace stripped), but works on
+    (start, end) spans of the page text instead of copying substrings.
+    Every page is scanned a bounded number of times (once per separator
+    level), so chunking is linear in the text length.
+    """
+
+    def __init__(self, chunk_size=1000, overlap_size=200, separators=None):
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be > 0, got {chunk_size}")
+        if overlap_size < 0 or overlap_size > chunk_size:
+            raise ValueError(
+                f"overlap_size must be between 0 and chunk_size ({chunk_size}), "
+                f"got {overlap_size}"
+            )
+        self.chunk_size = chunk_size
+        self.overlap_size = overlap_size
+        self.separators = list(separators or DEFAULT_SEPARATORS)
+
     def generate_chunks(
-        self, document_id: str, document: Dict[str, str]
-    ) -> List[Dict[str, Any]]:
+        self,
+        document_id: str,
+        document: Dict[str, str],
+        document_hash: Optional[str] = None,
+        start_position: int = 0,
+    ) -> List[Chunk]:
         """
-        Generate chunks from document pages with proper position tracking
+        Generate chunks from document pages with exact position tracking
 
         Args:
             document_id: Unique identifier for the document (filename)
             document: Dict of {page_key: page_content}
+            document_hash: Content hash of the source file, used for chunk IDs
+            start_position: Document offset of the first page (see `iter_chunks`)
 
         Returns:
-            List of chunk dictionaries with metadata
+            List of Chunk records with position metadata
         """
-        chunks = []
-        global_position = 0  # Track position across entire document
+        return list(self.iter_chunks(document_id, document, document_hash, start_position))
+
+    def iter_chunks(
+        self,
+        document_id: str,
+        document: Dict[str, str],
+        document_hash: Optional[str] = None,
+        start_position: int = 0,
+    ) -> Iterator[Chunk]:
+        """
+        Stream chunks page by page instead of building the whole list
+
+        `start_position`/`end_position` are offsets into the concatenation
+        of the non-empty pages in page order, so for every chunk
+        ``"".join(pages)[chunk.start_position:chunk.end_position] == chunk.text``.
+
+        Chunk IDs are derived from the content (see `chunk_id`), so chunking
+        the same file again yields the same IDs.
+
+        Args:
+            document_id: Unique identifier for the document (filename)
+            document: Dict of {page_key: page_content}
+            document_hash: Content hash of the source file; the document_id
+                is hashed instead when it is not known
+            start_position: Offset of the first page within the document,
+                when chunking a document part by part (chunks never span
+                pages, so the parts chunk exactly like the whole document)
+
+        Yields:
+            Chunk records in document order
+        """
+        page_offset = start_position  # Offset of the current page within the document
+        if document_hash is None:
+            document_hash = hashlib.sha256(document_id.encode("utf-8")).hexdigest()
 
         # Sort pages to ensure proper order (page_1, page_2, etc.)
         sorted_pages = sorted(
@@ -44,23 +160,124 @@ class TextChunker:
                 int(page_key.split("_")[1]) if page_key.startswith("page_") else 0
             )
 
-            # Split page content into chunks
-            chunked_texts = self.text_splitter.split_text(page_content)
-
-            for chunk_text in chunked_texts:
-                chunk_data = {
-                    "chunk_id": str(uuid.uuid4()),
-                    "document_id": document_id,
-                    "page_number": page_number,
-                    "text": chunk_text,
-                    "char_count": len(chunk_text),
-                    "start_position": global_position,
-                    "end_position": global_position + len(chunk_text),
-                }
-                chunks.append(chunk_data)
-
-                # Update global position (accounting for overlap)
-                # Move forward by chunk size minus overlap
-                global_position += len(chunk_text) - self.text_splitter._chunk_overlap
-
-        return chunks
+            for start, end in self.split_spans(page_content):
+                text = page_content[start:end]
+                yield Chunk(
+                    chunk_id=chunk_id(document_hash, page_number, page_offset + start, text),
+                    document_id=document_id,
+                    page_number=page_number,
+                    text=text,
+                    start_position=page_offset + start,
+                    end_position=page_offset + end,
+                )
+
+            page_offset += len(page_content)
+
+    def split_text(self, text: str) -> List[str]:
+        """Split text into chunk strings"""
+        return [text[start:end] for start, end in self.split_spans(text)]
+
+    def split_spans(self, text: str) -> Iterator[Tuple[int, int]]:
+        """
+        Split text into chunks, yielding their (start, end) offsets
+
+        Args:
+            text: Text to split
+
+        Yields:
+            (start, end) offsets of each chunk, whitespace-stripped
+        """
+        yield from self._split(text, 0, len(text), self.separators)
+
+    def _split(
+        self, text: str, start: int, end: int, separators: List[str]
+    ) -> Iterator[Tuple[int, int]]:
+        # Use the first separator that occurs in the span
+        separator = separators[-1]
+        remaining: List[str] = []
+        for index, candidate in enumerate(separators):
+            if not candidate:
+                separator = candidate
+                break
+            if text.find(candidate, start, end) != -1:
+                separator = candidate
+                remaining = separators[index + 1 :]
+                break
+
+        # Merge short pieces; split long pieces with the next separator
+        good: List[Tuple[int, int]] = []
+        for piece_start, piece_end in _split_on(text, start, end, separator):
+            if piece_end - piece_start < self.chunk_size:
+                good.append((piece_start, piece_end))
+                continue
+            if good:
+                yield from self._merge(text, good)
+                good = []
+            if remaining:
+                yield from self._split(text, piece_start, piece_end, remaining)
+            else:
+                yield piece_start, piece_end
+        if good:
+            yield from self._merge(text, good)
+
+    def _merge(
+        self, text: str, pieces: List[Tuple[int, int]]
+    ) -> Iterator[Tuple[int, int]]:
+        """Merge contiguous pieces into chunks of at most chunk_size, overlapping"""
+        window: Deque[Tuple[int, int]] = deque()
+        total = 0
+        for piece_start, piece_end in pieces:
+            length = piece_end - piece_start
+            if total + length > self.chunk_size:
+                if window:
+                    yield from _strip(text, window[0][0], window[-1][1])
+                    # Keep only the tail that fits in the overlap
+                    while total > self.overlap_size or (
+                        total + length > self.chunk_size and total > 0
+                    ):
+                        first_start, first_end = window.popleft()
+                        total -= first_end - first_start
+            window.append((piece_start, piece_end))
+            total += length
+        if window:
+            yield from _strip(text, window[0][0], window[-1][1])
+
+
+def chunk_id(document_hash: str, page_number: int, start_position: int, text: str) -> str:
+    """
+    Deterministic chunk ID from (document hash, page, offset, text hash)
+
+    Re-running an ingestion produces the same IDs, so writes are idempotent
+    and already stored chunks can be recognised and skipped.
+    """
+    text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    key = f"{document_hash}:{page_number}:{start_position}:{text_hash}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def _split_on(text: str, start: int, end: int, separator: str) -> Iterator[Tuple[int, int]]:
+    """Split a span before every occurrence of `separator`, keeping it"""
+    if not separator:
+        for index in range(start, end):
+            yield index, index + 1
+        return
+
+    piece_start = start
+    position = text.find(separator, start, end)
+    while position != -1:
+        if position > piece_start:
+            yield piece_start, position
+        piece_start = position
+        position = text.find(separator, position + len(separator), end)
+    if end > piece_start:
+        yield piece_start, end
+
+
+def _strip(text: str, start: int, end: int) -> Iterator[Tuple[int, int]]:
+    """Yield the span with surrounding whitespace removed, unless it is empty"""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    if start < end:
+        yield start, end
@@ -0,0 +1,57 @@
+"""
+Cleaning of text extracted from PDF pages.
+
+Pages are split into stripped, non-empty lines once, right after
+extraction; header/footer detection and cleaning both work on those lines.
+Cleaning then filters, de-hyphenates and joins the lines in a single loop
+and finishes with a few precompiled substitutions. The output is identical
+to the original multi-pass regex cleaner (see benchmarks/text_cleaning.py).
+"""
+
+from typing import List, Optional, Set
+import re
+
+# Runs of spaces/tabs collapse to one space
+_WHITESPACE = re.compile(r"[ \t]+")
+# Concatenated words: lowercase-to-uppercase transitions ("endNext")
+_CAMEL_CASE = re.compile(r"([a-z])([A-Z][a-z])")
+# Sentence punctuation stuck to the next word ("end.Next")
+_STUCK_SENTENCE = re.compile(r"([.!?])([A-Z][a-z])")
+
+
+def split_lines(page_text: Optional[str]) -> List[str]:
+    """Split page text into stripped, non-empty lines"""
+    if not page_text:
+        return []
+    return [line for line in map(str.strip, page_text.splitlines()) if line]
+
+
+def clean_lines(lines: List[str], header: Set[str], footer: Set[str]) -> str:
+    """
+    Clean a page given as stripped, non-empty lines.
+
+    Header and footer lines are dropped, words hyphenated across line
+    breaks are rejoined and the remaining line breaks become spaces.
+    """
+    kept = [line for line in lines if line not in header and line not in footer]
+    if not kept:
+        return ""
+
+    parts = []
+    last = len(kept) - 1
+    for index, line in enumerate(kept):
+        if index == last:
+            parts.append(line)
+        elif line.endswith("-"):
+            # Hyphenated at the line break: join the word halves
+            parts.append(line[:-1])
+        else:
+            parts.append(line)
+            parts.append(" ")
+
+    text = _WHITESPACE.sub(" ", "".join(parts))
+    # Two separate passes: a match of the first consumes characters the
+    # second could otherwise match, and the output must not change
+    text = _CAMEL_CASE.sub(r"\1 \2", text)
+    text = _STUCK_SENTENCE.sub(r"\1 \2", text)
+    return text.strip()
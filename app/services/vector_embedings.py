@@ -1,64 +1,284 @@
 from ..core import settings
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Union
 from ..llm import llm_client
+from .embedding_cache import embedding_cache
+from .rate_limiter import embedding_rate_limiter
+from .text_chunker import Chunk
+from openai import (
+    APIConnectionError,
+    APIStatusError,
+    AsyncOpenAI,
+    BadRequestError,
+    RateLimitError,
+)
+import numpy as np
+import asyncio
+import base64
 import logging
+import random
+import re
+
+try:
+    import tiktoken
+except ImportError:  # token counts fall back to an estimate
+    tiktoken = None
 
 logger = logging.getLogger(__name__)
 
 
 class EmbeddingService:
     """Service for generating embeddings using OpenAI API"""
-    
+
     def __init__(self):
         self.model = settings.openai_embedding_model
         self.batch_size = settings.embedding_batch_size
-    
-    def generate_embeddings(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        self.batch_max_tokens = settings.embedding_batch_max_tokens
+        self.max_concurrency = settings.embedding_max_concurrency
+        # At least one attempt, whatever the setting
+        self.max_retries = max(1, settings.embedding_max_retries)
+        self.cache = embedding_cache
+        self.rate_limiter = embedding_rate_limiter
+
+    def generate_embeddings(self, chunks: List[Chunk]) -> List[Chunk]:
         """
         Generate embeddings for text chunks using OpenAI API
-        
+
+        Cached embeddings are reused; the remaining chunks are sent in
+        concurrent batches governed by the shared RPM/TPM rate limiter.
+
         Args:
-            chunks: List of chunk dictionaries with 'text' field
-            
+            chunks: List of Chunk records
+
         Returns:
-            List of chunks with 'embeddings' field added
+            The same chunks with `embedding` set to a float32 vector
         """
         if not chunks:
             logger.warning("No chunks provided for embedding generation")
             return chunks
-        
+
         logger.info(f"Generating embeddings for {len(chunks)} chunks")
-        
+
         try:
-            # Process in batches to avoid rate limits
-            for batch_start in range(0, len(chunks), self.batch_size):
-                batch_end = min(batch_start + self.batch_size, len(chunks))
-                batch_chunks = chunks[batch_start:batch_end]
-                
-                # Extract text from chunks
-                batch_texts = [chunk['text'] for chunk in batch_chunks]
-                
+            # Serve what we can from the cache; only misses go to the API
+            texts = [chunk.text for chunk in chunks]
+            cached = self._cache_lookup(texts)
+            missing_chunks = []
+            for chunk, embedding in zip(chunks, cached):
+                if embedding is None:
+                    missing_chunks.append(chunk)
+                else:
+                    chunk.embedding = embedding
+
+            logger.info(
+                f"Embedding cache: {len(chunks) - len(missing_chunks)} hits, "
+                f"{len(missing_chunks)} misses"
+            )
+
+            if missing_chunks:
+                asyncio.run(self._embed_batches(missing_chunks))
+
+            logger.info(f"Successfully generated embeddings for {len(chunks)} chunks")
+            return chunks
+
+        except Exception as e:
+            logger.error(f"Failed to generate embeddings: {e}")
+            raise Exception(f"Embedding generation failed: {str(e)}")
+
+    def _pack_batches(self, chunks: List[Chunk]) -> List[List[Chunk]]:
+        """
+        Greedily pack chunks into batches of at most `batch_max_tokens` tokens
+
+        Batches are also capped at `batch_size` chunks. Token counts are
+        stored on each chunk as `token_count` for rate limiting.
+        """
+        batches = []
+        current: List[Chunk] = []
+        current_tokens = 0
+        for chunk in chunks:
+            if chunk.token_count is None:
+                chunk.token_count = _count_tokens(chunk.text, self.model)
+            tokens = chunk.token_count
+            if current and (
+                current_tokens + tokens > self.batch_max_tokens
+                or len(current) >= self.batch_size
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(chunk)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _embed_batches(self, chunks: List[Chunk]) -> None:
+        """Send all batches concurrently, at most `max_concurrency` in flight"""
+        batches = self._pack_batches(chunks)
+        logger.info(f"Packed {len(chunks)} chunks into {len(batches)} token-bounded batches")
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        # Retries are handled here so 429s feed the shared rate limiter
+        async with llm_client.create_async_client(max_retries=0) as client:
+
+            async def run(batch_number: int, batch_chunks: List[Chunk]) -> None:
+                async with semaphore:
+                    await self._embed_batch(client, batch_number, batch_chunks)
+
+            await asyncio.gather(
+                *(run(number, batch) for number, batch in enumerate(batches, start=1))
+            )
+
+    async def _embed_batch(
+        self, client: AsyncOpenAI, batch_number: Any, batch_chunks: List[Chunk]
+    ) -> None:
+        """
+        Embed one batch, retrying on rate-limit responses, server errors
+        (5xx), timeouts and connection errors
+
+        A 429 slows the shared rate limiter for every batch; the other
+        transient errors only delay this batch with exponential backoff.
+
+        A batch rejected for exceeding the model's token limit is split in
+        half and each half retried, so one oversized batch costs a split
+        rather than the whole ingestion. Other invalid requests are raised
+        straight away, since splitting cannot fix them.
+        """
+        # Extract text from chunks
+        batch_texts = [chunk.text for chunk in batch_chunks]
+        batch_tokens = sum(chunk.token_count for chunk in batch_chunks)
+
+        for attempt in range(1, self.max_retries + 1):
+            await self.rate_limiter.acquire(batch_tokens)
+            try:
                 logger.info(
-                    f"Processing batch {batch_start // self.batch_size + 1}: "
-                    f"chunks {batch_start}-{batch_end-1}"
+                    f"Processing batch {batch_number}: {len(batch_chunks)} chunks "
+                    f"(attempt {attempt})"
                 )
-                
-                # Call OpenAI API
-                response = llm_client.embeddings.create(
+
+                # Call OpenAI API; base64 decodes straight into float32
+                response = await client.embeddings.create(
                     model=self.model,
                     input=batch_texts,
-                    encoding_format="float"
+                    encoding_format="base64"
                 )
-                
-                # Add embeddings to chunks (fix: use batch_chunks, not all chunks)
-                for chunk, embedding_obj in zip(batch_chunks, response.data):
-                    chunk['embeddings'] = embedding_obj.embedding
-                
-                logger.debug(f"Batch {batch_start // self.batch_size + 1} completed")
-            
-            logger.info(f"Successfully generated embeddings for {len(chunks)} chunks")
-            return chunks
-            
+                break
+            except BadRequestError as e:
+                if len(batch_chunks) == 1 or not _is_token_limit_error(e):
+                    raise
+                middle = len(batch_chunks) // 2
+                logger.warning(
+                    f"Batch {batch_number} rejected ({len(batch_chunks)} chunks, "
+                    f"{batch_tokens} tokens), splitting in half: {e}"
+                )
+                await self._embed_batch(client, f"{batch_number}a", batch_chunks[:middle])
+                await self._embed_batch(client, f"{batch_number}b", batch_chunks[middle:])
+                return
+            except (APIConnectionError, APIStatusError) as e:
+                if not _is_transient(e) or attempt == self.max_retries:
+                    raise
+                if isinstance(e, RateLimitError):
+                    # Only a 429 says we are sending too fast: slow everyone down
+                    self.rate_limiter.record_rate_limited(_retry_after(e))
+                    continue
+                # Server and connection errors say nothing about our rate;
+                # back off this batch alone
+                delay = _backoff_delay(attempt, _retry_after(e))
+                logger.warning(
+                    f"Batch {batch_number} failed (attempt {attempt}), "
+                    f"retrying in {delay:.1f}s: {e}"
+                )
+                await asyncio.sleep(delay)
+
+        self.rate_limiter.record_success()
+
+        # One contiguous float32 matrix per batch; chunks hold row views
+        matrix = np.stack([decode_embedding(obj.embedding) for obj in response.data])
+        for chunk, row in zip(batch_chunks, matrix):
+            chunk.embedding = row
+
+        self._cache_store(batch_texts, matrix)
+
+        logger.debug(f"Batch {batch_number} completed")
+
+    def _cache_lookup(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Look up cached embeddings, treating cache failures as misses"""
+        try:
+            return self.cache.get_many(self.model, texts)
         except Exception as e:
-            logger.error(f"Failed to generate embeddings: {e}")
-            raise Exception(f"Embedding generation failed: {str(e)}")
+            logger.warning(f"Embedding cache lookup failed: {e}")
+            return [None] * len(texts)
+
+    def _cache_store(self, texts: List[str], embeddings: np.ndarray) -> None:
+        """Write embeddings to the cache, never failing the ingestion"""
+        try:
+            self.cache.set_many(self.model, texts, embeddings)
+        except Exception as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+
+
+_encodings: Dict[str, Any] = {}
+
+
+def _count_tokens(text: str, model: str) -> int:
+    """
+    Count the tokens of `text` for `model`
+
+    Uses tiktoken when it is installed (it ships with langchain-openai) and
+    falls back to ~4 characters per token otherwise.
+    """
+    if tiktoken is None:
+        return max(1, len(text) // 4)
+
+    encoding = _encodings.get(model)
+    if encoding is None:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("cl100k_base")
+        _encodings[model] = encoding
+    return max(1, len(encoding.encode(text, disallowed_special=())))
+
+
+def decode_embedding(value: Union[str, List[float]]) -> np.ndarray:
+    """Decode a base64 embedding (or a plain float list) into a float32 vector"""
+    if isinstance(value, str):
+        return np.frombuffer(base64.b64decode(value), dtype=np.float32)
+    return np.asarray(value, dtype=np.float32)
+
+
+# OpenAI's wording for an input over the model's context window ("This
+# model's maximum context length is 8192 tokens ...") and for a batch over
+# the per-request token cap ("Requested 350000 tokens, max 300000 tokens
+# per request")
+_TOKEN_LIMIT_MESSAGE = re.compile(
+    r"maximum context length|max(?:imum)? \d+ tokens per request", re.IGNORECASE
+)
+
+
+def _is_token_limit_error(error: BadRequestError) -> bool:
+    """Whether a 400 response rejected the request for having too many tokens"""
+    if error.code in ("context_length_exceeded", "max_tokens_per_request"):
+        return True
+    return bool(_TOKEN_LIMIT_MESSAGE.search(str(error.message)))
+
+
+def _is_transient(error: Exception) -> bool:
+    """Whether an API error is worth retrying: 429, 5xx, timeout or connection error"""
+    if isinstance(error, APIStatusError):
+        return isinstance(error, RateLimitError) or error.status_code >= 500
+    return isinstance(error, APIConnectionError)
+
+
+def _backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Exponential backoff with jitter (1s, 2s, 4s ... capped at 30s), or Retry-After"""
+    if retry_after is not None:
+        return retry_after
+    return min(30.0, 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Read the server's Retry-After hint from an error response, if present"""
+    try:
+        value = error.response.headers.get("retry-after")
+        return float(value) if value is not None else None
+    except (AttributeError, ValueError):
+        return None
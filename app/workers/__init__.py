@@ -0,0 +1,3 @@
+from .ingestion_worker import IngestionWorker
+
+__all__ = ["IngestionWorker"]
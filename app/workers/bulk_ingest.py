@@ -0,0 +1,390 @@
+"""
+Bulk ingestion of a local directory of PDFs, without going through HTTP.
+
+Run with:
+    python -m app.workers.bulk_ingest /path/to/pdfs --chat-id 1
+
+Every PDF under the directory is registered as a document of the chat
+(the file is indexed in place, nothing is copied) and run through the same
+extract/chunk/embed/store pipeline as uploads, several jobs at a time.
+Running the command again resumes where it left off: completed documents
+are skipped, interrupted ones continue from their ingestion checkpoints,
+and content that is already indexed under another name is linked instead
+of being processed again. Progress and throughput are logged periodically.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+import argparse
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..core import settings, db_client
+from ..exceptions import DocumentAlreadyExistsError
+from ..memory.job_queue import LocalJobQueue
+from ..repositories import ChatRepository, DocumentRepository
+from ..services.files_service import FileService
+from ..services.ingestion_service import IngestionService, has_live_ingestion
+
+logger = logging.getLogger(__name__)
+
+
+class BulkIngestor:
+    """Registers local PDFs as documents of a chat and ingests them in parallel"""
+
+    def __init__(
+        self,
+        chat_id: int,
+        workers: int,
+        batch_size: int,
+        progress_interval: float = 10.0,
+    ):
+        self.chat_id = chat_id
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.progress_interval = progress_interval
+        self.job_queue = LocalJobQueue()
+        self._stop_event = threading.Event()
+        self._finished = threading.Event()
+        self._started_at = 0.0
+
+    def stop(self) -> None:
+        """Stop starting new jobs; running jobs finish and can be resumed later"""
+        self._stop_event.set()
+
+    def run(self, directory: str, recursive: bool = True) -> Dict[str, int]:
+        """
+        Ingest every PDF under `directory`
+
+        Args:
+            directory: Directory to scan for PDF files
+            recursive: Whether to descend into subdirectories
+
+        Returns:
+            Counts of documents per outcome (completed, failed, linked,
+            already_ingested, skipped, not_started)
+
+        Raises:
+            ValueError: If the chat does not exist
+        """
+        paths = _find_pdfs(directory, recursive)
+        logger.info(f"Found {len(paths)} PDF file(s) in {directory}")
+
+        summary = {
+            "completed": 0,
+            "failed": 0,
+            "linked": 0,
+            "already_ingested": 0,
+            "skipped": 0,
+            "not_started": 0,
+        }
+        to_process = self._register(paths, summary)
+        if not to_process:
+            logger.info("Nothing to ingest")
+            return summary
+
+        batches = [
+            to_process[start : start + self.batch_size]
+            for start in range(0, len(to_process), self.batch_size)
+        ]
+        logger.info(
+            f"Ingesting {len(to_process)} document(s) in {len(batches)} job(s) "
+            f"with {self.workers} worker(s)"
+        )
+
+        self._started_at = time.monotonic()
+        reporter = threading.Thread(
+            target=self._report_progress, args=(len(to_process),), name="bulk-progress", daemon=True
+        )
+        reporter.start()
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bulk-ingest") as pool:
+                futures = [pool.submit(self._run_job, batch) for batch in batches]
+                for future in as_completed(futures):
+                    future.result()
+        finally:
+            self._finished.set()
+            reporter.join()
+
+        progress = self.job_queue.snapshot()
+        summary["completed"] = len([p for p in progress if p["stage"] == "completed"])
+        summary["failed"] = len([p for p in progress if p["stage"] == "failed"])
+        summary["not_started"] = len(to_process) - len(progress)
+        self._log_progress(len(to_process), final=True)
+        return summary
+
+    def _register(self, paths: List[str], summary: Dict[str, int]) -> List[Dict[str, Any]]:
+        """
+        Create or look up the document records of the files
+
+        Mirrors the upload route: identical content under a new name is
+        linked to the stored chunks, a filename already used by different
+        content is skipped, and documents left unfinished by an earlier run
+        are picked up again unless a live job still owns them (see
+        `has_live_ingestion`).
+
+        Returns:
+            The {"filename", "document_id", "path", "content_hash"} entries
+            to run through the pipeline
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            hashes = list(pool.map(FileService.hash_file, paths))
+
+        db = db_client.SessionLocal()
+        try:
+            if not ChatRepository(db).get_chat_by_id(self.chat_id):
+                raise ValueError(f"Chat with ID {self.chat_id} not found")
+
+            document_repo = DocumentRepository(db)
+            documents_by_hash = document_repo.get_by_content_hashes(hashes)
+            documents_by_name = document_repo.get_by_filenames(
+                os.path.basename(path) for path in paths
+            )
+
+            new_documents, linked_documents, resumed = [], [], []
+            batch_duplicates: List[Tuple[str, str, str]] = []
+            seen_filenames, batch_hashes = set(), {}
+            for path, content_hash in zip(paths, hashes):
+                filename = os.path.basename(path)
+                if filename in seen_filenames:
+                    logger.warning(f"Skipping {path}: another file named {filename} was found")
+                    summary["skipped"] += 1
+                    continue
+                seen_filenames.add(filename)
+
+                existing_doc = documents_by_name.get(filename)
+                if existing_doc is not None:
+                    outcome = self._classify_existing(existing_doc, content_hash, documents_by_hash)
+                    if outcome == "resume":
+                        resumed.append(
+                            {
+                                "filename": filename,
+                                "document_id": existing_doc.id,
+                                "path": path,
+                                "content_hash": content_hash,
+                            }
+                        )
+                    else:
+                        summary[outcome] += 1
+                    continue
+
+                source_doc = documents_by_hash.get(content_hash)
+                if source_doc is not None:
+                    linked_documents.append(
+                        {
+                            "filename": filename,
+                            "path": path,
+                            "chat_id": self.chat_id,
+                            "source_document": source_doc,
+                        }
+                    )
+                elif content_hash in batch_hashes:
+                    batch_duplicates.append((filename, path, batch_hashes[content_hash]))
+                else:
+                    batch_hashes[content_hash] = filename
+                    new_documents.append(
+                        {
+                            "filename": filename,
+                            "path": path,
+                            "status": "pending",
+                            "content_hash": content_hash,
+                            "chat_id": self.chat_id,
+                        }
+                    )
+
+            if resumed:
+                document_repo.update_documents(
+                    {
+                        values["document_id"]: {
+                            "status": "pending",
+                            "heartbeat_at": datetime.now(),
+                            "path": values["path"],
+                            "content_hash": values["content_hash"],
+                        }
+                        for values in resumed
+                    }
+                )
+            created = document_repo.create_documents(new_documents)
+            created_by_name = {document.filename: document for document in created}
+            linked_documents.extend(
+                {
+                    "filename": filename,
+                    "path": path,
+                    "chat_id": self.chat_id,
+                    "source_document": created_by_name[source_filename],
+                }
+                for filename, path, source_filename in batch_duplicates
+            )
+            summary["linked"] += len(document_repo.create_documents(linked_documents))
+
+            to_process = [
+                {
+                    "filename": document.filename,
+                    "document_id": document.id,
+                    "path": document.path,
+                    "content_hash": document.content_hash,
+                }
+                for document in created
+            ]
+            to_process.extend(resumed)
+        finally:
+            db.close()
+
+        logger.info(
+            f"Registered {len(created)} new and {len(resumed)} resumed document(s); "
+            f"{summary['linked']} linked, {summary['already_ingested']} already ingested, "
+            f"{summary['skipped']} skipped"
+        )
+        return to_process
+
+    def _classify_existing(
+        self, document: Any, content_hash: str, documents_by_hash: Dict[str, Any]
+    ) -> str:
+        """Decide what to do with a file whose filename already has a document"""
+        holder = documents_by_hash.get(content_hash)
+        same_content = document.content_hash == content_hash or (
+            # Failed documents release their hash; it is only theirs to reclaim
+            document.content_hash is None and document.status == "failed" and holder is None
+        )
+        if document.source_document_id is not None and holder is not None:
+            same_content = document.source_document_id == holder.id
+
+        if not same_content:
+            logger.warning(f"Skipping {document.filename}: filename is used by other content")
+            return "skipped"
+        if document.chat_id not in (None, self.chat_id):
+            logger.warning(
+                f"Skipping {document.filename}: already ingested for chat {document.chat_id}"
+            )
+            return "skipped"
+        if document.status == "completed" or document.source_document_id is not None:
+            return "already_ingested"
+        if has_live_ingestion(document):
+            # Another run or the ingestion worker is still on it
+            logger.warning(f"Skipping {document.filename}: being ingested by another job")
+            return "skipped"
+        return "resume"
+
+    def _run_job(self, documents: List[Dict[str, Any]]) -> None:
+        """Run one batch of documents through the ingestion pipeline"""
+        if self._stop_event.is_set():
+            return
+        job_id = self.job_queue.enqueue(chat_id=self.chat_id, documents=documents)
+        job = self.job_queue.get_job(job_id)
+        db = db_client.SessionLocal()
+        try:
+            IngestionService(db, self.job_queue).process_job(job)
+        except Exception as e:
+            logger.error(f"Bulk ingestion job {job_id} crashed: {e}", exc_info=True)
+            for filename, progress in job["documents"].items():
+                if progress["stage"] != "completed":
+                    self.job_queue.update_document(job, filename, stage="failed", error=str(e))
+        finally:
+            db.close()
+
+    def _report_progress(self, total: int) -> None:
+        while not self._finished.wait(self.progress_interval):
+            self._log_progress(total)
+
+    def _log_progress(self, total: int, final: bool = False) -> None:
+        """Log documents done, pages/chunks processed and their rates"""
+        progress = self.job_queue.snapshot()
+        completed = len([p for p in progress if p["stage"] == "completed"])
+        failed = len([p for p in progress if p["stage"] == "failed"])
+        pages = sum(p["pages_count"] for p in progress)
+        chunks = sum(p["chunks_stored"] for p in progress)
+        elapsed = max(time.monotonic() - self._started_at, 1e-9)
+
+        remaining = total - completed - failed
+        rate = (completed + failed) / elapsed
+        eta = f", ETA {remaining / rate:.0f}s" if rate and remaining and not final else ""
+        logger.info(
+            f"{'Finished' if final else 'Progress'}: {completed + failed}/{total} documents "
+            f"({completed} completed, {failed} failed) in {elapsed:.1f}s | "
+            f"{rate:.2f} docs/s, {pages / elapsed:.1f} pages/s, {chunks / elapsed:.1f} chunks/s{eta}"
+        )
+
+
+def _find_pdfs(directory: str, recursive: bool) -> List[str]:
+    """Absolute paths of the PDF files under `directory`, sorted"""
+    directory = os.path.abspath(directory)
+    if not os.path.isdir(directory):
+        raise ValueError(f"{directory} is not a directory")
+    if recursive:
+        paths = [
+            os.path.join(root, name)
+            for root, _, names in os.walk(directory)
+            for name in names
+        ]
+    else:
+        paths = [os.path.join(directory, name) for name in os.listdir(directory)]
+    return sorted(path for path in paths if path.lower().endswith(".pdf") and os.path.isfile(path))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.workers.bulk_ingest",
+        description="Ingest a directory of PDFs into a chat without going through the API",
+    )
+    parser.add_argument("directory", help="Directory containing the PDF files")
+    parser.add_argument("--chat-id", type=int, required=True, help="Chat to attach the documents to")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.ingestion_worker_concurrency,
+        help="Ingestion jobs run in parallel (default: INGESTION_WORKER_CONCURRENCY)",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=20, help="Documents per ingestion job (default: 20)"
+    )
+    parser.add_argument(
+        "--progress-interval",
+        type=float,
+        default=10.0,
+        help="Seconds between progress reports (default: 10)",
+    )
+    parser.add_argument(
+        "--no-recursive", action="store_true", help="Only scan the top-level directory"
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    ingestor = BulkIngestor(
+        chat_id=args.chat_id,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        progress_interval=args.progress_interval,
+    )
+
+    def _handle_signal(signum, frame):
+        logger.info("Stopping after the running jobs; run the command again to resume")
+        ingestor.stop()
+
+    signal.signal(signal.SIGINT, _handle_signal)
+    signal.signal(signal.SIGTERM, _handle_signal)
+
+    try:
+        summary = ingestor.run(args.directory, recursive=not args.no_recursive)
+    except (ValueError, DocumentAlreadyExistsError, SQLAlchemyError) as e:
+        logger.error(f"Bulk ingestion failed: {e}")
+        return 2
+
+    logger.info(
+        "Summary: " + ", ".join(f"{count} {outcome.replace('_', ' ')}" for outcome, count in summary.items())
+    )
+    return 1 if summary["failed"] or summary["not_started"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+Background worker that processes queued ingestion jobs.
+
+Run with:
+    python -m app.workers.ingestion_worker
+
+Concurrency is controlled by INGESTION_WORKER_CONCURRENCY and is
+independent of the number of API workers. Every worker process also
+re-queues jobs left behind by workers that died (no heartbeat for
+INGESTION_HEARTBEAT_TIMEOUT_SECONDS).
+"""
+
+import logging
+import signal
+import threading
+from typing import List
+
+from ..core import settings, db_client
+from ..memory.job_queue import ingestion_job_queue, IngestionJobQueue
+from ..services.ingestion_service import IngestionService
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionWorker:
+    """Pool of threads pulling ingestion jobs from the Redis queue"""
+
+    def __init__(self, job_queue: IngestionJobQueue, concurrency: int):
+        self.job_queue = job_queue
+        self.concurrency = max(1, concurrency)
+        self._stop_event = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        """Start the worker threads"""
+        for index in range(self.concurrency):
+            thread = threading.Thread(
+                target=self._run, name=f"ingestion-worker-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        reaper = threading.Thread(target=self._reap, name="ingestion-reaper", daemon=True)
+        reaper.start()
+        self._threads.append(reaper)
+        logger.info(f"Ingestion worker started with concurrency {self.concurrency}")
+
+    def stop(self) -> None:
+        """Ask the worker threads to exit once their current job is done"""
+        self._stop_event.set()
+
+    def join(self) -> None:
+        """Wait for all worker threads to exit"""
+        for thread in self._threads:
+            thread.join()
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                job = self.job_queue.dequeue(timeout=5)
+            except Exception as e:
+                logger.error(f"Failed to read from ingestion queue: {e}")
+                self._stop_event.wait(5)
+                continue
+
+            if job:
+                self._process(job)
+
+    def _reap(self) -> None:
+        """Periodically re-queue jobs whose worker stopped sending heartbeats"""
+        while not self._stop_event.wait(max(1, settings.ingestion_heartbeat_seconds)):
+            try:
+                self.job_queue.requeue_stale(settings.ingestion_heartbeat_timeout_seconds)
+            except Exception as e:
+                logger.error(f"Failed to re-queue stale ingestion jobs: {e}")
+
+    def _process(self, job) -> None:
+        db = db_client.SessionLocal()
+        try:
+            IngestionService(db, self.job_queue).process_job(job)
+        except Exception as e:
+            logger.error(f"Ingestion job {job['job_id']} crashed: {e}", exc_info=True)
+            try:
+                self.job_queue.update_job(job, "failed")
+            except Exception as queue_error:
+                logger.error(f"Failed to update ingestion job status: {queue_error}")
+        finally:
+            db.close()
+            try:
+                self.job_queue.ack(job)
+            except Exception as e:
+                logger.error(f"Failed to acknowledge ingestion job {job['job_id']}: {e}")
+
+
+def main() -> None:
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    worker = IngestionWorker(
+        job_queue=ingestion_job_queue,
+        concurrency=settings.ingestion_worker_concurrency,
+    )
+
+    def _handle_signal(signum, frame):
+        logger.info("Shutting down ingestion worker")
+        worker.stop()
+
+    signal.signal(signal.SIGINT, _handle_signal)
+    signal.signal(signal.SIGTERM, _handle_signal)
+
+    worker.start()
+    worker.join()
+
+
+if __name__ == "__main__":
+    main()
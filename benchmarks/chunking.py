@@ -0,0 +1,108 @@
+"""
+Benchmark for the in-house chunker against LangChain's splitter.
+
+Extracts and cleans every PDF in the corpus directory (the upload
+directory by default, or synthetic pages when it holds no PDFs), then
+chunks each page with both implementations. Reports chunk-boundary parity
+(identical chunk texts per page), checks that every chunk's offsets slice
+back to its text, and times both.
+
+Usage:
+    python -m benchmarks.chunking [--corpus ./pdfs] [--repeat 5]
+"""
+
+import argparse
+import glob
+import os
+import random
+import time
+from typing import Dict, List
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from app.core import settings
+from app.services.files_service import FileService
+from app.services.text_chunker import TextChunker
+
+WORDS = (
+    "the model results section analysis data method network learning "
+    "approach performance evaluation baseline proposed Table Figure"
+).split()
+
+
+def load_corpus(corpus: str) -> List[str]:
+    """Cleaned page texts of every PDF under `corpus`"""
+    # Uploads are stored as "<name>.pdf_<timestamp>"
+    paths = sorted(glob.glob(os.path.join(corpus, "**", "*.pdf*"), recursive=True))
+    if not paths:
+        return []
+    pages: List[str] = []
+    for path, extracted in FileService().extract_text_from_documents(paths).items():
+        if isinstance(extracted, Exception):
+            print(f"skipping {path}: {extracted}")
+            continue
+        pages.extend(page for page in extracted.values() if page)
+    return pages
+
+
+def synthetic_corpus(page_count: int) -> List[str]:
+    rng = random.Random(7)
+    pages = []
+    for _ in range(page_count):
+        paragraphs = []
+        for _ in range(rng.randint(3, 8)):
+            sentences = [
+                " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 25))) + "."
+                for _ in range(rng.randint(2, 10))
+            ]
+            paragraphs.append(" ".join(sentences))
+        pages.append("\n\n".join(paragraphs))
+    return pages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", default=settings.upload_directory)
+    parser.add_argument("--synthetic-pages", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus)
+    source = args.corpus
+    if not pages:
+        pages = synthetic_corpus(args.synthetic_pages)
+        source = "synthetic"
+    total_chars = sum(len(page) for page in pages)
+    print(f"Corpus: {source}, {len(pages)} pages, {total_chars:,} characters")
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=settings.chunk_size,
+        chunk_overlap=settings.chunk_overlap,
+        length_function=len,
+        is_separator_regex=False,
+    )
+    chunker = TextChunker(chunk_size=settings.chunk_size, overlap_size=settings.chunk_overlap)
+
+    # Boundary parity and exact offsets
+    identical = sum(splitter.split_text(page) == chunker.split_text(page) for page in pages)
+    document: Dict[str, str] = {f"page_{n}": page for n, page in enumerate(pages, start=1)}
+    joined = "".join(pages)
+    chunks = chunker.generate_chunks("benchmark", document)
+    exact = sum(joined[c.start_position : c.end_position] == c.text for c in chunks)
+    print(f"Boundary parity: {identical}/{len(pages)} pages identical")
+    print(f"Exact offsets:   {exact}/{len(chunks)} chunks")
+
+    for name, fn in (
+        ("langchain", lambda: [splitter.split_text(page) for page in pages]),
+        ("in-house", lambda: [chunker.split_text(page) for page in pages]),
+    ):
+        best = float("inf")
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - started)
+        print(f"{name:>9}: {best * 1000:8.1f} ms  ({total_chars / best / 1e6:,.1f} M chars/s)")
+
+
+if __name__ == "__main__":
+    main()
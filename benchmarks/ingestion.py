@@ -0,0 +1,531 @@
+"""
+Ingestion throughput benchmark.
+
+Generates synthetic PDFs of configurable size and layout, then runs every
+document through the ingestion stages one at a time: extract (PyMuPDF
+extraction and header/footer cleaning in the extraction pool, through
+`FileService.iter_extracted_parts`), chunk, embed and store. Embeddings
+are served by a local stub of the OpenAI embeddings endpoint
+(deterministic vectors, optional simulated latency) and chunks are stored
+in a throwaway Chroma directory, so runs need no API key and do not touch
+real data.
+
+Reports throughput (pages/s, chunks/s), per-document latency of every
+stage, the highest current RSS sampled while each stage ran (Linux only)
+and the process-wide peak RSS. `--output` writes the results as JSON;
+`--compare` prints the throughput change against a previous JSON result,
+so runs can be compared across commits.
+
+Usage:
+    python -m benchmarks.ingestion [--docs 8] [--pages 40] [--layout two-column]
+        [--repeat 3] [--embed-latency-ms 0] [--output result.json]
+        [--compare baseline.json]
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional
+
+import fitz  # PyMuPDF
+import numpy as np
+
+STAGES = ["extract", "chunk", "embed", "store"]
+
+WORDS = (
+    "the model results section analysis data method network learning "
+    "approach performance evaluation baseline proposed Table Figure"
+).split()
+
+PAGE_WIDTH, PAGE_HEIGHT, MARGIN = 612, 792, 54
+
+
+class EmbeddingsStub:
+    """
+    Local stand-in for the OpenAI embeddings endpoint
+
+    Each input text gets a unit vector seeded from its SHA-256, so the same
+    text always gets the same embedding. Responses honour
+    `encoding_format="base64"` like the real API.
+    """
+
+    def __init__(self, dimensions: int, latency_ms: float):
+        self.dimensions = dimensions
+        self.latency = latency_ms / 1000
+        self.requests = 0
+        self.inputs = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def embed(self, text: str) -> np.ndarray:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dimensions, dtype=np.float32)
+        return vector / np.linalg.norm(vector)
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the API
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                texts = body["input"]
+                if isinstance(texts, str):
+                    texts = [texts]
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                base64_encoded = body.get("encoding_format") == "base64"
+                data = []
+                for index, text in enumerate(texts):
+                    vector = stub.embed(text)
+                    data.append(
+                        {
+                            "object": "embedding",
+                            "index": index,
+                            "embedding": (
+                                base64.b64encode(vector.tobytes()).decode("ascii")
+                                if base64_encoded
+                                else vector.tolist()
+                            ),
+                        }
+                    )
+                tokens = sum(max(1, len(text) // 4) for text in texts)
+                payload = json.dumps(
+                    {
+                        "object": "list",
+                        "data": data,
+                        "model": body.get("model"),
+                        "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+                    }
+                ).encode("utf-8")
+
+                with stub._lock:
+                    stub.requests += 1
+                    stub.inputs += len(texts)
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def synthetic_pdf(
+    path: str, pages: int, layout: str, words_per_page: int, rng: random.Random
+) -> None:
+    """Write a text-dense PDF with a running header and footer on every page"""
+    columns = 2 if layout == "two-column" else 1
+    gutter = 18
+    column_width = (PAGE_WIDTH - 2 * MARGIN - (columns - 1) * gutter) / columns
+    font_size = 8 if columns == 2 else 9
+
+    with fitz.open() as pdf_doc:
+        for number in range(1, pages + 1):
+            page = pdf_doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+            page.insert_text((MARGIN, MARGIN - 18), "Synthetic Journal of Benchmarks 12 (2024)", fontsize=8)
+            page.insert_text((MARGIN, PAGE_HEIGHT - MARGIN + 24), f"Page {number}", fontsize=8)
+
+            per_column = words_per_page // columns
+            for column in range(columns):
+                paragraphs = []
+                remaining = per_column
+                while remaining > 0:
+                    length = min(remaining, rng.randint(40, 120))
+                    paragraphs.append(" ".join(rng.choice(WORDS) for _ in range(length)) + ".")
+                    remaining -= length
+                left = MARGIN + column * (column_width + gutter)
+                page.insert_textbox(
+                    fitz.Rect(left, MARGIN, left + column_width, PAGE_HEIGHT - MARGIN),
+                    "\n\n".join(paragraphs),
+                    fontsize=font_size,
+                )
+        pdf_doc.save(path)
+
+
+class IngestionBenchmark:
+    """Runs documents through the ingestion stages, timing each stage per document"""
+
+    def __init__(self):
+        # Imported here: the settings must pick up the benchmark environment
+        from app.core import settings, vector_db_client
+        from app.services.files_service import FileService
+        from app.services.text_chunker import TextChunker
+        from app.services.vector_embedings import EmbeddingService
+
+        self.file_service = FileService()
+        self.chunker = TextChunker(chunk_size=settings.chunk_size, overlap_size=settings.chunk_overlap)
+        self.embedding_service = EmbeddingService()
+        self.vector_db = vector_db_client
+        self.latencies: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        self.stage_rss: Dict[str, Optional[float]] = {stage: None for stage in STAGES}
+        self.rss_sampler = RssSampler()
+
+    def run_round(self, paths: List[str], record: bool = True) -> Dict[str, int]:
+        """
+        Ingest every document stage by stage
+
+        Args:
+            paths: PDF files to ingest
+            record: Whether to keep this round's timings (False for warmup)
+
+        Returns:
+            Pages and chunks processed
+        """
+        totals = {"pages": 0, "chunks": 0}
+        stored_ids: List[str] = []
+
+        for path in paths:
+            with open(path, "rb") as f:
+                content_hash = hashlib.sha256(f.read()).hexdigest()
+
+            # Extract and clean, sharded through the extraction pool exactly
+            # as the ingestion workers do (one part per document)
+            with self._stage("extract", record):
+                pages: Dict[str, str] = {}
+                for _, part, _ in self.file_service.iter_extracted_parts([path], window=1):
+                    if isinstance(part, Exception):
+                        raise part
+                    pages.update(part)
+
+            with self._stage("chunk", record):
+                chunks = self.chunker.generate_chunks(
+                    os.path.basename(path), pages, document_hash=content_hash
+                )
+
+            with self._stage("embed", record):
+                self.embedding_service.generate_embeddings(chunks)
+
+            with self._stage("store", record):
+                self.vector_db.store_chunks(chunks)
+
+            totals["pages"] += len(pages)
+            totals["chunks"] += len(chunks)
+            stored_ids.extend(chunk.chunk_id for chunk in chunks)
+
+        # Start every round from an empty collection so stores are inserts
+        for start in range(0, len(stored_ids), 5000):
+            self.vector_db.collection.delete(ids=stored_ids[start : start + 5000])
+        return totals
+
+    @contextmanager
+    def _stage(self, stage: str, record: bool) -> Iterator[None]:
+        self.rss_sampler.reset()
+        started = time.perf_counter()
+        yield
+        if record:
+            self.latencies[stage].append(time.perf_counter() - started)
+            rss = self.rss_sampler.reset()
+            if rss is not None:
+                self.stage_rss[stage] = max(self.stage_rss[stage] or 0.0, rss)
+
+
+class RssSampler:
+    """
+    Samples the current RSS of this process in a background thread
+
+    `ru_maxrss` only ever grows, so it cannot tell which stage used the
+    memory. The sampler keeps the highest current RSS seen since the last
+    `reset`, read from /proc every few milliseconds (Linux only; elsewhere
+    every reading is None).
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._highest: Optional[float] = None
+        if _current_rss_mb() is not None:
+            threading.Thread(target=self._run, daemon=True).start()
+
+    def reset(self) -> Optional[float]:
+        """Return the highest RSS in MB since the last reset and start over"""
+        current = _current_rss_mb()
+        with self._lock:
+            highest, self._highest = self._highest, current
+        if highest is None or current is None:
+            return current
+        return max(highest, current)
+
+    def _run(self) -> None:
+        while True:
+            rss = _current_rss_mb()
+            with self._lock:
+                if self._highest is None or rss > self._highest:
+                    self._highest = rss
+            time.sleep(self.interval)
+
+
+def summarize(
+    benchmark: IngestionBenchmark, totals: Dict[str, int], documents: int
+) -> Dict[str, Any]:
+    """Throughput and latency percentiles of every stage"""
+    stages = {}
+    for stage in STAGES:
+        latencies = benchmark.latencies[stage]
+        seconds = sum(latencies)
+        stages[stage] = {
+            "seconds": round(seconds, 4),
+            "pages_per_s": round(totals["pages"] / seconds, 2) if seconds else None,
+            "chunks_per_s": round(totals["chunks"] / seconds, 2) if seconds else None,
+            "docs_per_s": round(documents / seconds, 3) if seconds else None,
+            "latency_ms": {
+                "mean": round(1000 * seconds / len(latencies), 3),
+                "p50": round(1000 * _percentile(latencies, 50), 3),
+                "p95": round(1000 * _percentile(latencies, 95), 3),
+                "max": round(1000 * max(latencies), 3),
+            },
+            "rss_mb": _round(benchmark.stage_rss[stage]),
+        }
+
+    seconds = sum(stage["seconds"] for stage in stages.values())
+    return {
+        "stages": stages,
+        "total": {
+            "seconds": round(seconds, 4),
+            "pages_per_s": round(totals["pages"] / seconds, 2),
+            "chunks_per_s": round(totals["chunks"] / seconds, 2),
+            "docs_per_s": round(documents / seconds, 3),
+        },
+        "peak_rss_mb": {
+            "self": round(_peak_rss_mb(), 1),
+            "extraction_workers": _extraction_workers_peak_rss_mb(),
+        },
+    }
+
+
+def print_report(result: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    corpus = result["corpus"]
+    print(
+        f"Corpus: {corpus['documents']} documents, {corpus['pages']} pages, "
+        f"{corpus['chunks']} chunks, {corpus['bytes'] / 1e6:.1f} MB "
+        f"x {result['config']['repeat']} rounds"
+    )
+    header = f"{'stage':>8} {'pages/s':>10} {'chunks/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'rss MB':>8}"
+    if baseline:
+        header += f" {'vs base':>8}"
+    print(header)
+
+    rows = [(name, stage) for name, stage in result["stages"].items()]
+    rows.append(("total", result["total"]))
+    for name, stage in rows:
+        line = f"{name:>8} {stage['pages_per_s'] or 0:>10,.1f} {stage['chunks_per_s'] or 0:>10,.1f} "
+        if "latency_ms" in stage:
+            latency = stage["latency_ms"]
+            rss = stage["rss_mb"]
+            line += (
+                f"{latency['p50']:>9.1f} {latency['p95']:>9.1f} {latency['max']:>9.1f} "
+                + (f"{rss:>8.1f}" if rss is not None else f"{'n/a':>8}")
+            )
+        else:
+            line += " " * 38
+        if baseline:
+            previous = (
+                baseline["total"] if name == "total" else baseline["stages"].get(name, {})
+            ).get("pages_per_s")
+            change = f"{stage['pages_per_s'] / previous - 1:+.1%}" if previous else "n/a"
+            line += f" {change:>8}"
+        print(line)
+
+    rss = result["peak_rss_mb"]
+    server = result["embeddings_server"]
+    workers = rss["extraction_workers"]
+    print(
+        f"Peak RSS: {rss['self']:.1f} MB"
+        + (f", extraction worker {workers:.1f} MB" if workers is not None else "")
+    )
+    print(f"Embeddings stub: {server['requests']} requests, {server['inputs']} inputs")
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 1) if value is not None else None
+
+
+def _current_rss_mb() -> Optional[float]:
+    """Current RSS of this process in MB, from /proc (None where unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def _peak_rss_mb() -> float:
+    """High-water RSS of this process in MB (process-wide, across all stages)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def _extraction_workers_peak_rss_mb() -> Optional[float]:
+    """
+    Largest high-water RSS among the live extraction workers in MB
+
+    Read from /proc, so only available on Linux (None elsewhere, or when
+    extraction runs in-process).
+    """
+    from app.services.files_service import _extraction_executor
+
+    if _extraction_executor is None:
+        return None
+    peaks = []
+    for pid in list(getattr(_extraction_executor, "_processes", None) or {}):
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        peaks.append(int(line.split()[1]) / 2**10)
+        except OSError:
+            continue
+    return round(max(peaks), 1) if peaks else None
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=8)
+    parser.add_argument("--pages", type=int, default=40, help="pages per document")
+    parser.add_argument("--layout", choices=["single", "two-column"], default="two-column")
+    parser.add_argument("--words-per-page", type=int, default=450)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--embedding-dimensions", type=int, default=1536)
+    parser.add_argument(
+        "--embed-latency-ms", type=float, default=0.0, help="simulated API latency per request"
+    )
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="previous JSON result to compare throughput against")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    stub = EmbeddingsStub(args.embedding_dimensions, args.embed_latency_ms)
+    stub.start()
+    workdir = tempfile.TemporaryDirectory(prefix="ingestion-bench-")
+    try:
+        # Point the app at the stub and a throwaway vector store; no cache so
+        # every round embeds, no rate limiting beyond the stub itself
+        os.environ.update(
+            {
+                "OPENAI_BASE_URL": stub.base_url,
+                "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY") or "benchmark",
+                "EMBEDDING_CACHE_BACKEND": "none",
+                "EMBEDDING_RPM_LIMIT": "1000000",
+                "EMBEDDING_TPM_LIMIT": "1000000000",
+                "CHROMA_PERSIST_DIRECTORY": os.path.join(workdir.name, "chroma"),
+                "CHROMA_COLLECTION_NAME": "ingestion_benchmark",
+            }
+        )
+
+        rng = random.Random(11)
+        paths = []
+        for number in range(1, args.docs + 1):
+            path = os.path.join(workdir.name, f"synthetic_{number:03d}.pdf")
+            synthetic_pdf(path, args.pages, args.layout, args.words_per_page, rng)
+            paths.append(path)
+
+        benchmark = IngestionBenchmark()
+        benchmark.run_round(paths[:1], record=False)  # start the pools and connections
+        stub.requests = stub.inputs = 0
+
+        totals = {"pages": 0, "chunks": 0}
+        for _ in range(args.repeat):
+            for key, value in benchmark.run_round(paths).items():
+                totals[key] += value
+
+        from app.core import settings
+
+        result = {
+            "benchmark": "ingestion",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "config": {
+                "docs": args.docs,
+                "pages_per_doc": args.pages,
+                "layout": args.layout,
+                "words_per_page": args.words_per_page,
+                "repeat": args.repeat,
+                "embedding_dimensions": args.embedding_dimensions,
+                "embed_latency_ms": args.embed_latency_ms,
+                "chunk_size": settings.chunk_size,
+                "chunk_overlap": settings.chunk_overlap,
+                "embedding_batch_size": settings.embedding_batch_size,
+                "embedding_max_concurrency": settings.embedding_max_concurrency,
+                "extraction_workers": settings.extraction_workers or os.cpu_count(),
+                "extraction_pages_per_shard": settings.extraction_pages_per_shard,
+                "vector_store_batch_size": settings.vector_store_batch_size,
+            },
+            "corpus": {
+                "documents": args.docs,
+                "pages": totals["pages"] // args.repeat,
+                "chunks": totals["chunks"] // args.repeat,
+                "bytes": sum(os.path.getsize(path) for path in paths),
+            },
+            **summarize(benchmark, totals, args.docs * args.repeat),
+            "embeddings_server": {"requests": stub.requests, "inputs": stub.inputs},
+        }
+    finally:
+        stub.stop()
+        workdir.cleanup()
+
+    print_report(result, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
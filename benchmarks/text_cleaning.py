@@ -0,0 +1,151 @@
+"""
+Microbenchmark for PDF page cleaning.
+
+Compares the original multi-pass regex cleaner with the single-pass engine
+in app.services.text_cleaner, first checking that both produce identical
+output on synthetic academic-style pages and randomized edge cases.
+
+Usage:
+    python -m benchmarks.text_cleaning [--pages 2000] [--repeat 5]
+"""
+
+import argparse
+import random
+import re
+import string
+import time
+from collections import Counter
+from typing import List, Set, Tuple
+
+from app.services.text_cleaner import clean_lines, split_lines
+
+
+def legacy_clean(page_info: str, header: Set[str], footer: Set[str]) -> str:
+    """The cleaner as it was before the single-pass engine (reference output)"""
+    page_lines = []
+    for line in page_info.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line in header or line in footer:
+            continue
+        page_lines.append(line)
+
+    page_info = "\n".join(page_lines)
+    page_info = re.sub(r"-\n", "", page_info)
+    page_info = re.sub(r"(?<!\n)\n(?!\n)", " ", page_info)
+    page_info = re.sub(r"([a-z])([A-Z][a-z])", r"\1 \2", page_info)
+    page_info = re.sub(r"([.!?])([A-Z][a-z])", r"\1 \2", page_info)
+    page_info = re.sub(r"\n{3,}", "\n\n", page_info)
+    page_info = re.sub(r"[ \t]+", " ", page_info)
+    page_info = re.sub(r" *\n *", "\n", page_info)
+    return page_info.strip()
+
+
+def legacy_detect(pages: List[str]) -> Tuple[Set[str], Set[str]]:
+    """Header/footer detection as it was, splitting every page again"""
+    headers, footers = [], []
+    for page in pages:
+        lines = [line.strip() for line in page.splitlines() if line.strip()]
+        if len(lines) > 0:
+            headers.append(lines[0])
+        if len(lines) > 1:
+            footers.append(lines[-1])
+    return _common(headers), _common(footers)
+
+
+def detect(pages_lines: List[List[str]]) -> Tuple[Set[str], Set[str]]:
+    """Header/footer detection on the already split lines"""
+    headers = [lines[0] for lines in pages_lines if lines]
+    footers = [lines[-1] for lines in pages_lines if len(lines) > 1]
+    return _common(headers), _common(footers)
+
+
+def _common(candidates: List[str]) -> Set[str]:
+    return {
+        line for line, count in Counter(candidates).items() if count > 0.5 * len(candidates)
+    }
+
+
+WORDS = (
+    "the model results section analysis data method network learning "
+    "approach performance evaluation baseline proposed Table Figure"
+).split()
+
+
+def academic_page(rng: random.Random, number: int) -> str:
+    """A text-dense page with a running header, footer and layout artefacts"""
+    lines = ["Journal of Machine Learning Research 24 (2023)"]
+    for _ in range(rng.randint(40, 60)):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(6, 14))]
+        line = " ".join(words)
+        roll = rng.random()
+        if roll < 0.15:
+            line += "-"  # hyphenated across the line break
+        elif roll < 0.25:
+            line += ".Next"  # sentence stuck to the next word
+        elif roll < 0.3:
+            line = "  " + line + "\t\t"
+        elif roll < 0.35:
+            line += "modelResults"
+        lines.append(line)
+        if rng.random() < 0.05:
+            lines.append("")
+    lines.append(f"Page {number}")
+    lines.append("Proceedings of the Conference")
+    return "\n".join(lines)
+
+
+def random_page(rng: random.Random) -> str:
+    """Short pages from a small alphabet to hit the regex edge cases"""
+    alphabet = "aAbB.-?! \t\n\r\x0b\x0c\xa0" + string.digits[:2]
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 80)))
+
+
+def check_identical(rng: random.Random, cases: int) -> None:
+    for _ in range(cases):
+        pages = [random_page(rng) for _ in range(rng.randint(1, 4))]
+        header, footer = legacy_detect(pages)
+        pages_lines = [split_lines(page) for page in pages]
+        assert (header, footer) == detect(pages_lines)
+        for page, lines in zip(pages, pages_lines):
+            expected = legacy_clean(page, header, footer)
+            actual = clean_lines(lines, header, footer)
+            assert expected == actual, (page, expected, actual)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--fuzz", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    check_identical(rng, args.fuzz)
+
+    pages = [academic_page(rng, number) for number in range(1, args.pages + 1)]
+
+    def run_legacy() -> List[str]:
+        header, footer = legacy_detect(pages)
+        return [legacy_clean(page, header, footer) for page in pages]
+
+    def run_engine() -> List[str]:
+        pages_lines = [split_lines(page) for page in pages]
+        header, footer = detect(pages_lines)
+        return [clean_lines(lines, header, footer) for lines in pages_lines]
+
+    assert run_legacy() == run_engine(), "outputs differ on academic pages"
+    print(f"Identical output on {args.fuzz} randomized and {args.pages} academic pages")
+
+    for name, fn in (("legacy", run_legacy), ("engine", run_engine)):
+        best = float("inf")
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - started)
+        print(f"{name:>7}: {best * 1000:8.1f} ms  ({args.pages / best:,.0f} pages/s)")
+
+
+if __name__ == "__main__":
+    main()